@@ -28,7 +28,7 @@ for client in resp.json():
 # === Créer un crédit ===
 credit_data = {
     "client": "Ibrahim",            # nom du client (doit exister)
-    "credit_date": "04-09-2025",    # format dd-mm-yyyy
+    "credit_date": "2025-09-04",    # format YYYY-MM-DD
     "montant": 1500.00,
     "motif": "Achat fournitures"
 }
@@ -43,3 +43,20 @@ resp = requests.get(f"{BASE_URL}/credits")
 logger.info(f"List des credit: STATUS_CODE({resp.status_code})")
 for credit in resp.json():
     print(credit)
+
+
+# === Lister les crédits page par page ===
+after_id = 0
+while after_id is not None:
+    resp = requests.get(f"{BASE_URL}/credits/page", params={"after_id": after_id, "limit": 20})
+    page = resp.json()
+    logger.info(f"Page des credits après {after_id}: {len(page['items'])} crédits")
+    after_id = page["next_cursor"]
+
+
+# === Synchronisation incrémentale ===
+resp = requests.get(f"{BASE_URL}/sync", params={"since": 0})
+delta = resp.json()
+logger.info(f"Sync: version {delta['version']}, {len(delta['credits']['upserted'])} crédits")
+resp = requests.get(f"{BASE_URL}/sync", params={"since": delta["version"]})     # rien de nouveau
+logger.info(f"Sync depuis {delta['version']}: {resp.json()['credits']}")
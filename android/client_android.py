@@ -8,8 +8,12 @@ from kivy.core.window import Window
 # Example: 360x640 (like a small Android phone screen)
 Window.size = (360, 600)
 
+import json
+import os
 import requests
 BASE_URL = "http://127.0.0.1:8000"  # ton API FastAPI
+PAGE_SIZE = 50                      # crédits affichés par page
+CACHE_FILE = "credits_cache.json"   # cache local des crédits (dans user_data_dir)
 
 
 class MenuButton(MDRectangleFlatIconButton):
@@ -20,49 +24,105 @@ class MenuScreen(MDScreen):
     pass
 
 
+class CreditCache:
+    """
+    Copie locale des crédits, mise à jour par deltas (GET /sync?since=<version>).
+    Seules les modifications depuis la dernière synchronisation sont téléchargées.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.version = 0
+        self.credits = {}           # id -> credit
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.version = data["version"]
+            self.credits = {credit["id"]: credit for credit in data["credits"]}
+        except (OSError, ValueError, KeyError):
+            pass                    # pas de cache: synchronisation complète
+
+    def sync(self):
+        """
+        Appliquer les modifications du serveur depuis la version du cache
+        """
+        while True:
+            resp = requests.get(f"{BASE_URL}/sync", params={"since": self.version})
+            resp.raise_for_status()
+            delta = resp.json()
+            if delta["reset"]:      # base restaurée côté serveur: tout recharger
+                self.version, self.credits = 0, {}
+                continue
+            for credit in delta["credits"]["upserted"]:
+                self.credits[credit["id"]] = credit
+            for credit_id in delta["credits"]["deleted"]:
+                self.credits.pop(credit_id, None)
+            self.version = delta["version"]
+            if not delta["has_more"]:
+                break
+        self.save()
+
+    def save(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "credits": list(self.credits.values())}, f)
+
+    def all(self):
+        return [self.credits[credit_id] for credit_id in sorted(self.credits)]
+
+
 class CreditScreen(MDScreen):
     """
     Credit Screen to display credits in a table
-    1. Show all credits
-    2. Search credits by client name
-    3. Refresh the table
+    1. Show the credits of the local cache, synchronized by deltas with the API
+    2. "Charger plus" shows the next PAGE_SIZE credits
+    3. Search credits by client name
+    4. Refresh the table
     """
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
+        self.cache = None
+        self.all_data = []
+        self.filtered_data = []
+        self.shown = PAGE_SIZE
 
     def show_credits(self):
         """
-        Charger les crédits depuis l'API et afficher dans un tableau
+        Synchroniser le cache local avec l'API et afficher les crédits dans un tableau
         """
         # self.ids.client_table_box.clear_widgets()
+        if self.cache is None:
+            self.cache = CreditCache(os.path.join(MDApp.get_running_app().user_data_dir, CACHE_FILE))
         try:
-            resp = requests.get(f"{BASE_URL}/credits")
-            self.all_data = resp.json()
+            self.cache.sync()
         except Exception as e:
-            self.all_data = []
-            print("Erreur API:", e)
-        else:
-            self.build_table(self.all_data)
+            print("Erreur API (affichage du cache):", e)
+        self.all_data = self.cache.all()
+        self.shown = PAGE_SIZE
+        self.filter_credits(self.ids.search_credit.text)
+
+    def load_more_credits(self):
+        """
+        Afficher la page suivante des crédits
+        """
+        self.shown += PAGE_SIZE
+        self.build_table(self.filtered_data)
 
     def filter_credits(self, query):
         """
         Filtrer les crédits en fonction de la requête
         """
         # query = self.ids.search_credit_client.text
-        if not hasattr(self, 'all_data'):
-            return
         if query.strip() == "":
-            filtered_data = self.all_data
+            self.filtered_data = self.all_data
         else:
-            filtered_data = [d for d in self.all_data if query.lower() in d["client"].lower()]
+            self.filtered_data = [d for d in self.all_data if query.lower() in d["client"].lower()]
 
-        self.build_table(filtered_data)
+        self.build_table(self.filtered_data)
 
     def build_table(self, data):
         """Charger les crédits depuis l'API et afficher dans un tableau"""
 
         self.ids.credit_table_box.clear_widgets()
-        rows = [(d["id"], d["credit_date"], d["client"], f"{d['montant']:.2f}") for d in data]
+        rows = [(d["id"], d["credit_date"], d["client"], f"{d['montant']:.2f}") for d in data[:self.shown]]
 
         # Créer le tableau
         table = MDDataTable(
@@ -81,6 +141,7 @@ class CreditScreen(MDScreen):
         table.bind(on_row_press=self.on_row_press)
         # Vider le conteneur avant de recréer la table
         self.ids.credit_table_box.add_widget(table)
+        self.ids.load_more_button.disabled = self.shown >= len(data)
 
     def on_row_press(self, instance_table, instance_row):
         """
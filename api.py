@@ -1,13 +1,45 @@
-from fastapi import FastAPI, HTTPException
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+from fastapi import Body, FastAPI, HTTPException, Path, Query, Request, Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
 import sys, os
 # Go up one directory (from app/ to my_project/) and add to sys.path
 # sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-import db_handler  # Ensure database handler is imported
+from db_async import AsyncDatabase   # Database methods run on a DB executor, off the event loop
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, ApiMetrics, MetricsMiddleware
+
+db = AsyncDatabase(os.environ.get("LIFETIPAZA_DB", "./lifeTipazaDB.db"))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    db.close()
 
-app = FastAPI(title="LifeTipaza API", version="1.0.0")
-db = db_handler.Database("./lifeTipazaDB.db")
+
+app = FastAPI(title="LifeTipaza API", version="1.0.0", lifespan=lifespan)
+app.add_middleware(GZipMiddleware, minimum_size=1000)   # gzip when the client sends Accept-Encoding: gzip
+metrics = ApiMetrics()
+app.add_middleware(MetricsMiddleware, metrics=metrics)  # outermost: times gzip and streaming too
+
+PAGE_SIZE = 50          # default page size of the paginated routes
+MAX_PAGE_SIZE = 500
+MAX_BULK_SIZE = 1000    # rows per bulk insert
+MAX_STREAMS = 20        # NDJSON streams sent at the same time (one SQLite connection each)
+NDJSON = "application/x-ndjson"
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"     # 'YYYY-MM'
+
+# Tables read by each listing: its ETag changes when one of them changes (see change_log)
+CLIENTS_TABLES = ("clients", "credit")      # balance of the client comes from its credits
+CREDITS_TABLES = ("credit", "clients")      # name of the client
+VERSEMENTS_TABLES = ("paiement",)
 
 
 # === MODELES ===
@@ -20,28 +52,133 @@ class ClientCreate(BaseModel):
 
 class CreditCreate(BaseModel):
     client: str
-    credit_date: str   # format "dd-mm-yyyy"
-    montant: float
+    credit_date: str   # format "YYYY-MM-DD" ("dd-mm-yyyy" accepté)
+    montant: Decimal   # dinars, stocké en centimes
     motif: str = ""
 
 
 class VersementCreate(BaseModel):
     credit_id: int
     client_id: int
-    date_versement: str
-    montant: float
+    date_versement: str     # format "YYYY-MM-DD" ("dd-mm-yyyy" accepté)
+    montant: Decimal        # dinars, stocké en centimes
     observation: str = ""
 
 
+def paginate(rows, limit):
+    """
+    Build a keyset page from ``limit + 1`` rows ordered by id.
+    next_cursor is the after_id of the next page, None on the last page.
+    """
+    items = rows[:limit]
+    next_cursor = items[-1][0] if len(rows) > limit else None
+    return items, next_cursor
+
+
+def credit_to_dict(row):
+    return {
+        "id": row[0],
+        "credit_date": row[1],
+        "client": row[2],
+        "montant": row[4],
+        "motif": row[3]
+    }
+
+
+def wants_stream(request: Request, stream: bool):
+    """NDJSON streaming with ?stream=1 or Accept: application/x-ndjson."""
+    return stream or NDJSON in request.headers.get("accept", "")
+
+
+async def conditional(request: Request, response: Response, tables, variant=""):
+    """
+    Strong ETag of a GET, from the data version of the tables it reads.
+    Return a 304 response when the client already has it (If-None-Match), without running the query.
+    """
+    version = await db.data_version(tables)
+    key = f"{version}|{request.url.path}?{request.url.query}|{variant}"
+    etag = '"' + hashlib.sha1(key.encode()).hexdigest()[:20] + '"'
+    response.headers["ETag"] = etag
+    response.headers["Vary"] = "Accept"
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+
+class StreamSlots:
+    """
+    Number of NDJSON streams sent at the same time.
+    Each stream reads on its own SQLite connection (outside the pool) for as long as the client takes:
+    past ``limit`` the request is answered 503 instead of opening more connections.
+    """
+    def __init__(self, limit):
+        self.limit = limit
+        self.active = 0
+
+    def take(self):
+        if self.active >= self.limit:
+            raise HTTPException(status_code=503, detail="Trop de téléchargements en cours, réessayer plus tard.",
+                                headers={"Retry-After": "2"})
+        self.active += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+        return release
+
+
+stream_slots = StreamSlots(MAX_STREAMS)
+
+
+def ndjson_response(db_method, to_json=list, headers=None):
+    """
+    Stream the rows of a Database generator method, one JSON document per line.
+    Rows are fetched in batches while the response is sent: memory stays flat whatever the table size.
+    Raises 503 when MAX_STREAMS streams are already being sent.
+    """
+    release = stream_slots.take()
+
+    async def lines():
+        try:
+            async for rows in db.iterate(db_method):
+                # Money (Decimal) is encoded as a number, like FastAPI does
+                yield "".join(json.dumps(to_json(row), default=float, ensure_ascii=False) + "\n" for row in rows)
+        finally:
+            release()
+    # release() again after the response, in case the body was never iterated
+    return StreamingResponse(lines(), media_type=NDJSON, headers=headers, background=BackgroundTask(release))
+
+
 # === ROUTES CLIENTS ===
 @app.get("/clients")
-def list_clients():
-    return db.dump_clients()
+async def list_clients(request: Request, response: Response, stream: bool = False):
+    stream = wants_stream(request, stream)
+    not_modified = await conditional(request, response, CLIENTS_TABLES, NDJSON if stream else "json")
+    if not_modified:
+        return not_modified
+    if stream:
+        return ndjson_response("iter_clients", headers=dict(response.headers))
+    return await db.dump_clients()
+
+
+@app.get("/clients/page")
+async def page_clients(request: Request, response: Response, after_id: int = Query(0, ge=0),
+                       limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    not_modified = await conditional(request, response, CLIENTS_TABLES)
+    if not_modified:
+        return not_modified
+    items, next_cursor = paginate(await db.page_clients(after_id, limit + 1), limit)
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @app.post("/clients")
-def create_client(client: ClientCreate):
-    result = db.insert_new_client(client.nom, client.telephone, client.commune, client.observation)
+async def create_client(client: ClientCreate):
+    result = await db.insert_new_client(client.nom, client.telephone, client.commune, client.observation)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
@@ -49,40 +186,156 @@ def create_client(client: ClientCreate):
 
 # === ROUTES CREDITS ===
 @app.get("/credits")
-def list_credits():
-    rows = db.dump_credits()
-    return [
-        {
-            "id": row[0],
-            "credit_date": row[1],
-            "client": row[2],
-            "montant": row[4],
-            "motif": row[3]
-        }
-        for row in rows
-    ]
+async def list_credits(request: Request, response: Response, stream: bool = False):
+    stream = wants_stream(request, stream)
+    not_modified = await conditional(request, response, CREDITS_TABLES, NDJSON if stream else "json")
+    if not_modified:
+        return not_modified
+    if stream:
+        return ndjson_response("iter_credits", credit_to_dict, headers=dict(response.headers))
+    return [credit_to_dict(row) for row in await db.dump_credits()]
+
+
+@app.get("/credits/page")
+async def page_credits(request: Request, response: Response, after_id: int = Query(0, ge=0),
+                       limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)):
+    not_modified = await conditional(request, response, CREDITS_TABLES)
+    if not_modified:
+        return not_modified
+    rows, next_cursor = paginate(await db.page_credits(after_id, limit + 1), limit)
+    return {"items": [credit_to_dict(row) for row in rows], "next_cursor": next_cursor}
 
 
 @app.post("/credits")
-def create_credit(credit: CreditCreate):
-    result = db.insert_new_credit(credit.client, credit.credit_date, credit.montant, credit.motif)
+async def create_credit(credit: CreditCreate):
+    result = await db.insert_new_credit(credit.client, credit.credit_date, credit.montant, credit.motif)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
 
 
+@app.post("/credits/bulk")
+async def create_credits_bulk(credits: list[CreditCreate] = Body(max_length=MAX_BULK_SIZE)):
+    """
+    Enregistrer plusieurs crédits en une transaction: tout ou rien, erreurs par ligne (index).
+    """
+    result = await db.insert_credits_bulk(
+        [(credit.client, credit.credit_date, credit.montant, credit.motif) for credit in credits]
+    )
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail={"error": result["error"], "errors": result["errors"]})
+    return result
+
+
 # === ROUTES VERSEMENTS ===
 @app.get("/credits/{credit_id}/versements")
-def get_credit_versements(credit_id: int):
-    return db.get_credit_versements(credit_id)
+async def get_credit_versements(request: Request, response: Response, credit_id: int):
+    not_modified = await conditional(request, response, VERSEMENTS_TABLES)
+    if not_modified:
+        return not_modified
+    return await db.get_credit_versements(credit_id)
 
 
 @app.post("/versements")
-def create_versement(versement: VersementCreate):
-    result = db.insert_new_versement(
+async def create_versement(versement: VersementCreate):
+    result = await db.insert_new_versement(
         versement.credit_id, versement.client_id,
         versement.date_versement, versement.montant, versement.observation
     )
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
     return result
+
+
+@app.post("/versements/bulk")
+async def create_versements_bulk(versements: list[VersementCreate] = Body(max_length=MAX_BULK_SIZE)):
+    """
+    Enregistrer plusieurs versements en une transaction: tout ou rien, erreurs par ligne (index).
+    """
+    result = await db.insert_versements_bulk([
+        (v.credit_id, v.client_id, v.date_versement, v.montant, v.observation) for v in versements
+    ])
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail={"error": result["error"], "errors": result["errors"]})
+    return result
+
+
+# === RECHERCHE ===
+@app.get("/search")
+async def search(request: Request, response: Response, q: str = Query(..., min_length=1, max_length=100),
+                 limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE)):
+    """
+    Recherche des clients (nom, téléphone, commune) et des crédits (motif, date, montant, client).
+    Les accents sont ignorés, les meilleurs résultats viennent en premier.
+    """
+    not_modified = await conditional(request, response, CREDITS_TABLES)
+    if not_modified:
+        return not_modified
+    clients = await db.search_clients(q, limit=limit)
+    credits = await db.search_credits(q, "tous", limit=limit)
+    return {"clients": clients, "credits": [credit_to_dict(row) for row in credits]}
+
+
+# === SALAIRES ===
+@app.get("/salaires")
+async def get_salaires(mois: str = Query(..., pattern=MONTH_PATTERN)):
+    """
+    Salaires du mois (YYYY-MM) de tous les employés.
+    cloture est vrai pour les salaires lus dans la clôture du mois, faux pour ceux calculés à la demande.
+    """
+    return await db.calculate_salaire_mensuel(mois)
+
+
+@app.get("/salaires/clotures")
+async def list_clotures():
+    """Mois clôturés: nombre d'employés, total des salaires nets et date du dernier calcul."""
+    return [
+        {"mois": mois, "employes": count, "total": total, "date_calcul": date_calcul}
+        for mois, count, total, date_calcul in await db.payroll_months()
+    ]
+
+
+@app.post("/salaires/{mois}/cloture")
+async def close_salaires(mois: str = Path(..., pattern=MONTH_PATTERN)):
+    """
+    Clôturer le mois: les salaires de tous les employés sont enregistrés (recalculés si déjà clôturé).
+    Les opérations modifiées ensuite dans ce mois mettent la clôture à jour.
+    """
+    result = await db.close_payroll(mois)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+# === SYNCHRONISATION ===
+@app.get("/sync")
+async def sync(since: int = Query(0, ge=0), limit: int = Query(1000, ge=1, le=5000)):
+    """
+    Modifications depuis la version ``since`` (0 = tout).
+    Rappeler avec la version retournée tant que has_more est vrai.
+    """
+    result = await db.changes_since(since, limit)
+    if not result["success"]:
+        raise HTTPException(status_code=500, detail=result["error"])
+    changes = result["changes"]
+    return {
+        "version": result["version"],
+        "has_more": result["has_more"],
+        "reset": result["reset"],
+        "clients": changes["clients"],
+        "credits": {
+            "upserted": [credit_to_dict(row) for row in changes["credit"]["upserted"]],
+            "deleted": changes["credit"]["deleted"],
+        },
+        "versements": changes["paiement"],
+    }
+
+
+# === METRIQUES ===
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Métriques au format texte de Prometheus: requêtes par route et statut, durées (histogramme),
+    requêtes en cours, pool de connexions, cache et temps des méthodes de la base.
+    """
+    return PlainTextResponse(metrics.render(db.db), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,746 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Small benchmarks for the database layer.
+#                 Runs on a temporary copy of the database, the original is never touched.
+# ----------------------------------------------------------------------------
+
+
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import os
+import platform
+import shutil
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import payroll
+from db_handler import Database
+from seed import SCALES, seed_shop
+
+
+# Hot queries of Database: (method, args, tables allowed to be scanned).
+# Listings may scan their driving table once, every join and filter must go through an index.
+HOT_QUERIES = [
+    ('dump_credits', (), {'cr', 'c'}),    # ordered walk of idx_clients_nom
+    ('credit_by_status', ('en cours',), set()),
+    ('get_client_credits', (1,), set()),
+    ('dump_clients', (), {'c'}),
+    ('page_clients', (10, 20), set()),
+    ('page_credits', (10, 20), set()),
+    ('get_credit_versements', (1,), set()),
+    ('filter_accomptes', ('Rahim', 'tous', 'Tous'), set()),     # nom index lookup (cache disabled here)
+    ('get_total_credit', (), set()),
+    ('get_total_credit_by_client', (1,), set()),
+    ('name_index', ('clients',), {'clients'}),   # built once, then get_item_id('clients', 'nom', ...) is a dict hit
+    ('dump_employes', (), {'emp'}),
+    ('dump_operations', (None,), {'e'}),
+    # month filters (date ranges)
+    ('sum_accompte', ('2025-08',), set()),
+    ('dump_operations', ('2025-08',), set()),
+    ('filter_accomptes', ('Tous', 'tous', '2025-08'), set()),
+    ('employee_accompts', (1, '2025-08'), set()),
+    ('calculate_salaire_mensuel', ('2025-08',), {'e'}),
+    ('payroll_months', (), {'salaire_logs'}),    # every closed month
+    ('sum_charges', ('2025-08',), set()),
+    ('dump_charges', ('2025-08',), set()),
+    ('search_charge', ('', '2025-08'), set()),
+    # full-text search (trigram indexes): the fts tables are read through their MATCH index
+    ('search_clients', ('hakim',), set()),
+    ('search_credits', ('hakim', 'en cours'), {'hits', 'h'}),     # scans of the matched ids only
+    ('search_charge', ('hakim', '2025-08'), {'hits', 'h'}),
+    ('search_employe', ('rahim',), set()),
+]
+
+
+def copy_db(db_path):
+    """Copy the database into a temporary directory and return the new path."""
+    tmp_dir = tempfile.mkdtemp(prefix="credit_bench_")
+    tmp_path = os.path.join(tmp_dir, os.path.basename(db_path))
+    shutil.copy2(db_path, tmp_path)
+    return tmp_path
+
+
+def time_calls(func, calls):
+    """Return the mean latency of func() in microseconds."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1_000_000
+
+
+def bench_connections(db_path, calls=2000):
+    """
+    Per-call latency of a small query:
+        - before: new sqlite3 connection + PRAGMA for every call (old Database.connect())
+        - after: pooled connection reused by Database
+    """
+    query = 'SELECT SUM(reste) FROM credit WHERE statut = "en cours"'
+
+    def one_shot():
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+        with conn:
+            conn.execute(query).fetchone()
+        conn.close()
+
+    db = Database(db_path, cache_size=0)     # measure the connection, not the query cache
+    db._create_tables()
+    try:
+        before = time_calls(one_shot, calls)
+        after = time_calls(db.get_total_credit, calls)
+    finally:
+        db.close()
+
+    print(f"Connexion par appel : {before:8.1f} µs/appel")
+    print(f"Connexion du pool   : {after:8.1f} µs/appel")
+    print(f"Gain                : x{before / after:.1f}")
+    return {'before_us': before, 'after_us': after}
+
+
+def bench_query_cache(db_path, calls=2000):
+    """
+    Per-call latency of the listings called on every page switch, without and with the query cache.
+    """
+    methods = [('dump_credits', ()), ('dump_clients', ()), ('get_names', ('employes',)), ('get_total_credit', ())]
+    raw = Database(db_path, cache_size=0)
+    raw._create_tables()
+    db = Database(db_path)
+    try:
+        for method, args in methods:
+            before = time_calls(lambda: getattr(raw, method)(*args), calls)
+            after = time_calls(lambda: getattr(db, method)(*args), calls)
+            print(f"{method:18}: {before:8.1f} µs -> {after:6.1f} µs (cache)")
+        print(f"Cache: {db.cache_stats()}")
+    finally:
+        raw.close()
+        db.close()
+
+
+def stress_concurrency(db_path, profile, readers=4, writers=2, iterations=200):
+    """
+    Run readers (dump_credits) and writers (insert_new_versement) in parallel threads,
+    like the API server and the UI do, and count 'database is locked' errors.
+    Each thread gets its own Database, as api.py and main.py each have their own.
+    """
+    errors = []
+    lock = threading.Lock()
+
+    setup = Database(db_path, profile=profile)
+    setup._create_tables()
+    setup.close()
+    with sqlite3.connect(db_path) as conn:
+        credit_id, client_id = conn.execute("SELECT id, client_id FROM credit LIMIT 1").fetchone()
+
+    def record(error):
+        with lock:
+            errors.append(error)
+
+    def reader():
+        db = Database(db_path, profile=profile)
+        try:
+            for _ in range(iterations):
+                db.dump_credits()
+        except sqlite3.Error as e:
+            record(str(e))
+        finally:
+            db.close()
+
+    def writer():
+        db = Database(db_path, profile=profile)
+        for _ in range(iterations):
+            result = db.insert_new_versement(credit_id, client_id, '2025-01-01', 1, 'stress')
+            if not result['success']:
+                record(result['error'])
+        db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer) for _ in range(writers)]
+
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    locked = sum(1 for e in errors if 'locked' in e)
+    print(f"Profil {profile:8}: {readers} lecteurs / {writers} écrivains, {elapsed:.2f}s, "
+          f"{locked} 'database is locked', {len(errors) - locked} autres erreurs")
+    return {'profile': profile, 'seconds': elapsed, 'locked': locked, 'errors': len(errors)}
+
+
+def query_plans(db, method, args):
+    """
+    Run a Database method and return (sql, plan details) for every SELECT it executed.
+    """
+    statements = []
+    with db.connect() as conn:         # nested calls of the method reuse this connection
+        conn.set_trace_callback(statements.append)
+        try:
+            getattr(db, method)(*args)
+        finally:
+            conn.set_trace_callback(None)
+
+        plans = []
+        for sql in statements:
+            if sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+                details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+                plans.append((sql, details))
+        return plans
+
+
+def is_scan(detail, allowed):
+    """
+    A plan line reading a whole table not in ``allowed``.
+    FTS5 tables searched with MATCH ('VIRTUAL TABLE INDEX ..:M..') and their internal
+    *_fts_config reads (one row) are not scans.
+    """
+    if not detail.startswith('SCAN '):
+        return False
+    table = detail.split()[1]
+    if table.endswith('_fts_config') or ('VIRTUAL TABLE INDEX' in detail and ':M' in detail):
+        return False
+    return table not in allowed
+
+
+def check_query_plans(db_path):
+    """
+    EXPLAIN QUERY PLAN regression check: fail if a hot query scans a table it should search by index.
+    """
+    db = Database(db_path, cache_size=0)     # every call must run its SQL
+    db._create_tables()         # apply pending migrations (indexes)
+    failures = []
+    try:
+        for method, args, allowed in HOT_QUERIES:
+            for sql, details in query_plans(db, method, args):
+                scans = [d for d in details if is_scan(d, allowed)]
+                status = '❌' if scans else '✅'
+                print(f"{status} {method}: {' | '.join(details)}")
+                if scans:
+                    failures.append((method, scans))
+    finally:
+        db.close()
+    return failures
+
+
+def bench_listing_memory(db_path):
+    """
+    Peak Python memory of the credit listing: dump_credits() (fetchall) vs iter_credits() (fetchmany batches).
+    """
+    db = Database(db_path, cache_size=0)
+    db._create_tables()
+    try:
+        results = {}
+        for name, consume in (
+            ('dump_credits', lambda: len(db.dump_credits())),
+            ('iter_credits', lambda: sum(len(rows) for rows in db.iter_credits())),
+        ):
+            tracemalloc.start()
+            start = time.perf_counter()
+            count = consume()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[name] = peak
+            print(f"{name:13}: {count} lignes, {elapsed * 1000:.0f} ms, pic mémoire {peak / 1024:.0f} Ko")
+    finally:
+        db.close()
+    return results
+
+
+def bench_payroll(db_path, employes=500, month=None):
+    """
+    Month-end payslips of ``employes`` new employes (payroll.run_payroll): rendered in this thread,
+    then in the process pool. Files go to a temporary directory.
+    """
+    seed_shop(db_path, clients=0, employes=employes, years=1, charges_per_month=0)
+    month = month or datetime.now().strftime("%Y-%m")
+    db = Database(db_path, cache_size=0)
+    try:
+        results = {}
+        for name, workers in (('sans pool', 1), (f'pool ({os.cpu_count()} CPU)', None)):
+            output_dir = tempfile.mkdtemp(prefix="credit_payroll_")
+            result = payroll.run_payroll(db, month, output_dir, workers=workers)
+            if not result['success']:
+                print(f"❌ {name}: {result['error']}")
+                return None
+            size = os.path.getsize(result['archive'])
+            results[name] = result['seconds']
+            print(f"{name:12}: {result['count']} fiches de paie en {result['seconds'] * 1000:.0f} ms "
+                  f"({result['seconds'] * 1000 / result['count']:.2f} ms/fiche), archive {size / 1024:.0f} Ko")
+            shutil.rmtree(output_dir, ignore_errors=True)
+    finally:
+        db.close()
+    return results
+
+
+def load_test(db_path, clients=100, requests_per_client=20,
+              paths=('/credits/page', '/clients/page', '/credits/1/versements')):
+    """
+    Start the API (uvicorn, async routes) on the copy in its own process
+    and hit it with ``clients`` concurrent HTTP clients. Needs uvicorn and httpx.
+    """
+    import httpx
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'api:app', '--port', str(port), '--log-level', 'warning'],
+        env={**os.environ, 'LIFETIPAZA_DB': db_path},
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/clients/page?limit=1")
+            break
+        except httpx.HTTPError:
+            time.sleep(0.1)
+
+    latencies = []
+    errors = []
+
+    async def client(http, index):
+        for i in range(requests_per_client):
+            path = paths[(index + i) % len(paths)]
+            start = time.perf_counter()
+            try:
+                resp = await http.get(path)
+                if resp.status_code != 200:
+                    errors.append(resp.status_code)
+            except httpx.HTTPError as e:
+                errors.append(str(e))
+            latencies.append(time.perf_counter() - start)
+
+    async def run():
+        limits = httpx.Limits(max_connections=clients)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as http:
+            await asyncio.gather(*(client(http, index) for index in range(clients)))
+
+    try:
+        start = time.perf_counter()
+        asyncio.run(run())
+        elapsed = time.perf_counter() - start
+    finally:
+        server.terminate()
+        server.wait()
+
+    total = clients * requests_per_client
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{clients} clients, {total} requêtes en {elapsed:.2f}s: {total / elapsed:.0f} req/s, "
+          f"p50 {statistics.median(latencies) * 1000:.1f} ms, p95 {p95:.1f} ms, {len(errors)} erreurs")
+    return {'requests': total, 'seconds': elapsed, 'rps': total / elapsed, 'errors': len(errors)}
+
+
+# === SUITE (seed.py scales, JSON results) ===
+# Methods of Database that run no query of their own
+SUITE_SKIPPED = {'connect', 'close', 'cache_stats', 'query_stats', 'slow_queries', 'fetch_namedtuple'}
+
+
+def suite_context(db_path):
+    """Ids, names and month of the seeded data used as arguments by the suite."""
+    with sqlite3.connect(db_path) as conn:
+        ctx = {}
+        ctx['client_id'], ctx['client_nom'] = conn.execute(
+            "SELECT id, nom FROM clients WHERE id >= (SELECT MAX(id) / 2 FROM clients) ORDER BY id LIMIT 1"
+        ).fetchone()
+        ctx['credit_id'], ctx['credit_client_id'] = conn.execute(
+            "SELECT id, client_id FROM credit WHERE statut = 'en cours' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        ctx['employe_id'], ctx['employe_nom'] = conn.execute("SELECT id, nom FROM employes LIMIT 1").fetchone()
+        ctx['operation_id'] = conn.execute("SELECT MAX(id) FROM operations").fetchone()[0]
+        ctx['charge_id'] = conn.execute("SELECT MAX(id) FROM charges").fetchone()[0]
+        ctx['month'] = conn.execute("SELECT substr(MAX(date_charge), 1, 7) FROM charges").fetchone()[0]
+        ctx['after_id'] = ctx['client_id']
+        ctx['word'] = ctx['client_nom'].split()[1][:5]      # part of a family name, several matches
+
+        # The writes of the suite go to their own client and credit: the rows read above don't grow
+        ctx['write_client_nom'] = 'Bench Écritures'
+        ctx['write_client_id'] = conn.execute(
+            "INSERT INTO clients(nom, telephone, commune, observation) VALUES (?, '', 'Tipaza', '')",
+            (ctx['write_client_nom'],)
+        ).lastrowid
+        ctx['write_credit_id'] = conn.execute(
+            "INSERT INTO credit(date_credit, client_id, montant, motif, reste) VALUES (date('now'), ?, ?, 'bench', ?)",
+            (ctx['write_client_id'], 10 ** 12, 10 ** 12)
+        ).lastrowid
+        return ctx
+
+
+_fresh_clients = itertools.count(1)
+
+
+def fresh_credit(db):
+    """
+    New client with one credit, for the writes that would slow down if always done on the same rows
+    (the balance of a client is recomputed from all its credits on every versement).
+    :return: (credit_id, client_id, client name)
+    """
+    nom = f"Bench Crédit {next(_fresh_clients)}"
+    client_id = db.insert_new_client(nom, '', 'Tipaza', '')['client_id']
+    credit_id = db.insert_new_credit(nom, datetime.now().strftime("%Y-%m-%d"), 100000, 'bench')['credit_id']
+    return credit_id, client_id, nom
+
+
+def database_cases(db, ctx):
+    """
+    (method, make_args) of every public Database method.
+    make_args() runs before each call, outside the measure: writes get fresh rows to work on.
+    """
+    counter = itertools.count(1)
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    def new_credit():
+        credit_id, client_id, _ = fresh_credit(db)
+        return credit_id, client_id
+
+    def new_versements(count):
+        credit_id, client_id, _ = fresh_credit(db)
+        return [(credit_id, client_id, today, 1, 'bench')] * count
+
+    def new_versement():
+        result = db.insert_new_versement(ctx['write_credit_id'], ctx['write_client_id'], today, 1, 'bench')
+        return result['versement_id']
+
+    def new_charge():
+        db.insert_new_charge(today, ctx['employe_nom'], 100, 'bench')
+        with db.connect() as conn:
+            return conn.execute("SELECT MAX(id) FROM charges").fetchone()[0]
+
+    return [
+        # generic
+        ('name_index', lambda: ('clients',)),
+        ('get_item_id', lambda: ('clients', 'nom', ctx['client_nom'])),
+        ('get_item', lambda: ('charges', 'motif', ctx['charge_id'])),
+        ('get_total_credit', lambda: ()),
+        ('get_total_credit_by_client', lambda: (ctx['client_id'],)),
+        ('delete_item', lambda: ('charges', new_charge())),
+        ('data_version', lambda: (('credit', 'clients'),)),
+        ('changes_since', lambda: (0, 1000)),
+        # employes
+        ('insert_new_employe', lambda: (f"Bench Employe {next(counter)}", 'Vendeur', '', 30000, today, '')),
+        ('dump_employes', lambda: ()),
+        ('search_employe', lambda: (ctx['employe_nom'].split()[0],)),
+        ('update_employe', lambda: (ctx['employe_id'], 6, f"bench {next(counter)}")),
+        ('sum_accompte', lambda: (ctx['month'],)),
+        ('dump_operations', lambda: (ctx['month'],)),
+        ('filter_accomptes', lambda: (ctx['employe_nom'], 'tous', ctx['month'])),
+        ('employee_accompts', lambda: (ctx['employe_id'], ctx['month'])),
+        ('insert_new_operation', lambda: (ctx['employe_id'], 'avance', 100, 'bench', today, '')),
+        ('calculate_salaire_mensuel', lambda: (ctx['month'],)),
+        ('update_accompte', lambda: (ctx['operation_id'], 4, '150')),
+        ('close_payroll', lambda: (ctx['month'],)),
+        ('payroll_months', lambda: ()),
+        # clients
+        ('insert_new_client', lambda: (f"Bench Client {next(counter)}", '', 'Tipaza', '')),
+        ('dump_clients', lambda: ()),
+        ('iter_clients', lambda: ()),
+        ('page_clients', lambda: (ctx['after_id'], 50)),
+        ('get_names', lambda: ('clients',)),
+        ('search_clients', lambda: (ctx['word'],)),
+        ('update_client', lambda: (ctx['client_id'], 5, f"bench {next(counter)}")),
+        # credits
+        ('dump_credits', lambda: ()),
+        ('iter_credits', lambda: ()),
+        ('page_credits', lambda: (ctx['credit_id'] // 2, 50)),
+        ('search_credits', lambda: (ctx['word'], 'tous')),
+        ('credit_by_status', lambda: ('en cours',)),
+        ('insert_new_credit', lambda: (ctx['write_client_nom'], today, 1000, 'bench')),
+        ('insert_credits_bulk', lambda: ([(fresh_credit(db)[2], today, 1000, 'bench')] * 100,)),
+        ('get_client_credits', lambda: (ctx['client_id'],)),
+        ('regle_credit', new_credit),
+        ('update_credit', lambda: (ctx['write_credit_id'], 3, f"bench {next(counter)}", 0)),
+        ('check_credit_totals', lambda: ()),
+        ('delete_credit', lambda: ([fresh_credit(db)[0]],)),
+        # versements
+        ('get_credit_versements', lambda: (ctx['credit_id'],)),
+        ('insert_new_versement', lambda: (ctx['write_credit_id'], ctx['write_client_id'], today, 1, 'bench')),
+        ('insert_versements_bulk', lambda: (new_versements(100),)),
+        ('delete_paiement', lambda: (new_versement(),)),
+        # charges
+        ('sum_charges', lambda: (ctx['month'],)),
+        ('dump_charges', lambda: (ctx['month'],)),
+        ('search_charge', lambda: ('Loyer', ctx['month'])),
+        ('get_charge_by_id', lambda: (ctx['charge_id'],)),
+        ('insert_new_charge', lambda: (today, ctx['employe_nom'], 100, 'bench')),
+        ('update_charge_values', lambda: (ctx['charge_id'], today, ctx['employe_nom'], 100, 'bench')),
+        ('update_charge', lambda: (ctx['charge_id'], 4, f"bench {next(counter)}")),
+    ]
+
+
+def api_cases(db, ctx):
+    """
+    (name, route path, make_request) of every route of api.py, make_request() -> (method, url, json).
+    :param db: Database preparing the rows of the writes (see database_cases)
+    """
+    counter = itertools.count(1)
+    today = datetime.now().strftime("%Y-%m-%d")
+    credit = {'client': ctx['write_client_nom'], 'credit_date': today, 'montant': '10', 'motif': 'bench'}
+    versement = {'credit_id': ctx['write_credit_id'], 'client_id': ctx['write_client_id'],
+                 'date_versement': today, 'montant': '0.01'}
+
+    def new_credits(count):
+        return [{**credit, 'client': fresh_credit(db)[2]}] * count
+
+    def new_versements(count):
+        credit_id, client_id, _ = fresh_credit(db)
+        return [{**versement, 'credit_id': credit_id, 'client_id': client_id}] * count
+
+    return [
+        ('GET /clients', '/clients', lambda: ('GET', '/clients', None)),
+        ('GET /clients?stream=1', '/clients', lambda: ('GET', '/clients?stream=1', None)),
+        ('GET /clients/page', '/clients/page', lambda: ('GET', f"/clients/page?after_id={ctx['after_id']}", None)),
+        ('POST /clients', '/clients',
+         lambda: ('POST', '/clients', {'nom': f"Bench Api {next(counter)}", 'commune': 'Tipaza'})),
+        ('GET /credits', '/credits', lambda: ('GET', '/credits', None)),
+        ('GET /credits?stream=1', '/credits', lambda: ('GET', '/credits?stream=1', None)),
+        ('GET /credits/page', '/credits/page', lambda: ('GET', f"/credits/page?after_id={ctx['credit_id'] // 2}", None)),
+        ('POST /credits', '/credits', lambda: ('POST', '/credits', credit)),
+        ('POST /credits/bulk', '/credits/bulk', lambda: ('POST', '/credits/bulk', new_credits(100))),
+        ('GET /credits/{id}/versements', '/credits/{credit_id}/versements',
+         lambda: ('GET', f"/credits/{ctx['credit_id']}/versements", None)),
+        ('POST /versements', '/versements', lambda: ('POST', '/versements', versement)),
+        ('POST /versements/bulk', '/versements/bulk', lambda: ('POST', '/versements/bulk', new_versements(100))),
+        ('GET /search', '/search', lambda: ('GET', f"/search?q={ctx['word']}", None)),
+        ('GET /sync', '/sync', lambda: ('GET', '/sync?since=0', None)),
+        ('GET /salaires', '/salaires', lambda: ('GET', f"/salaires?mois={ctx['month']}", None)),
+        ('POST /salaires/{mois}/cloture', '/salaires/{mois}/cloture',
+         lambda: ('POST', f"/salaires/{ctx['month']}/cloture", None)),
+        ('GET /salaires/clotures', '/salaires/clotures', lambda: ('GET', '/salaires/clotures', None)),
+        ('GET /metrics', '/metrics', lambda: ('GET', '/metrics', None)),
+    ]
+
+
+def measure(func, make_args, calls, budget):
+    """
+    Call ``func(*make_args())`` up to ``calls`` times (at least 3, then until ``budget`` seconds).
+    Generators are consumed. Return the latencies in milliseconds and the failed results.
+    """
+    latencies = []
+    failures = []
+    deadline = time.perf_counter() + budget
+    while len(latencies) < calls and (len(latencies) < 3 or time.perf_counter() < deadline):
+        args = make_args()
+        start = time.perf_counter()
+        result = func(*args)
+        if inspect.isgenerator(result):
+            for _ in result:
+                pass
+        latencies.append((time.perf_counter() - start) * 1000)
+        if isinstance(result, dict) and result.get('success') is False:
+            failures.append(result.get('error') or result.get('message'))
+    return latencies, failures
+
+
+def summarize(latencies):
+    latencies = sorted(latencies)
+    return {
+        'calls': len(latencies),
+        'mean_ms': round(statistics.fmean(latencies), 3),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p95_ms': round(latencies[max(0, int(len(latencies) * 0.95) - 1)], 3),
+        'min_ms': round(latencies[0], 3),
+    }
+
+
+def suite_result(kind, name, latencies, failures):
+    """Result of one measure of the suite, printed as it comes."""
+    result = {'kind': kind, 'name': name, **summarize(latencies), 'errors': len(failures)}
+    print(f"{'❌' if failures else '  '} {kind:3} {name:28} p50 {result['p50_ms']:10.3f} ms  "
+          f"p95 {result['p95_ms']:10.3f} ms  ({result['calls']} appels)" + (f"  {failures[0]}" if failures else ""))
+    return result
+
+
+def suite_database(db_path, ctx, calls, budget):
+    """Time every public Database method (query cache off: the SQL runs every time)."""
+    db = Database(db_path, cache_size=0)
+    results = []
+    try:
+        cases = database_cases(db, ctx)
+        public = {name for name, _ in inspect.getmembers(Database, inspect.isfunction) if not name.startswith('_')}
+        for name in sorted(public - SUITE_SKIPPED - {name for name, _ in cases}):
+            print(f"⚠️  db {name}: pas de mesure (ajouter un cas à database_cases)")
+            results.append({'kind': 'db', 'name': name, 'skipped': True})
+
+        for name, make_args in cases:
+            latencies, failures = measure(getattr(db, name), make_args, calls, budget)
+            results.append(suite_result('db', name, latencies, failures))
+    finally:
+        db.close()
+    return results
+
+
+def suite_api(db_path, ctx, calls, budget):
+    """Time every route of api.py in process (FastAPI TestClient, needs httpx)."""
+    os.environ['LIFETIPAZA_DB'] = db_path       # read when api is first imported
+    import api
+    from db_async import AsyncDatabase
+    from fastapi.routing import APIRoute
+    from fastapi.testclient import TestClient
+
+    if os.path.abspath(api.db.db.db_name) != os.path.abspath(db_path):
+        api.db.close()
+        api.db = AsyncDatabase(db_path)     # routes use the module global
+
+    results = []
+    setup = Database(db_path, cache_size=0)
+    try:
+        cases = api_cases(setup, ctx)
+        routes = {route.path for route in api.app.routes if isinstance(route, APIRoute)}
+        for path in sorted(routes - {path for _, path, _ in cases}):
+            print(f"⚠️  api {path}: pas de mesure (ajouter un cas à api_cases)")
+            results.append({'kind': 'api', 'name': path, 'skipped': True})
+
+        with TestClient(api.app) as client:         # the lifespan closes api.db at the end
+            def call(method, url, body):
+                response = client.request(method, url, json=body)
+                if response.status_code >= 400:
+                    return {'success': False, 'error': f"{response.status_code} {response.text[:100]}"}
+                return response
+
+            for name, _, make_request in cases:
+                latencies, failures = measure(call, make_request, calls, budget)
+                results.append(suite_result('api', name, latencies, failures))
+    finally:
+        setup.close()
+    return results
+
+
+def run_suite(scales, calls=50, budget=2.0, api=True):
+    """
+    Seed a new database per scale (seed.SCALES) and time every Database method and API route on it.
+    :return: the results document (see --output)
+    """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    document = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'commit': commit,
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'calls': calls,
+        },
+        'scales': {},
+        'results': [],
+    }
+    for scale in scales:
+        db_path = os.path.join(tempfile.mkdtemp(prefix="credit_suite_"), f"shop_{scale}.db")
+        print(f"=== {scale}: génération des données ===")
+        start = time.perf_counter()
+        counts = seed_shop(db_path, **SCALES[scale])
+        document['scales'][scale] = {'rows': counts, 'seed_seconds': round(time.perf_counter() - start, 1)}
+        print(", ".join(f"{table}: {count}" for table, count in counts.items()))
+
+        ctx = suite_context(db_path)
+        results = suite_database(db_path, ctx, calls, budget)
+        if api:
+            results += suite_api(db_path, ctx, calls, budget)
+        document['results'] += [{'scale': scale, **result} for result in results]
+        shutil.rmtree(os.path.dirname(db_path), ignore_errors=True)
+    return document
+
+
+def compare_results(document, baseline, tolerance=1.5, floor_ms=1.0):
+    """
+    Compare the p50 of each measure with a previous run of the suite.
+    A regression is slower than ``tolerance`` times the baseline and by more than ``floor_ms`` (noise).
+    :return: list of (scale, kind, name, baseline p50, p50)
+    """
+    previous = {
+        (r['scale'], r['kind'], r['name']): r for r in baseline['results'] if not r.get('skipped')
+    }
+    regressions = []
+    for result in document['results']:
+        old = previous.get((result['scale'], result['kind'], result['name']))
+        if result.get('skipped') or old is None:
+            continue
+        ratio = result['p50_ms'] / old['p50_ms'] if old['p50_ms'] else 1.0
+        if ratio > tolerance and result['p50_ms'] - old['p50_ms'] > floor_ms:
+            regressions.append((result['scale'], result['kind'], result['name'], old['p50_ms'], result['p50_ms']))
+            print(f"❌ {result['scale']} {result['kind']} {result['name']}: "
+                  f"{old['p50_ms']:.3f} ms -> {result['p50_ms']:.3f} ms (x{ratio:.1f})")
+    print(f"{len(regressions)} régression(s) par rapport à {baseline['meta'].get('commit') or 'la référence'}")
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks de la base de données.")
+    parser.add_argument('--db', default='./lifeTipazaDB.db', help="Base de données à copier.")
+    parser.add_argument('--calls', type=int, default=2000, help="Nombre d'appels par mesure.")
+    parser.add_argument('--profile', default='wal', help="Profil PRAGMA pour le test de concurrence.")
+    parser.add_argument('--check-plans', action='store_true', help="Vérifier les plans des requêtes fréquentes.")
+    parser.add_argument('--load-test', action='store_true', help="Test de charge de l'API (uvicorn + httpx).")
+    parser.add_argument('--clients', type=int, default=100, help="Clients HTTP simultanés du test de charge.")
+    parser.add_argument('--seed', type=int, default=1000,
+                        help="Clients synthétiques ajoutés avant le test de charge / de mémoire.")
+    parser.add_argument('--memory', action='store_true', help="Mémoire de la liste des crédits (fetchall / fetchmany).")
+    parser.add_argument('--payroll', type=int, metavar='EMPLOYES',
+                        help="Fiches de paie du mois pour ce nombre d'employés (ex: 500).")
+    parser.add_argument('--suite', action='store_true',
+                        help="Mesurer chaque méthode de Database et route de l'API sur des données générées.")
+    parser.add_argument('--scales', default='1k', help="Tailles de la suite, parmi " + ", ".join(SCALES) + ".")
+    parser.add_argument('--no-api', action='store_true', help="Suite sans les routes de l'API.")
+    parser.add_argument('--output', help="Fichier JSON des résultats de la suite.")
+    parser.add_argument('--baseline', help="Résultats JSON d'une suite précédente à comparer.")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Ralentissement accepté (p50) avant régression.")
+    args = parser.parse_args()
+
+    if args.suite:
+        scales = [scale.strip() for scale in args.scales.split(',')]
+        unknown = [scale for scale in scales if scale not in SCALES]
+        if unknown:
+            parser.error(f"taille inconnue: {', '.join(unknown)}")
+        document = run_suite(scales, calls=min(args.calls, 50), api=not args.no_api)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(document, f, indent=2, ensure_ascii=False)
+        failed = any(result.get('errors') for result in document['results'])
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                failed |= bool(compare_results(document, json.load(f), args.tolerance))
+        raise SystemExit(1 if failed else 0)
+
+    if args.check_plans:
+        raise SystemExit(1 if check_query_plans(copy_db(args.db)) else 0)
+
+    if args.memory:
+        db_path = copy_db(args.db)
+        seed_shop(db_path, clients=args.seed)
+        bench_listing_memory(db_path)
+        raise SystemExit(0)
+
+    if args.payroll:
+        bench_payroll(copy_db(args.db), employes=args.payroll)
+        raise SystemExit(0)
+
+    if args.load_test:
+        db_path = copy_db(args.db)
+        seed_shop(db_path, clients=args.seed)
+        result = load_test(db_path, clients=args.clients)
+        raise SystemExit(1 if result['errors'] else 0)
+
+    bench_connections(copy_db(args.db), calls=args.calls)
+    bench_query_cache(copy_db(args.db), calls=args.calls)
+    result = stress_concurrency(copy_db(args.db), args.profile)
+    if result['errors']:
+        raise SystemExit(1)
@@ -61,3 +61,20 @@ PAGES = {
         )
     }
 }
+
+# ===================
+# == Database Setup ==
+# ===================
+# PRAGMA profile applied to every connection (see db_pool.PRAGMA_PROFILES)
+#   'default' : rollback journal, readers and writers block each other
+#   'wal'     : WAL journal, the API server and the UI can read while writing
+#   'durable' : WAL journal with a full fsync on every commit
+DB_PRAGMA_PROFILE = 'wal'
+
+# Query results cached in memory by Database (LRU entries, 0 to disable, see query_cache.py)
+DB_CACHE_SIZE = 256
+
+# Timing of every Database method and query (see query_profiler.py, diagnostics window)
+DB_PROFILING = True
+# Queries slower than this (ms) are logged with their EXPLAIN QUERY PLAN, None to disable
+DB_SLOW_QUERY_MS = 100
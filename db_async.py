@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Async access to Database for the FastAPI routes.
+#                 sqlite3 is blocking, every call runs on a dedicated DB executor
+#                 (one thread per pooled connection) instead of the event loop.
+# ----------------------------------------------------------------------------
+
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import config
+from db_handler import Database
+
+
+class AsyncDatabase:
+    """
+    Async variant of Database: every public method is awaitable.
+
+        db = AsyncDatabase("./lifeTipazaDB.db")
+        rows = await db.dump_clients()
+
+    The executor has as many threads as the connection pool has connections,
+    so a call never waits for a connection while holding a thread, and the
+    event loop (and uvicorn's own threadpool) stays free while SQLite works.
+    """
+    def __init__(self, db_name='lifeTipazaDB.db', pool_size=5, profile=config.DB_PRAGMA_PROFILE):
+        self.db = Database(db_name, pool_size=pool_size, profile=profile)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="db")
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable on the DB executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args, **kwargs))
+
+    async def iterate(self, name, *args, **kwargs):
+        """
+        Async iterator over a generator method of Database (iter_credits, iter_clients, ...).
+        Each batch is fetched on the executor.
+        """
+        iterator = getattr(self.db, name)(*args, **kwargs)
+        try:
+            while True:
+                batch = await self.run(next, iterator, None)
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            await self.run(iterator.close)
+
+    def __getattr__(self, name):
+        method = getattr(self.db, name)
+        if not callable(method) or name.startswith('_'):
+            return method
+
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            return await self.run(method, *args, **kwargs)
+        return wrapper
+
+    def close(self):
+        """Wait for the running calls, then close the connections."""
+        self.executor.shutdown(wait=True)
+        self.db.close()
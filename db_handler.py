@@ -7,58 +7,218 @@
 # ----------------------------------------------------------------------------
 
 
+import os
 import sqlite3
-from datetime import datetime
+from datetime import date, datetime
 from collections import namedtuple
 
-
+import config
+import migration
+from db_pool import ConnectionPool, savepoint
+from query_cache import cached, invalidates, shared_cache
+from query_profiler import profiled, shared_profiler
+from money import Money, to_cents
+
+
+# Accepted input formats, dates are always stored as ISO-8601 'YYYY-MM-DD'
+DATE_INPUT_FORMATS = ("%Y-%m-%d", "%d-%m-%Y", "%d/%m/%Y", "%Y/%m/%d")
+
+
+def to_iso_date(value):
+    """
+    Normalize a date to the canonical ISO format stored in the database.
+
+    :param value: date, datetime or str ('YYYY-MM-DD', 'dd-mm-yyyy', 'dd/mm/yyyy', with or without time)
+    :return: 'YYYY-MM-DD'
+    :raises ValueError: if the value is not a valid date
+    """
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, str):
+        text = value.strip().split(' ')[0].split('T')[0]
+        for fmt in DATE_INPUT_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).date().isoformat()
+            except ValueError:
+                continue
+    raise ValueError(f"Date invalide ({value}). Utiliser le format YYYY-MM-DD.")
+
+
+def month_range(month):
+    """
+    Return the half-open ISO date range [start, end) of a month.
+    Filtering with ``col >= start AND col < end`` keeps the date column indexable,
+    unlike ``strftime('%Y-%m', col) = month``.
+
+    :param month: 'YYYY-MM'
+    :return: tuple ('YYYY-MM-01', first day of the next month)
+    """
+    start = datetime.strptime(month, "%Y-%m")
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+
+
+def match_query(search_word, columns=None):
+    """
+    FTS5 MATCH expression of a searched text (see migration.SEARCH_INDEXES):
+    every word, accent folded, must appear in the indexed row, even inside a word.
+
+    :param columns: restrict the match to these columns of the fts table
+    :return: the expression, None if a word has less than 3 letters (too short for the trigram index)
+    """
+    words = migration.fold_text(search_word).split()
+    if not words or min(len(word) for word in words) < 3:
+        return None
+    query = " ".join('"' + word.replace('"', '""') + '"' for word in words)
+    if columns:
+        query = f"{{{' '.join(columns)}}} : ({query})"
+    return query
+
+
+class NameIndex:
+    """
+    Read-only bidirectional index nom <-> id of a table (clients, employes).
+    Built once from the table and kept by the query cache until the table changes.
+    """
+    def __init__(self, rows):
+        self._ids = {}
+        self._names = {}
+        for row_id, nom in rows:            # rows ordered by id: a duplicated name keeps the lowest id
+            self._ids.setdefault(nom, row_id)
+            self._names[row_id] = nom
+
+    def id_of(self, nom):
+        return self._ids.get(nom)
+
+    def name_of(self, row_id):
+        return self._names.get(row_id)
+
+    def names(self):
+        """Names in id order (order of insertion)."""
+        return list(self._names.values())
+
+    def __contains__(self, nom):
+        return nom in self._ids
+
+    def __deepcopy__(self, memo):
+        return self         # never modified once built, the cache can hand it out as is
+
+
+# Tables with a unique 'nom' resolved through Database.name_index()
+NAME_TABLES = ('clients', 'employes')
+
+
+@profiled
 class Database:
-    def __init__(self, db_name='lifeTipazaDB.db'):
+    def __init__(self, db_name='lifeTipazaDB.db', pool_size=5, profile=config.DB_PRAGMA_PROFILE,
+                 cache_size=config.DB_CACHE_SIZE, profiling=config.DB_PROFILING):
         self.db_name = db_name
-        # Enable foreign key constraints
+        # Timings per method and slow query log (see query_profiler), shared like the cache, None to disable
+        self.profiler = shared_profiler(os.path.abspath(db_name), config.DB_SLOW_QUERY_MS) if profiling else None
+        # Reusable connections, each one configured with the PRAGMA profile
+        self.pool = ConnectionPool(db_name, max_size=pool_size, profile=profile, profiler=self.profiler)
+        # Query results (see query_cache), shared by the Database instances of the same file, None to disable
+        self.cache = shared_cache(os.path.abspath(db_name), cache_size) if cache_size else None
+        self._data_versions = {}        # id(connection) -> last PRAGMA data_version seen
 
         # employe and his tables
         self.employes_fields = [
-            'emp.id', 'emp.nom', 'emp.telephone', 'emp.poste', 's.montant_base',
+            'emp.id', 'emp.nom', 'emp.telephone', 'emp.poste', 's.montant_base AS "montant_base [money]"',
             'strftime("%d-%m-%Y", emp.date_embauche)', 'emp.observation'
         ]
 
         self.operation_fields = [
-            'ope.id', 'strftime("%d-%m-%Y", ope.date)', 'ope.operation', 'emp.nom', 'ope.montant', 'ope.motif'
+            'ope.id', 'strftime("%d-%m-%Y", ope.date)', 'ope.operation', 'emp.nom',
+            'ope.montant AS "montant [money]"', 'ope.motif'
         ]
         self.operation_sum_fileds = [
             "e.nom",
-            "SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END) AS total_prime",
-            "SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END) AS total_retenue",
-            "SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END) AS total_avance"
+            "SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END) AS \"total_prime [money]\"",
+            "SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END) AS \"total_retenue [money]\"",
+            "SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END) AS \"total_avance [money]\""
         ]
         # clients and his tables
         self.clients_fields = [
             "c.id", "c.nom",
-            "IFNULL(SUM(CASE WHEN cr.statut = 'en cours' THEN cr.reste ELSE 0 END), 0) AS total_en_cours",
+            'IFNULL(b.total_en_cours, 0) AS "total_en_cours [money]"',     # maintained by the credit triggers
             "c.telephone", "c.commune", "c.observation"
         ]
 
         self.credit_fields = [
-            'cr.id', 'strftime("%d-%m-%Y", cr.date_credit)', 'c.nom', 'cr.motif', 'cr.montant',
-            'IFNULL(SUM(v.montant), 0) AS Versement',
-            'cr.reste', 'cr.statut'
+            'cr.id', 'strftime("%d-%m-%Y", cr.date_credit)', 'c.nom', 'cr.motif', 'cr.montant AS "montant [money]"',
+            'cr.total_verse AS "Versement [money]"',           # maintained by the paiement triggers
+            'cr.reste AS "reste [money]"', 'cr.statut'
         ]
 
         # Charge
         self.charge_fields = [
             'ch.id', 'strftime("%d-%m-%Y", ch.date_charge)',
-            'emp.nom', 'ch.montant', 'ch.motif'
+            'emp.nom', 'ch.montant AS "montant [money]"', 'ch.motif'
         ]
 
     def connect(self):
-        conn = sqlite3.connect(self.db_name)
-        conn.execute("PRAGMA foreign_keys = ON")
-        return conn
+        """
+        Return a pooled connection to use as ``with self.connect() as conn``.
+        The transaction is committed (or rolled back) on exit of the outermost block and the connection is reused:
+        the methods never commit themselves, so they can run inside a caller's transaction.
+        """
+        return self.pool.connection()
+
+    def _check_external_writes(self):
+        """
+        Clear the query cache if another connection (other process, other Database) committed since
+        the last check of the connection, as told by PRAGMA data_version.
+        Our own writes are invalidated precisely by the @invalidates methods.
+        """
+        with self.connect() as conn:
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if self._data_versions.get(id(conn)) != version:
+                self._data_versions[id(conn)] = version
+                self.cache.invalidate()
 
+    def cache_stats(self):
+        """Hit/miss counters of the query cache."""
+        return self.cache.stats() if self.cache is not None else None
+
+    def query_stats(self):
+        """Calls, queries, rows and p50/p95/p99 latencies per method (see QueryProfiler.stats)."""
+        return self.profiler.stats() if self.profiler is not None else None
+
+    def slow_queries(self):
+        """Last queries slower than config.DB_SLOW_QUERY_MS, with their plan."""
+        return self.profiler.slow_queries() if self.profiler is not None else []
+
+    def _iter_rows(self, query, params=(), batch_size=500):
+        """
+        Yield the rows of a SELECT in batches of ``batch_size`` (cursor.fetchmany), so that
+        large listings are never held in memory at once.
+        The connection is opened outside the pool (acquire_detached): the generator can be advanced
+        from any thread (one at a time), a slow reader never holds a pooled connection, and the
+        connection is closed with the generator.
+        """
+        conn = self.pool.acquire_detached()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+            self.pool.release_detached(conn)
+
+    @invalidates()
     def _create_tables(self):
         """
-        Crée toutes les tables nécessaires si elles n'existent pas déjà.
+        Crée toutes les tables nécessaires si elles n'existent pas déjà,
+        puis applique les migrations en attente (index, ...).
         """
         with self.connect() as conn:
             cursor = conn.cursor()
@@ -81,7 +241,7 @@ class Database:
                     CREATE TABLE IF NOT EXISTS salaires (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         employe_id INTEGER UNSIGNED NOT NULL,
-                        montant_base DECIMAL(10, 2),
+                        montant_base INTEGER,                 -- centimes
                         FOREIGN KEY(employe_id) REFERENCES employes(id) ON DELETE CASCADE
                     )
                 """)
@@ -91,7 +251,7 @@ class Database:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         employe_id INTEGER UNSIGNED NOT NULL,
                         operation VARCHAR(50) CHECK(operation IN ('prime', 'retenu', 'avance')) NOT NULL,
-                        montant DECIMAL(10, 2),
+                        montant INTEGER,                      -- centimes
                         motif TEXT,
                         date TEXT,
                         observation TEXT,
@@ -104,11 +264,11 @@ class Database:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         employe_id INTEGER NOT NULL,
                         mois TEXT NOT NULL,  -- format: '2025-07'
-                        salaire_base DECIMAL(10, 2),
-                        total_prime DECIMAL(10, 2),
-                        total_retenue DECIMAL(10, 2),
-                        total_avance DECIMAL(10, 2),
-                        salaire_net DECIMAL(10, 2),
+                        salaire_base INTEGER,                 -- montants en centimes
+                        total_prime INTEGER,
+                        total_retenue INTEGER,
+                        total_avance INTEGER,
+                        salaire_net INTEGER,
                         date_calcul TEXT NOT NULL,
                         FOREIGN KEY(employe_id) REFERENCES employes(id) ON DELETE CASCADE
                     )
@@ -132,9 +292,9 @@ class Database:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         date_credit TEXT NOT NULL,
                         client_id INTEGER UNSIGNED NOT NULL,
-                        montant DECIMAL(10, 2),
+                        montant INTEGER,                      -- centimes
                         motif TEXT,
-                        reste DECIMAL(10, 2) NOT NULL,
+                        reste INTEGER NOT NULL,               -- centimes
                         statut VARCHAR(50) CHECK(statut IN ('en cours', 'terminé')) DEFAULT 'en cours',
                         FOREIGN KEY(client_id) REFERENCES clients(id) ON DELETE CASCADE
                     )
@@ -146,7 +306,7 @@ class Database:
                         date_versement TEXT NOT NULL,
                         credit_id INTEGER UNSIGNED NOT NULL,
                         client_id INTEGER UNSIGNED NOT NULL,
-                        montant DECIMAL(10, 2),
+                        montant INTEGER,                      -- centimes
                         observation TEXT,
                         FOREIGN KEY(credit_id) REFERENCES credit(id) ON DELETE CASCADE,
                         FOREIGN KEY(client_id) REFERENCES clients(id) ON DELETE CASCADE
@@ -159,46 +319,76 @@ class Database:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         date_charge TEXT NOT NULL,
                         effectue_par VARCHAR(255),
-                        montant DECIMAL(10, 2),
+                        montant INTEGER,                      -- centimes
                         motif TEXT NOT NULL
                     )
                 """)
 
-                conn.commit()
-                return {'success': True}
+                # === Migrations (schema version in PRAGMA user_version) ===
+                applied = migration.apply_migrations(conn)
+                return {'success': True, 'migrations': [version for version, _ in applied]}
             except sqlite3.Error as e:
                 return {'success': False, 'error': str(e)}
 
+    @cached(table_arg=0)
+    def name_index(self, table):
+        """
+        Name <-> id index of clients or employes (see NameIndex), rebuilt after a write on the table.
+        """
+        with self.connect() as conn:
+            rows = conn.execute(f"SELECT id, nom FROM {table} ORDER BY id").fetchall()
+            return NameIndex(rows)
+
+    def _name_taken(self, table, nom, row_id=None):
+        """Return an error dict if another row of the table already has this name."""
+        other_id = self.get_item_id(table, 'nom', nom)
+        if other_id is not None and other_id != row_id:
+            label = 'client' if table == 'clients' else 'employé'
+            return {'success': False, 'error': f"Un {label} nommé {nom} existe déjà."}
+        return None
+
     def get_item_id(self, table, column_name, value):
         """
         Retrieve the ID of the last inserted item in the Persone table.
+        Names of clients and employes are resolved by the in-memory name index, kept by the query cache:
+        without cache, a point query on the unique nom index.
         """
+        if column_name == 'nom' and table in NAME_TABLES and self.cache is not None:
+            return self.name_index(table).id_of(value)
+
         with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f'SELECT id FROM {table} WHERE {column_name} = ?', (value,))
             result = cursor.fetchone()
             return result[0] if result else None
 
+    @cached(table_arg=0)
     def get_item(self, table, column, item_id):
         """
         get column from table_name by id
         """
+        if column == 'nom' and table in NAME_TABLES and self.cache is not None:
+            return self.name_index(table).name_of(item_id)
+
         with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f'SELECT {column} FROM {table} WHERE id = ?', (item_id,))
             result = cursor.fetchone()
             return result[0] if result else None
 
+    @cached('credit_totals')
     def get_total_credit(self):
         """
         Retrieve the total amount of all credits.
+        (single row of credit_totals, maintained by the credit triggers)
         """
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute('SELECT SUM(reste) FROM credit WHERE statut = "en cours"')
+            cursor.execute('SELECT total_en_cours AS "total [money]" FROM credit_totals WHERE id = 1')
             result = cursor.fetchone()
-            return result[0] if result and result[0] is not None else 0
+            return result[0] if result else Money(0)
 
+    @cached('client_balance')
     def get_total_credit_by_client(self, client_id):
         """
         Retrieve the total amount of all credits.
@@ -206,13 +396,12 @@ class Database:
         with self.connect() as conn:
             cursor = conn.cursor()
             query = """
-                SELECT IFNULL(SUM(cr.reste), 0) AS client_total_credit FROM credit AS cr
-                LEFT JOIN clients AS c ON cr.client_id = c.id
-                WHERE cr.statut = "en cours" AND c.id = ?
+                SELECT total_en_cours AS "client_total_credit [money]" FROM client_balance WHERE client_id = ?
             """
             result = self.fetch_namedtuple(cursor, query, params=(client_id,), tuple_name="TOTAL_CREDIT_BY_CLIENT")
-            return result[0] if result else 0
+            return result[0] if result else Money(0)
 
+    @invalidates(table_arg=0)
     def delete_item(self, table, item_id):
         """
         Delete one or multiple items from the specified table by ID.
@@ -230,7 +419,6 @@ class Database:
                     query = f"DELETE FROM {table} WHERE id = ?"
                     cursor.execute(query, (item_id,))
 
-                conn.commit()
                 return {'success': True}
             except sqlite3.Error as e:
                 return {'success': False, 'error': str(e)}
@@ -256,29 +444,40 @@ class Database:
     # =========================
     # === EMPLOYES METHODES ===
     # =========================
+    @invalidates('employes', 'salaires')
     def insert_new_employe(self, nom, poste, telephone, salaire, date_embauche, observation=""):
         """
         Insert new emplye into database
         :params: nom, poste, telephone, salaire, date_embauche
         """
+        try:
+            date_embauche = to_iso_date(date_embauche)
+            salaire = to_cents(salaire)
+        except ValueError as err:
+            return {'success': False, 'error': str(err)}
+        taken = self._name_taken('employes', nom)
+        if taken:
+            return taken
+
         with self.connect() as conn:
             try:
                 cursor = conn.cursor()
-                cursor.execute(
-                    """INSERT INTO employes (nom, poste, telephone, date_embauche, observation)
-                    VALUES (?, ?, ?, ?, ?)""",
-                    (nom, poste, telephone, date_embauche, observation)
-                )
-                employe_id = cursor.lastrowid
-                cursor.execute(
-                    "INSERT INTO salaires (employe_id, montant_base) VALUES (?, ?)",
-                    (employe_id, salaire)
-                )
-                conn.commit()
+                with savepoint(conn, 'insert_new_employe'):
+                    cursor.execute(
+                        """INSERT INTO employes (nom, poste, telephone, date_embauche, observation)
+                        VALUES (?, ?, ?, ?, ?)""",
+                        (nom, poste, telephone, date_embauche, observation)
+                    )
+                    employe_id = cursor.lastrowid
+                    cursor.execute(
+                        "INSERT INTO salaires (employe_id, montant_base) VALUES (?, ?)",
+                        (employe_id, salaire)
+                    )
                 return {'success': True, 'employe_id': employe_id}
             except sqlite3.Error as err:
                 return {'success': False, 'error': str(err)}
 
+    @cached('employes', 'salaires')
     def dump_employes(self):
         """
         Retrieve all personnes from the database.
@@ -296,10 +495,24 @@ class Database:
 
     def search_employe(self, search_word):
         """
-        Search for personnes by name or telephone.
+        Search for personnes by name, telephone or poste, accents ignored, best matches first.
+        Words shorter than 3 letters are searched with LIKE.
         """
+        match = match_query(search_word)
         with self.connect() as conn:
             cursor = conn.cursor()
+            if match is not None:
+                query = f"""
+                    SELECT {", ".join(self.employes_fields)}
+                    FROM employes_fts f
+                    JOIN employes emp ON emp.id = f.rowid
+                    LEFT JOIN salaires s ON emp.id = s.employe_id
+                    WHERE employes_fts MATCH ?
+                    ORDER BY f.rank
+                """
+                cursor.execute(query, (match,))
+                return cursor.fetchall()
+
             query = f"""
                 SELECT {", ".join(self.employes_fields)}
                 FROM employes emp
@@ -312,6 +525,7 @@ class Database:
             cursor.execute(query, params)
             return cursor.fetchall()
 
+    @invalidates('employes', 'salaires')
     def update_employe(self, emp_id, column, new_text):
         """
         Updates a specific column for an employee in the database.
@@ -324,13 +538,16 @@ class Database:
                 - If successful: {'success': True, 'message': <success_message>}
                 - If failed: {'success': False, 'error': <error_message>}
         Notes:
-            - For column 4 (salaire), the value is updated in the 'salaires' table and formatted using 'format_to_decimal' from the 'utils' module.
-            - Returns an error if the column is invalid or if the 'utils' module cannot be imported.
+            - For column 4 (salaire), the value is converted to centimes and updated in the 'salaires' table.
+            - Returns an error if the column is invalid.
 
         """
         with self.connect() as conn:
             cursor = conn.cursor()
             if column == 1:  # Nom
+                taken = self._name_taken('employes', new_text, emp_id)
+                if taken:
+                    return taken
                 cursor.execute("UPDATE employes SET nom = ? WHERE id = ?", (new_text, emp_id))
                 message = 'Nom mis à jour avec succès.'
             elif column == 2:  # Telephone
@@ -341,29 +558,29 @@ class Database:
                 message = 'Poste mis à jour avec succès.'
             elif column == 4:  # Salaire
                 try:
-                    from utils import format_to_decimal
-                    result = format_to_decimal(new_text)
-                    if not result['success']:
-                        return {'success': False, 'error': result['error']}
-                    salaire_base = str(result['value'])
-                    cursor.execute("UPDATE salaires SET montant_base = ? WHERE employe_id = ?", (salaire_base, emp_id))
-                    message = 'Salaire mis à jour avec succès.'
-                except ImportError:
-                    return {'success': False, 'error': 'Module utils introuvable.'}
+                    salaire_base = to_cents(new_text)
+                except ValueError:
+                    return {'success': False, 'error': 'Entrez un nombre valide.'}
+                cursor.execute("UPDATE salaires SET montant_base = ? WHERE employe_id = ?", (salaire_base, emp_id))
+                message = 'Salaire mis à jour avec succès.'
             elif column == 5:  # Date Embauche
-                cursor.execute("UPDATE employes SET date_embauche = ? WHERE id = ?", (new_text, emp_id))
+                try:
+                    date_embauche = to_iso_date(new_text)
+                except ValueError as err:
+                    return {'success': False, 'error': str(err)}
+                cursor.execute("UPDATE employes SET date_embauche = ? WHERE id = ?", (date_embauche, emp_id))
                 message = "Date d'embauche mise à jour avec succès."
             elif column == 6:  # Observation
                 cursor.execute("UPDATE employes SET observation = ? WHERE id = ?", (new_text, emp_id))
                 message = 'Observation mise à jour avec succès.'
             else:
                 return {'success': False, 'error': 'Colonne invalide.'}
-            conn.commit()
             return {'success': True, 'message': message}
 
     # ========================
     # == Accompte Functions ==
     # ========================
+    @cached('operations', 'employes')
     def sum_accompte(self, month):
         """
         Retrieves the sum of 'prime', 'retenu', and 'avance' operations for a given month.
@@ -376,19 +593,20 @@ class Database:
         """
         query = """
         SELECT
-            IFNULL(SUM(CASE WHEN operation = 'prime' THEN montant ELSE 0 END), 0) AS total_prime,
-            IFNULL(SUM(CASE WHEN operation = 'retenu' THEN montant ELSE 0 END), 0) AS total_retenu,
-            IFNULL(SUM(CASE WHEN operation = 'avance' THEN montant ELSE 0 END), 0) AS total_avance
+            IFNULL(SUM(CASE WHEN operation = 'prime' THEN montant ELSE 0 END), 0) AS "total_prime [money]",
+            IFNULL(SUM(CASE WHEN operation = 'retenu' THEN montant ELSE 0 END), 0) AS "total_retenu [money]",
+            IFNULL(SUM(CASE WHEN operation = 'avance' THEN montant ELSE 0 END), 0) AS "total_avance [money]"
         FROM operations
         """
         params = ()
         if month != 'Tous':
-            query += " WHERE strftime('%Y-%m', date) = ?"
-            params = (month,)
+            query += " WHERE date >= ? AND date < ?"
+            params = month_range(month)
         with self.connect() as conn:
             cursor = conn.cursor()
             return self.fetch_namedtuple(cursor, query, params=params, tuple_name="SUM_ACCOMPTE")[0]
 
+    @cached('operations', 'employes')
     def dump_operations(self, month=None):
         """
         Retrieves summarized operation data for each employee from the database.
@@ -414,8 +632,8 @@ class Database:
 
             params = ()
             if month:
-                query += " WHERE strftime('%Y-%m', o.date) = ?"
-                params = (month,)
+                query += " WHERE o.date >= ? AND o.date < ?"
+                params = month_range(month)
 
             query += """
                 GROUP BY e.id
@@ -425,6 +643,7 @@ class Database:
             cursor.execute(query, params)
             return cursor.fetchall()
 
+    @cached('operations', 'employes')
     def filter_accomptes(self, employe, selected_operation, selected_month):
         """
         Retrieve all operations for a specific employe by ID and operation type.
@@ -452,8 +671,8 @@ class Database:
                 params.append(selected_operation)
 
             if selected_month != 'Tous':
-                query += " AND strftime('%Y-%m', ope.date) = ?"
-                params.append(selected_month)
+                query += " AND ope.date >= ? AND ope.date < ?"
+                params.extend(month_range(selected_month))
 
             query += " ORDER BY emp.nom"
             # logger.debug(query)
@@ -462,6 +681,7 @@ class Database:
             cursor.execute(query, params)
             return cursor.fetchall()
 
+    @cached('operations', 'employes')
     def employee_accompts(self, employe_id, date):
         """
         Retrieve all operations for a specific employe by ID, operation type, and date.
@@ -475,12 +695,13 @@ class Database:
             SELECT {", ".join(self.operation_fields)}
                 FROM operations ope
                 LEFT JOIN employes emp ON emp.id = ope.employe_id
-                WHERE emp.id = ? AND strftime('%Y-%m', ope.date) = ?
+                WHERE emp.id = ? AND ope.date >= ? AND ope.date < ?
                 ORDER BY emp.nom
             """
-            cursor.execute(query, (employe_id, date))
+            cursor.execute(query, (employe_id, *month_range(date)))
             return cursor.fetchall()
 
+    @invalidates('operations')
     def insert_new_operation(self, emp_id, operation, montant, motif, date, observation):
         """
         INSERT New Operation('prime', 'retenu' , 'avance')
@@ -489,71 +710,166 @@ class Database:
             INSERT INTO operations(employe_id, operation, montant, motif, date, observation)
             VALUES(?, ?, ?, ?, ?, ?)
         """
+        try:
+            date = to_iso_date(date)
+            montant = to_cents(montant)
+        except ValueError as err:
+            return {'success': False, 'error': str(err)}
+
         try:
             with self.connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(query, (emp_id, operation, montant, motif, date, observation))
-                conn.commit()
                 return {'success': True, 'operation_id': cursor.lastrowid}
         except sqlite3.Error as err:
             return {'success': False, 'error': str(err)}
 
+    @cached('employes', 'salaires', 'operations', 'salaire_logs')
     def calculate_salaire_mensuel(self, month: str, emp_id: int = None):
         """
         Calcule le salaire mensuel d'un employé ou de tous les employés pour un mois donné.
+        Les employés dont le mois est clôturé (close_payroll) sont lus dans salaire_logs,
+        les autres sont calculés depuis leurs opérations.
         :param month: 'YYYY-MM'
         :param emp_id: Optionnel (ID de l'employé)
         :return: liste de dicts ou dict si emp_id fourni
         """
-        base_query = """
+        start, end = month_range(month)
+        closed_query = """
+            SELECT
+                employe_id,
+                salaire_base AS "salaire_base [money]",
+                total_prime AS "total_prime [money]",
+                total_retenue AS "total_retenue [money]",
+                total_avance AS "total_avance [money]",
+                1 AS "cloture"
+            FROM salaire_logs
+            WHERE mois = ?
+        """
+        live_query = """
             SELECT
                 e.id,
-                s.montant_base AS salaire_base,
-                COALESCE(SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END), 0) AS total_prime,
-                COALESCE(SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END), 0) AS total_retenue,
-                COALESCE(SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END), 0) AS total_avance
+                s.montant_base,
+                COALESCE(SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END), 0),
+                COALESCE(SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END), 0),
+                0
             FROM employes e
             LEFT JOIN salaires s ON e.id = s.employe_id
             LEFT JOIN operations o ON e.id = o.employe_id
-                AND strftime('%Y-%m', o.date) = ?
+                AND o.date >= ? AND o.date < ?
+            WHERE e.id NOT IN (SELECT employe_id FROM salaire_logs WHERE mois = ?)
         """
-        params = [month]
-
+        closed_params = [month]
+        live_params = [start, end, month]
         if emp_id:
-            base_query += " WHERE e.id = ?"
-            params.append(emp_id)
-
-        base_query += " GROUP BY e.id"
+            closed_query += " AND employe_id = ?"
+            closed_params.append(emp_id)
+            live_query += " AND e.id = ?"
+            live_params.append(emp_id)
+        query = f"{closed_query} UNION ALL {live_query} GROUP BY e.id ORDER BY 1"
 
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute(base_query, params)
+            cursor.execute(query, closed_params + live_params)
             rows = cursor.fetchall()
 
             result = []
-            for row in rows:
-                emp_id, salaire_base, prime, retenue, avance = row
-                salaire_base = salaire_base if salaire_base is not None else 0
-                prime = prime if prime is not None else 0
-                retenue = retenue if retenue is not None else 0
-                avance = avance if avance is not None else 0
-                salaire_final = salaire_base + prime - retenue - avance
+            for employe_id, salaire_base, prime, retenue, avance, cloture in rows:
+                salaire_base = salaire_base if salaire_base is not None else Money(0)
+                prime = prime if prime is not None else Money(0)
+                retenue = retenue if retenue is not None else Money(0)
+                avance = avance if avance is not None else Money(0)
+                salaire_final = Money(salaire_base + prime - retenue - avance)
                 result.append({
-                    'employe_id': emp_id,
+                    'employe_id': employe_id,
                     'salaire_base': salaire_base,
                     'total_prime': prime,
                     'total_retenue': retenue,
                     'total_avance': avance,
-                    'salaire_final': salaire_final
+                    'salaire_final': salaire_final,
+                    'cloture': bool(cloture),
                 })
 
             return result if not emp_id else (result[0] if result else None)
 
+    @invalidates('salaire_logs')
+    def close_payroll(self, month: str):
+        """
+        Clôture le mois: enregistre le salaire de tous les employés dans salaire_logs, en une seule requête.
+        Un mois déjà clôturé est recalculé (salaire de base actuel).
+        Ensuite, toute opération ajoutée, modifiée ou supprimée dans ce mois le recalcule (triggers).
+        :param month: 'YYYY-MM'
+        :return: {'success': True, 'mois': month, 'count': nombre d'employés}
+        """
+        try:
+            start, end = month_range(month)
+        except ValueError:
+            return {'success': False, 'error': f"Mois invalide ({month}). Utiliser le format YYYY-MM."}
+        if start > date.today().isoformat():
+            return {'success': False, 'error': f"Le mois {month} n'a pas encore commencé."}
+
+        query = """
+            INSERT INTO salaire_logs(employe_id, mois, salaire_base, total_prime, total_retenue, total_avance,
+                                     salaire_net, date_calcul)
+            SELECT employe_id, ?, base, prime, retenue, avance, base + prime - retenue - avance,
+                   datetime('now', 'localtime')
+            FROM (
+                SELECT
+                    e.id AS employe_id,
+                    IFNULL(s.montant_base, 0) AS base,
+                    IFNULL(SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END), 0) AS prime,
+                    IFNULL(SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END), 0) AS retenue,
+                    IFNULL(SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END), 0) AS avance
+                FROM employes e
+                LEFT JOIN salaires s ON e.id = s.employe_id
+                LEFT JOIN operations o ON e.id = o.employe_id
+                    AND o.date >= ? AND o.date < ?
+                GROUP BY e.id
+            )
+            WHERE true      -- ON CONFLICT after a SELECT needs a WHERE clause
+            ON CONFLICT(employe_id, mois) DO UPDATE SET
+                salaire_base = excluded.salaire_base,
+                total_prime = excluded.total_prime,
+                total_retenue = excluded.total_retenue,
+                total_avance = excluded.total_avance,
+                salaire_net = excluded.salaire_net,
+                date_calcul = excluded.date_calcul
+        """
+        try:
+            with self.connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute(query, (month, start, end))
+                return {'success': True, 'mois': month, 'count': cursor.rowcount}
+        except sqlite3.Error as err:
+            return {'success': False, 'error': str(err)}
+
+    @cached('salaire_logs')
+    def payroll_months(self):
+        """
+        Mois clôturés, du plus récent au plus ancien.
+        :return: [(mois, nombre d'employés, total des salaires nets, date du dernier calcul)]
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT mois, COUNT(*), IFNULL(SUM(salaire_net), 0) AS "total [money]", MAX(date_calcul)
+                FROM salaire_logs
+                GROUP BY mois
+                ORDER BY mois DESC
+            """)
+            return cursor.fetchall()
+
+    @invalidates('operations')
     def update_accompte(self, emp_id, column, new_text):
         with self.connect() as conn:
             cursor = conn.cursor()
             if column == 1:     # Date
-                cursor.execute("UPDATE operations SET date = ? WHERE id = ?", (new_text, emp_id))
+                try:
+                    date = to_iso_date(new_text)
+                except ValueError as err:
+                    return {'success': False, 'error': str(err)}
+                cursor.execute("UPDATE operations SET date = ? WHERE id = ?", (date, emp_id))
                 message = 'Date mis à jour avec succès.'
             elif column == 2:     # operation
                 # Validate operation
@@ -565,24 +881,31 @@ class Database:
             elif column == 3:   # Employee
                 return {'success': False, 'error': 'Employé ne peut pas être modifié.'}
             elif column == 4:      # Montant
-                cursor.execute("UPDATE operations SET montant = ? WHERE id = ?", (str(new_text), emp_id))
+                try:
+                    montant = to_cents(new_text)
+                except ValueError as err:
+                    return {'success': False, 'error': str(err)}
+                cursor.execute("UPDATE operations SET montant = ? WHERE id = ?", (montant, emp_id))
                 message = 'Montant mis à jour avec succès.'
             elif column == 5:   # Motif
                 cursor.execute("UPDATE operations SET motif = ? WHERE id = ?", (new_text, emp_id))
                 message = 'Motif mis à jour avec succès.'
             else:
                 return {'success': False, 'error': 'Colonne invalide.'}
-            conn.commit()
             return {'success': True, 'message': message}
 
     # =============
     # == Clients ==
     # =============
+    @invalidates('clients')
     def insert_new_client(self, nom, telephone, commune, observation):
         """
         Ajoute un client à la base de données.
         :params: nom, telephone, observation
         """
+        taken = self._name_taken('clients', nom)
+        if taken:
+            return taken
         try:
             with self.connect() as conn:
                 cursor = conn.cursor()
@@ -590,11 +913,11 @@ class Database:
                     "INSERT INTO clients (nom, telephone, commune, observation) VALUES (?, ?, ?, ?)",
                     (nom, telephone, commune, observation)
                 )
-                conn.commit()
                 return {'success': True, 'client_id': cursor.lastrowid}
         except sqlite3.Error as err:
             return {'success': False, 'error': str(err)}
 
+    @cached('clients', 'client_balance')
     def dump_clients(self):
         """
         Retrieve all personnes from the database.
@@ -604,40 +927,105 @@ class Database:
             query = f"""
                 SELECT {", ".join(self.clients_fields)}
                 FROM clients c
-                LEFT JOIN credit cr ON c.id = cr.client_id
-                GROUP BY c.id
+                LEFT JOIN client_balance b ON b.client_id = c.id
                 ORDER BY c.nom
             """
             cursor.execute(query)
             return cursor.fetchall()
 
+    def iter_clients(self, batch_size=500):
+        """
+        Same rows as dump_clients(), yielded in batches (see _iter_rows).
+        """
+        query = f"""
+            SELECT {", ".join(self.clients_fields)}
+            FROM clients c
+            LEFT JOIN client_balance b ON b.client_id = c.id
+            ORDER BY c.nom
+        """
+        return self._iter_rows(query, batch_size=batch_size)
+
+    def page_clients(self, after_id=0, limit=50):
+        """
+        Keyset page of clients, ordered by id (stable while rows are added).
+        :param after_id: last client id of the previous page (0 for the first page)
+        :param limit: maximum number of rows
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            query = f"""
+                SELECT {", ".join(self.clients_fields)}
+                FROM clients c
+                LEFT JOIN client_balance b ON b.client_id = c.id
+                WHERE c.id > ?
+                ORDER BY c.id
+                LIMIT ?
+            """
+            cursor.execute(query, (after_id, limit))
+            return cursor.fetchall()
+
     def get_names(self, table_name):
         """
         Retrieve all clients names to display in QComboBox.
         :table_name: Name of the table to retrieve names from (e.g., 'clients', 'employes').
         """
+        if table_name in NAME_TABLES:
+            return self.name_index(table_name).names()
+
         with self.connect() as conn:
             cursor = conn.cursor()
             cursor.execute(f'SELECT nom FROM {table_name}')
             return [row[0] for row in cursor.fetchall()]
 
-    def search_clients(self, search_word):
+    def search_clients(self, search_word, limit=None):
         """
-        Search for personnes by name or telephone.
+        Search for personnes by name, telephone or commune, accents ignored, best matches first.
+        Words shorter than 3 letters are searched with LIKE on the name and telephone.
+        :param limit: maximum number of rows, None for all
         """
+        match = match_query(search_word)
         with self.connect() as conn:
             cursor = conn.cursor()
-            query = f"""
-                SELECT {", ".join(self.clients_fields)}
-                FROM clients AS c
-                LEFT JOIN credit cr ON c.id = cr.client_id
-                WHERE c.nom LIKE ? OR c.telephone LIKE ?
-                GROUP BY c.nom
-            """
-            search_pattern = f'%{search_word}%'
-            cursor.execute(query, (search_pattern, search_pattern))
+            if match is not None:
+                query = f"""
+                    SELECT {", ".join(self.clients_fields)}
+                    FROM clients_fts f
+                    JOIN clients c ON c.id = f.rowid
+                    LEFT JOIN client_balance b ON b.client_id = c.id
+                    WHERE clients_fts MATCH ?
+                    ORDER BY f.rank
+                """
+                params = [match]
+            else:
+                query = f"""
+                    SELECT {", ".join(self.clients_fields)}
+                    FROM clients AS c
+                    LEFT JOIN client_balance b ON b.client_id = c.id
+                    WHERE c.nom LIKE ? OR c.telephone LIKE ?
+                    ORDER BY c.nom
+                """
+                params = [f'%{search_word}%'] * 2
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor.execute(query, params)
             return cursor.fetchall()
 
+    def _client_row(self, cursor, client_id):
+        """
+        One client with the columns of dump_clients(), returned by the writes
+        so that the UI can update the displayed row without reloading the table.
+        """
+        query = f"""
+            SELECT {", ".join(self.clients_fields)}
+            FROM clients c
+            LEFT JOIN client_balance b ON b.client_id = c.id
+            WHERE c.id = ?
+        """
+        cursor.execute(query, (client_id,))
+        return cursor.fetchone()
+
+    @invalidates('clients')
     def update_client(self, client_id, column, new_text):
         """
         Update an employe field in the database.
@@ -648,6 +1036,9 @@ class Database:
         with self.connect() as conn:
             cursor = conn.cursor()
             if column == 1:     # Nom
+                taken = self._name_taken('clients', new_text, client_id)
+                if taken:
+                    return taken
                 cursor.execute("UPDATE clients SET nom = ? WHERE id = ?", (new_text, client_id))
                 message = 'Nom mis à jour avec succès.'
             elif column == 2:   # Credit
@@ -665,12 +1056,12 @@ class Database:
             else:
                 return {'success': False, 'error': 'Colonne invalide.'}
 
-            conn.commit()
-            return {'success': True, 'message': message}
+            return {'success': True, 'message': message, 'row': self._client_row(cursor, client_id)}
 
     # =========================
     # === CREDITS METHODES ===
     # =========================
+    @cached('credit', 'clients')
     def dump_credits(self):
         """
         Retrieve all credits with associated persone names.
@@ -681,17 +1072,29 @@ class Database:
                 SELECT {', '.join(self.credit_fields)}
                 FROM credit cr
                 JOIN clients c ON cr.client_id = c.id
-                LEFT JOIN paiement v on v.credit_id = cr.id
-                GROUP BY cr.id
                 ORDER BY c.nom DESC
             """
             # WHERE cr.status = 'en cours'
             cursor.execute(query)
             return cursor.fetchall()
 
-    def search_credits(self, search_word, statut):
+    def iter_credits(self, batch_size=500):
         """
-        Search for credits by description or persone name.
+        Same rows as dump_credits(), yielded in batches (see _iter_rows).
+        """
+        query = f"""
+            SELECT {', '.join(self.credit_fields)}
+            FROM credit cr
+            JOIN clients c ON cr.client_id = c.id
+            ORDER BY c.nom DESC
+        """
+        return self._iter_rows(query, batch_size=batch_size)
+
+    def page_credits(self, after_id=0, limit=50):
+        """
+        Keyset page of credits, ordered by id (stable while rows are added).
+        :param after_id: last credit id of the previous page (0 for the first page)
+        :param limit: maximum number of rows
         """
         with self.connect() as conn:
             cursor = conn.cursor()
@@ -699,17 +1102,62 @@ class Database:
                 SELECT {', '.join(self.credit_fields)}
                 FROM credit cr
                 JOIN clients c ON cr.client_id = c.id
-                LEFT JOIN paiement v on v.credit_id = cr.id
-                WHERE (cr.motif LIKE ? OR c.nom LIKE ? OR cr.date_credit LIKE ? OR cr.montant LIKE ?)
+                WHERE cr.id > ?
+                ORDER BY cr.id
+                LIMIT ?
             """
-            params = [search_word] * 4
+            cursor.execute(query, (after_id, limit))
+            return cursor.fetchall()
+
+    def search_credits(self, search_word, statut, limit=None):
+        """
+        Search for credits by motif, date, montant or persone name, accents ignored, best matches first.
+        Words shorter than 3 letters are searched with LIKE.
+        :param statut: 'en cours', 'terminé' or 'tous'
+        :param limit: maximum number of rows, None for all
+        """
+        match = match_query(search_word)
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            if match is not None:
+                # A credit matches by its own columns or by the name of its client, it keeps its best rank.
+                # CROSS JOIN: the matched names drive the join, whatever the table statistics
+                query = f"""
+                    WITH hits(id, rank) AS (
+                        SELECT rowid, rank FROM credit_fts WHERE credit_fts MATCH ?
+                        UNION ALL
+                        SELECT cr.id, f.rank
+                        FROM clients_fts f
+                        CROSS JOIN credit cr ON cr.client_id = f.rowid
+                        WHERE clients_fts MATCH ?
+                    )
+                    SELECT {', '.join(self.credit_fields)}
+                    FROM (SELECT id, MIN(rank) AS rank FROM hits GROUP BY id) h
+                    JOIN credit cr ON cr.id = h.id
+                    JOIN clients c ON cr.client_id = c.id
+                """
+                params = [match, match_query(search_word, ['nom'])]
+                order = "h.rank"
+            else:
+                query = f"""
+                    SELECT {', '.join(self.credit_fields)}
+                    FROM credit cr
+                    JOIN clients c ON cr.client_id = c.id
+                    WHERE (cr.motif LIKE ? OR c.nom LIKE ? OR cr.date_credit LIKE ? OR cr.montant LIKE ?)
+                """
+                params = [f'%{search_word}%'] * 4
+                order = "c.nom DESC"
             if statut != "tous":
-                query += " AND cr.statut = ?"
+                query += (" AND" if match is None else " WHERE") + " cr.statut = ?"
                 params.append(statut)
-            query += " GROUP BY cr.id ORDER BY c.nom DESC"
-            cursor.execute(query, params)  # Search pattern for all three fields
+            query += f" ORDER BY {order}"
+            if limit:
+                query += " LIMIT ?"
+                params.append(limit)
+            cursor.execute(query, params)
             return cursor.fetchall()
 
+    @cached('credit', 'clients')
     def credit_by_status(self, status):
         """
         Retrieve all credits grouped by their status.
@@ -720,18 +1168,37 @@ class Database:
             SELECT {', '.join(self.credit_fields)}
             FROM credit cr
             JOIN clients c ON cr.client_id = c.id
-            LEFT JOIN paiement v ON cr.id = v.credit_id
             WHERE cr.statut = ?
-            GROUP BY cr.id
             ORDER BY c.nom DESC
             """
             cursor.execute(query, (status,))
             return cursor.fetchall()
 
+    def _credit_row(self, cursor, credit_id):
+        """
+        One credit with the columns of dump_credits(), returned by the writes
+        so that the UI can update the displayed row without reloading the table.
+        """
+        query = f"""
+            SELECT {', '.join(self.credit_fields)}
+            FROM credit cr
+            JOIN clients c ON cr.client_id = c.id
+            WHERE cr.id = ?
+        """
+        cursor.execute(query, (credit_id,))
+        return cursor.fetchone()
+
+    @invalidates('credit')
     def insert_new_credit(self, client, credit_date, montant, motif=''):
         """
         Add a credit entry for a specific persone.
         """
+        try:
+            credit_date = to_iso_date(credit_date)
+            montant = to_cents(montant)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
         with self.connect() as conn:
             cursor = conn.cursor()
             client_id = self.get_item_id('clients', 'nom', client)
@@ -745,11 +1212,60 @@ class Database:
                     VALUES (?, ?, ?, ?, ?)
                 """
                 cursor.execute(query, (client_id, credit_date, montant, reste, motif))
-                conn.commit()
                 return {'success': True, 'credit_id': cursor.lastrowid}
             except sqlite3.Error as e:
                 return {'success': False, 'error': str(e)}
 
+    @invalidates('credit')
+    def insert_credits_bulk(self, credits):
+        """
+        Add many credits in one transaction (all or nothing).
+
+        :param credits: list of (client, credit_date, montant, motif)
+        :return: {'success': True, 'credit_ids': [...]}
+                 or {'success': False, 'error': str, 'errors': [{'index': i, 'error': str}, ...]}
+        """
+        if not credits:
+            return {'success': True, 'credit_ids': []}
+
+        errors = []
+        rows = []
+        for index, (client, credit_date, montant, motif) in enumerate(credits):
+            try:
+                rows.append([client, to_iso_date(credit_date), to_cents(montant), motif or ''])
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+                rows.append(None)
+
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            # Resolve every client name with the name index
+            clients = self.name_index('clients')
+            client_ids = {row[0]: clients.id_of(row[0]) for row in rows if row}
+
+            for index, row in enumerate(rows):
+                if row and client_ids[row[0]] is None:
+                    errors.append({'index': index, 'error': f"Client {row[0]} n'existe pas."})
+            if errors:
+                errors.sort(key=lambda error: error['index'])
+                return {'success': False, 'error': f"{len(errors)} crédit(s) invalide(s).", 'errors': errors}
+
+            try:
+                with savepoint(conn, 'insert_credits_bulk'):
+                    # RETURNING gives the id of each row, in the order of ``credits``
+                    credit_ids = [
+                        cursor.execute(
+                            "INSERT INTO credit(client_id, date_credit, montant, reste, motif) VALUES (?, ?, ?, ?, ?) "
+                            "RETURNING id",
+                            (client_ids[client], credit_date, montant, montant, motif)
+                        ).fetchone()[0]
+                        for client, credit_date, montant, motif in rows
+                    ]
+                return {'success': True, 'credit_ids': credit_ids}
+            except sqlite3.Error as e:
+                return {'success': False, 'error': str(e), 'errors': []}
+
+    @cached('credit', 'clients')
     def get_client_credits(self, client_id):
         """
         Retrieve all credits for a specific client by name.
@@ -766,13 +1282,12 @@ class Database:
                 SELECT {', '.join(self.credit_fields)}
                 FROM credit cr
                 LEFT JOIN clients c ON cr.client_id = c.id
-                LEFT JOIN paiement v on v.credit_id = cr.id
                 WHERE cr.client_id = ?
-                GROUP BY cr.id
             """
             cursor.execute(query, (client_id,))
             return cursor.fetchall()
 
+    @invalidates('paiement')
     def regle_credit(self, credit_id, client_id):
         """
         Settles a credit by marking it as fully paid.
@@ -788,7 +1303,8 @@ class Database:
 
         Returns:
             dict: A dictionary containing the result of the operation.
-                - If successful: {'success': True, 'message': 'Crédit réglé avec succès.'}
+                - If successful: {'success': True, 'message': 'Crédit réglé avec succès.',
+                                  'row': <updated credit row>, 'client_row': <updated client row>}
                 - If failed: {'success': False, 'error': <error_message>}
         """
         with self.connect() as conn:
@@ -797,29 +1313,31 @@ class Database:
             row = cursor.fetchone()
             if not row:
                 return {'success': False, 'error': 'Credit Introuvable'}
-            reste = row[0]
+            reste = row[0]      # centimes
             if reste <= 0:
                 return {'success': False, 'error': 'Le crédit est déjà réglé ou terminé.'}
             try:
-                cursor.execute('BEGIN')
-                # Add Full Versement
-                date = datetime.now().strftime("%d-%m-%Y")
-                cursor.execute(
-                    """INSERT INTO paiement(credit_id, client_id, date_versement, montant, observation)
-                       VALUES (?, ?, ?, ?, ?)""",
-                    (credit_id, client_id, date, reste, "")
-                )
-                # Update Credit Status
-                cursor.execute(
-                    "UPDATE credit SET reste = 0, statut = 'terminé' WHERE id = ?",
-                    (credit_id,)
-                )
-                conn.commit()
-                return {'success': True, 'message': 'Crédit réglé avec succès.'}
+                with savepoint(conn, 'regle_credit'):
+                    # Add Full Versement
+                    date = datetime.now().date().isoformat()
+                    cursor.execute(
+                        """INSERT INTO paiement(credit_id, client_id, date_versement, montant, observation)
+                           VALUES (?, ?, ?, ?, ?)""",
+                        (credit_id, client_id, date, reste, "")
+                    )
+                    # Update Credit Status
+                    cursor.execute(
+                        "UPDATE credit SET reste = 0, statut = 'terminé' WHERE id = ?",
+                        (credit_id,)
+                    )
+                return {
+                    'success': True, 'message': 'Crédit réglé avec succès.',
+                    'row': self._credit_row(cursor, credit_id), 'client_row': self._client_row(cursor, client_id)
+                }
             except sqlite3.Error as e:
-                conn.rollback()
                 return {'success': False, 'error': str(e)}
 
+    @invalidates('credit')
     def update_credit(self, client_id, column, text, versement):
         """
         Updates a specific field of a credit record in the database for a given client.
@@ -832,12 +1350,14 @@ class Database:
                 4 - montant
                 (Other values are considered invalid or not updatable.)
             text (Any): The new value to set for the specified column.
-            reste (float): The remaining amount, used for validation when updating 'montant'.
+            versement (Money): The amount already paid, used for validation when updating 'montant'.
 
         Returns:
             dict: A dictionary containing the result of the operation:
                 - 'success' (bool): True if the update was successful, False otherwise.
                 - 'message' (str, optional): Success message if the update was successful.
+                - 'row' (tuple, optional): The updated credit, same columns as dump_credits().
+                - 'client_row' (tuple, optional): The client of the credit, same columns as dump_clients().
                 - 'error' (str, optional): Error message if the update failed.
 
         Notes:
@@ -858,7 +1378,7 @@ class Database:
                 elif column == 1:   # Date
                     cursor.execute(
                         "UPDATE credit SET date_credit = ? WHERE id = ?",
-                        (text, client_id)
+                        (to_iso_date(text), client_id)
                     )
                     message = 'Date mis à jour avec succès.'
 
@@ -871,7 +1391,8 @@ class Database:
                     message = 'Motif mis à jour avec succès.'
                 # --- Mise à jour du montant ---
                 elif column == 4:
-                    montant = text        # Type Decimal
+                    montant = Money(text)
+                    versement = Money(versement)
 
                     if montant <= 0:
                         return {'success': False, 'error': 'Montant doit être supérieur à zéro.'}
@@ -880,25 +1401,70 @@ class Database:
                         return {'success': False, 'error': error}
 
                     # Calculer le nouveau reste et statut
-                    reste = montant - versement
+                    reste = Money(montant - versement)
                     statut = 'terminé' if reste == 0 else 'en cours'
                     cursor.execute(
                         "UPDATE credit SET montant = ?, reste = ?, statut = ? WHERE id = ?",
-                        (str(montant), str(reste), statut, client_id)
+                        (montant.cents, reste.cents, statut, client_id)
                     )
                     message = f"Montant mis à jour avec succès: Montant({montant}), Reste({reste}), Status({statut})."
                 else:
                     # invalid colonne
                     return {'success': False, 'error': 'Colonne invalide.'}
-                conn.commit()
-                return {'success': True, 'message': message}
+                cursor.execute("SELECT client_id FROM credit WHERE id = ?", (client_id,))
+                owner = cursor.fetchone()
+                return {
+                    'success': True, 'message': message,
+                    'row': self._credit_row(cursor, client_id),
+                    'client_row': self._client_row(cursor, owner[0]) if owner else None
+                }
             except Exception as e:
-                conn.rollback()
                 return {'success': False, 'error': f"Erreur lors de la mise à jour: {e}"}
 
+    @invalidates('credit')
+    def check_credit_totals(self, repair=False):
+        """
+        Recompute the versement totals of every credit from the paiement table,
+        and the client balances / global total from the credit table.
+        :param repair: rewrite the rows whose stored totals drifted
+        :return: {'success': True, 'drift': [(id, stored, recomputed), ...], 'repaired': bool}
+        """
+        with self.connect() as conn:
+            try:
+                with savepoint(conn, 'check_credit_totals'):
+                    drift = migration.check_credit_totals(conn, repair=repair)
+                    drift += migration.check_client_balances(conn, repair=repair)
+                return {'success': True, 'drift': drift, 'repaired': repair and bool(drift)}
+            except sqlite3.Error as e:
+                return {'success': False, 'error': str(e)}
+
+    @invalidates('credit')
+    def delete_credit(self, credit_ids):
+        """
+        Delete one or multiple credits (their versements follow by ON DELETE CASCADE).
+
+        :param credit_ids: int or list of ints
+        :return: {'success': True, 'client_rows': [updated row of each client of the deleted credits]}
+                 or {'success': False, 'error': str}
+        """
+        if not isinstance(credit_ids, list):
+            credit_ids = [credit_ids]
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            placeholders = ",".join("?" * len(credit_ids))
+            try:
+                cursor.execute(f"SELECT DISTINCT client_id FROM credit WHERE id IN ({placeholders})", credit_ids)
+                client_ids = [row[0] for row in cursor.fetchall()]
+                cursor.execute(f"DELETE FROM credit WHERE id IN ({placeholders})", credit_ids)
+                client_rows = [self._client_row(cursor, client_id) for client_id in client_ids]
+                return {'success': True, 'client_rows': client_rows}
+            except sqlite3.Error as e:
+                return {'success': False, 'error': str(e)}
+
     # ====================================
     # === PAYMENTS(VERSEMENT) METHODES ===
     # ====================================
+    @cached('paiement')
     def get_credit_versements(self, credit_id):
         """
         Retrieve all versements (payments) associated with a specific credit.
@@ -917,187 +1483,414 @@ class Database:
             cursor = conn.cursor()
             cursor.execute(
                 """
-                    SELECT id, date_versement, montant, observation
+                    SELECT id, strftime("%d-%m-%Y", date_versement), montant AS "montant [money]", observation
                     FROM paiement WHERE credit_id = ?
                 """,
                 (credit_id,)
             )
             return cursor.fetchall()
 
+    @invalidates('paiement')
     def insert_new_versement(self, credit_id, client_id, date_versement, montant, observation=""):
         """
         Inserts a new versement (payment) record into the database for a given credit and client.
 
-        This method performs the following actions:
-        1. Inserts a new payment into the 'paiement' table.
+        This method performs the following actions (refused if montant exceeds the remaining balance):
+        1. Inserts a new payment into the 'paiement' table
+           (the trigger trg_paiement_insert updates credit.total_verse / nb_versements / last_versement_date).
         2. Updates the remaining balance ('reste') in the 'credit' table by subtracting the payment amount.
         3. If the remaining balance is less than or equal to zero, marks the credit as "terminé" (finished).
-        4. Commits the transaction if successful; rolls back if an error occurs.
+        4. Runs in a savepoint: undone on error, committed with the outermost ``with db.connect()`` block.
 
         Args:
             credit_id (int): The ID of the credit to which the payment is associated.
             client_id (int): The ID of the client making the payment.
             date_versement (str): The date of the payment (format: 'YYYY-MM-DD').
-            montant (float): The amount of the payment.
+            montant (Money | float): The amount of the payment (stored in centimes).
             observation (str, optional): Additional notes or observations about the payment. Defaults to "".
 
         Returns:
             dict: A dictionary containing:
                 - 'success' (bool): True if the operation was successful, False otherwise.
                 - 'versement_id' (int, optional): The ID of the newly inserted payment (if successful).
+                - 'row' / 'client_row' (tuple, optional): The updated credit and client rows (if successful).
                 - 'error' (str, optional): Error message (if unsuccessful).
         """
+        try:
+            date_versement = to_iso_date(date_versement)
+            montant = to_cents(montant)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
         with self.connect() as conn:
             cursor = conn.cursor()
+            credit = cursor.execute("SELECT reste FROM credit WHERE id = ?", (credit_id,)).fetchone()
+            if credit is None:
+                return {'success': False, 'error': f"Crédit {credit_id} introuvable."}
+            if montant > credit[0]:
+                error = (f"Le versement ({Money.from_cents(montant)}) dépasse le reste du crédit "
+                         f"({Money.from_cents(credit[0])}).")
+                return {'success': False, 'error': error}
             try:
+                with savepoint(conn, 'insert_new_versement'):
+                    cursor.execute(
+                        """
+                        INSERT INTO paiement(credit_id, client_id, date_versement, montant, observation)
+                        VALUES(?, ?, ?, ?, ?)
+                        """,
+                        (credit_id, client_id, date_versement, montant, observation)
+                    )
+                    # Update remaining balance
+                    cursor.execute(
+                        "UPDATE credit SET reste = reste - ?  WHERE id = ?",
+                        (montant, credit_id)
+                    )
+                    # If reste <= 0 => mark as "terminé"
+                    cursor.execute(
+                        "UPDATE credit SET statut = 'terminé' WHERE id = ? AND reste <= 0",
+                        (credit_id,)
+                    )
+                    versement_id = cursor.lastrowid
+                return {
+                    'success': True, 'versement_id': versement_id,
+                    'row': self._credit_row(cursor, credit_id), 'client_row': self._client_row(cursor, client_id)
+                }
+            except sqlite3.Error as e:
+                return {'success': False, 'error': str(e)}
+
+    @invalidates('paiement')
+    def insert_versements_bulk(self, versements):
+        """
+        Add many versements in one transaction (all or nothing), then update the credits once.
+
+        :param versements: list of (credit_id, client_id, date_versement, montant, observation)
+        :return: {'success': True, 'versement_ids': [...]}
+                 or {'success': False, 'error': str, 'errors': [{'index': i, 'error': str}, ...]}
+        """
+        if not versements:
+            return {'success': True, 'versement_ids': []}
+
+        errors = []
+        rows = []
+        indexes = []        # index in ``versements`` of each valid row
+        for index, (credit_id, client_id, date_versement, montant, observation) in enumerate(versements):
+            try:
+                rows.append((credit_id, client_id, to_iso_date(date_versement), to_cents(montant), observation or ''))
+                indexes.append(index)
+            except ValueError as e:
+                errors.append({'index': index, 'error': str(e)})
+
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            # Check every credit in one query
+            credit_ids = list({row[0] for row in rows})
+            credits = {}        # id -> (client_id, reste)
+            for start in range(0, len(credit_ids), 500):
+                chunk = credit_ids[start:start + 500]
                 cursor.execute(
-                    """
-                    INSERT INTO paiement(credit_id, client_id, date_versement, montant, observation)
-                    VALUES(?, ?, ?, ?, ?)
-                    """,
-                    (credit_id, client_id, date_versement, montant, observation)
-                )
-                # Update remaining balance
-                cursor.execute(
-                    "UPDATE credit SET reste = reste - ?  WHERE id = ?",
-                    (montant, credit_id)
-                )
-                # If reste <= 0 => mark as "terminé"
-                cursor.execute(
-                    "UPDATE credit SET statut = 'terminé' WHERE id = ? AND reste <= 0",
-                    (credit_id,)
+                    f"SELECT id, client_id, reste FROM credit WHERE id IN ({','.join('?' * len(chunk))})", chunk
                 )
-                conn.commit()
-                return {'success': True, 'versement_id': cursor.lastrowid}
+                credits.update((credit_id, (owner, reste)) for credit_id, owner, reste in cursor.fetchall())
+
+            paid = {}           # credit_id -> cumulative montant of the batch
+            for index, (credit_id, client_id, _, montant, _) in zip(indexes, rows):
+                if credit_id not in credits:
+                    errors.append({'index': index, 'error': f"Crédit {credit_id} introuvable."})
+                    continue
+                owner, reste = credits[credit_id]
+                if owner != client_id:
+                    error = f"Le crédit {credit_id} n'appartient pas au client {client_id}."
+                    errors.append({'index': index, 'error': error})
+                    continue
+                paid[credit_id] = paid.get(credit_id, 0) + montant
+                if paid[credit_id] > reste:
+                    error = (f"Les versements du crédit {credit_id} ({Money.from_cents(paid[credit_id])}) "
+                             f"dépassent son reste ({Money.from_cents(reste)}).")
+                    errors.append({'index': index, 'error': error})
+            if errors:
+                errors.sort(key=lambda error: error['index'])
+                return {'success': False, 'error': f"{len(errors)} versement(s) invalide(s).", 'errors': errors}
+
+            try:
+                with savepoint(conn, 'insert_versements_bulk'):
+                    versement_ids = [
+                        cursor.execute(
+                            """INSERT INTO paiement(credit_id, client_id, date_versement, montant, observation)
+                               VALUES (?, ?, ?, ?, ?) RETURNING id""",
+                            row
+                        ).fetchone()[0]
+                        for row in rows
+                    ]
+                    # Update remaining balance, once per credit
+                    cursor.executemany(
+                        "UPDATE credit SET reste = reste - ? WHERE id = ?",
+                        [(total, credit_id) for credit_id, total in paid.items()]
+                    )
+                    cursor.executemany(
+                        "UPDATE credit SET statut = 'terminé' WHERE id = ? AND reste <= 0",
+                        [(credit_id,) for credit_id in paid]
+                    )
+                return {'success': True, 'versement_ids': versement_ids}
             except sqlite3.Error as e:
-                conn.rollback()
-                return {'success': False, 'error': str(e)}
+                return {'success': False, 'error': str(e), 'errors': []}
 
+    @invalidates('paiement')
     def delete_paiement(self, paiement_id):
         with self.connect() as conn:
             cursor = conn.cursor()
 
             # 1. Get montant and credit_id
-            cursor.execute('SELECT montant, credit_id FROM paiement WHERE id = ?', (paiement_id,))
+            cursor.execute('SELECT montant, credit_id, client_id FROM paiement WHERE id = ?', (paiement_id,))
             row = cursor.fetchone()
             if not row:
                 return {'success': False, 'message': "❌ Versement introuvable."}
 
-            montant, credit_id = row
+            montant, credit_id, client_id = row
 
             try:
-                cursor.execute('BEGIN')
-                # 2. Delete the versement
-                cursor.execute('DELETE FROM paiement WHERE id = ?', (paiement_id,))
-                # 3. Add back the montant to credit.reste
-                cursor.execute('UPDATE credit SET reste = reste + ?  WHERE id = ?', (montant, credit_id))
-                # 4. If credit was terminé, set it to en cours
-                cursor.execute("UPDATE credit SET statut = 'en cours' WHERE id = ? AND reste > 0", (credit_id,))
-
-                conn.commit()
-                return {'success': True, 'message': "✅ Versement supprimé avec succès."}
+                with savepoint(conn, 'delete_paiement'):
+                    # 2. Delete the versement
+                    cursor.execute('DELETE FROM paiement WHERE id = ?', (paiement_id,))
+                    # 3. Add back the montant to credit.reste
+                    cursor.execute('UPDATE credit SET reste = reste + ?  WHERE id = ?', (montant, credit_id))
+                    # 4. If credit was terminé, set it to en cours
+                    cursor.execute("UPDATE credit SET statut = 'en cours' WHERE id = ? AND reste > 0", (credit_id,))
+
+                return {
+                    'success': True, 'message': "✅ Versement supprimé avec succès.",
+                    'row': self._credit_row(cursor, credit_id), 'client_row': self._client_row(cursor, client_id)
+                }
             except Exception as e:
-                conn.rollback()
                 return {'success': False, 'message': f"❌ Erreur : {str(e)}"}
 
+    # =========================
+    # === SYNC (change_log) ===
+    # =========================
+    def _sync_rows(self, cursor, table, ids):
+        """Current rows of a synced table, in the same format as its listing."""
+        queries = {
+            'clients': f"""
+                SELECT {", ".join(self.clients_fields)}
+                FROM clients c LEFT JOIN client_balance b ON b.client_id = c.id
+                WHERE c.id IN ({{}})
+            """,
+            'credit': f"""
+                SELECT {', '.join(self.credit_fields)}
+                FROM credit cr JOIN clients c ON cr.client_id = c.id
+                WHERE cr.id IN ({{}})
+            """,
+            'paiement': """
+                SELECT id, credit_id, strftime("%d-%m-%Y", date_versement), montant AS "montant [money]", observation
+                FROM paiement WHERE id IN ({})
+            """,
+        }
+        rows = []
+        for start in range(0, len(ids), 500):   # stay below the SQLite variable limit
+            chunk = ids[start:start + 500]
+            cursor.execute(queries[table].format(",".join("?" * len(chunk))), chunk)
+            rows.extend(cursor.fetchall())
+        return rows
+
+    def data_version(self, tables):
+        """
+        Last change_log version of the given tables (0 if never changed).
+        It changes whenever a row of one of the tables is inserted, updated or deleted.
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            version = 0
+            for table in tables:
+                cursor.execute("SELECT IFNULL(MAX(version), 0) FROM change_log WHERE table_name = ?", (table,))
+                version = max(version, cursor.fetchone()[0])
+            return version
+
+    def changes_since(self, version, limit=1000):
+        """
+        Rows of clients, credit and paiement changed after ``version`` (see change_log).
+
+        :param version: last version known by the caller (0 for a full sync)
+        :param limit: maximum number of changes, call again with the returned version while has_more
+        :return: {'success': True, 'version': int, 'has_more': bool, 'reset': bool,
+                  'changes': {table: {'upserted': [rows], 'deleted': [ids]}}}
+            reset is True when the caller is ahead of the database (restored backup): drop the cache and sync from 0.
+        """
+        with self.connect() as conn:
+            cursor = conn.cursor()
+            try:
+                changes = {table: {'upserted': [], 'deleted': []} for table in migration.SYNC_TABLES}
+                current = cursor.execute("SELECT IFNULL(MAX(version), 0) FROM change_log").fetchone()[0]
+                if version > current:
+                    return {'success': True, 'version': current, 'has_more': False, 'reset': True, 'changes': changes}
+
+                cursor.execute(
+                    "SELECT version, table_name, row_id, op FROM change_log WHERE version > ? ORDER BY version LIMIT ?",
+                    (version, limit + 1)
+                )
+                log = cursor.fetchall()
+                has_more = len(log) > limit
+                log = log[:limit]
+
+                upserted = {table: [] for table in migration.SYNC_TABLES}
+                for _, table, row_id, op in log:
+                    if op == 'delete':
+                        changes[table]['deleted'].append(row_id)
+                    else:
+                        upserted[table].append(row_id)
+                for table, ids in upserted.items():
+                    changes[table]['upserted'] = self._sync_rows(cursor, table, ids)
+
+                return {
+                    'success': True,
+                    'version': log[-1][0] if log else version,
+                    'has_more': has_more,
+                    'reset': False,
+                    'changes': changes,
+                }
+            except sqlite3.Error as e:
+                return {'success': False, 'error': str(e)}
+
     # ======================
     # === Charge Methods ===
     # ======================
+    @cached('charges')
     def sum_charges(self, month=None):
         # Note: not used
-        query = "SELECT IFNULL(SUM(montant), 0) AS total_charges FROM charges"
+        query = 'SELECT IFNULL(SUM(montant), 0) AS "total_charges [money]" FROM charges'
         params = ()
         if month:
-            query += " WHERE strftime('%Y-%m', date_charge) = ?"
-            params = (month, )
+            query += " WHERE date_charge >= ? AND date_charge < ?"
+            params = month_range(month)
 
         with self.connect() as conn:
             cursor = conn.cursor()
             result = self.fetch_namedtuple(cursor, query, params=params)
             return result[0] if result else 0
 
+    @cached('charges', 'employes')
     def dump_charges(self, month):
         query = f"""
         SELECT {", ".join(self.charge_fields)} FROM charges ch
         LEFT JOIN employes emp ON emp.id = ch.effectue_par
-        WHERE strftime('%Y-%m', ch.date_charge) = ?
+        WHERE ch.date_charge >= ? AND ch.date_charge < ?
         ORDER BY ch.date_charge DESC
         """
         with self.connect() as conn:
             cursor = conn.cursor()
-            cursor.execute(query, (month, ))
+            cursor.execute(query, month_range(month))
             return cursor.fetchall()
 
     def search_charge(self, search_word, month):
+        """
+        Search the charges of a month by motif, date or employe name, accents ignored, best matches first.
+        Words shorter than 3 letters are searched with LIKE.
+        :param month: 'YYYY-MM' or 'Tous'
+        """
+        match = match_query(search_word) if search_word else None
         with self.connect() as conn:
             cursor = conn.cursor()
 
-            query = f"""
-                SELECT {", ".join(self.charge_fields)}
-                FROM charges ch
-                LEFT JOIN employes emp ON emp.id = ch.effectue_par
-            """
             conditions = []
             params = []
-
-            # Add search conditions if a word is provided
-            if search_word:
-                conditions.append("(emp.nom LIKE ? OR ch.motif LIKE ? OR ch.date_charge LIKE ?)")
-                params.extend([f"%{search_word}%"] * 3)
+            order = "ch.date_charge DESC"
+
+            if match is not None:
+                # A charge matches by its own columns or by the name of the employe who paid it
+                # (CROSS JOIN: the matched names drive the join, effectue_par is stored as text)
+                query = f"""
+                    WITH hits(id, rank) AS (
+                        SELECT rowid, rank FROM charges_fts WHERE charges_fts MATCH ?
+                        UNION ALL
+                        SELECT ch.id, f.rank
+                        FROM employes_fts f
+                        CROSS JOIN charges ch ON ch.effectue_par = CAST(f.rowid AS TEXT)
+                        WHERE employes_fts MATCH ?
+                    )
+                    SELECT {", ".join(self.charge_fields)}
+                    FROM (SELECT id, MIN(rank) AS rank FROM hits GROUP BY id) h
+                    JOIN charges ch ON ch.id = h.id
+                    LEFT JOIN employes emp ON emp.id = ch.effectue_par
+                """
+                params.extend([match, match_query(search_word, ['nom'])])
+                order = "h.rank, ch.date_charge DESC"
+            else:
+                query = f"""
+                    SELECT {", ".join(self.charge_fields)}
+                    FROM charges ch
+                    LEFT JOIN employes emp ON emp.id = ch.effectue_par
+                """
+                # Add search conditions if a word is provided
+                if search_word:
+                    conditions.append("(emp.nom LIKE ? OR ch.motif LIKE ? OR ch.date_charge LIKE ?)")
+                    params.extend([f"%{search_word}%"] * 3)
 
             # Add month condition if not "Tous"
             if month != "Tous":
-                conditions.append("strftime('%Y-%m', ch.date_charge) = ?")
-                params.append(month)
+                conditions.append("ch.date_charge >= ? AND ch.date_charge < ?")
+                params.extend(month_range(month))
 
             # Add WHERE if there are conditions
             if conditions:
                 query += " WHERE " + " AND ".join(conditions)
 
-            query += " ORDER BY ch.date_charge DESC"
+            query += f" ORDER BY {order}"
 
             cursor.execute(query, params)
             return cursor.fetchall()
 
+    @cached('charges')
     def get_charge_by_id(self, charge_id):
         with self.connect() as conn:
             cursor = conn.cursor()
-            query = "SELECT * FROM charges WHERE id = ?"
+            query = """
+                SELECT id, date_charge, effectue_par, montant AS "montant [money]", motif
+                FROM charges WHERE id = ?
+            """
             result = self.fetch_namedtuple(cursor, query, (charge_id,), "Charge")
             # result is a list of Charge namedtuples
             return result[0] if result else None
 
+    @invalidates('charges')
     def insert_new_charge(self, date_charge, effectue_par, montant, motif):
         """
         Insert a new charge into the database.
         """
+        try:
+            date_charge = to_iso_date(date_charge)
+            montant = to_cents(montant)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
         employe_id = self.get_item_id('employes', 'nom', effectue_par)
         with self.connect() as conn:
             cursor = conn.cursor()
             try:
                 cursor.execute(
                     "INSERT INTO charges (date_charge, effectue_par, montant, motif) VALUES (?, ?, ?, ?)",
-                    (date_charge, employe_id, str(montant), motif)
+                    (date_charge, employe_id, montant, motif)
                 )
-                conn.commit()
                 return {'success': True, 'message': "Charge ajoutée avec succès."}
             except sqlite3.Error as e:
-                conn.rollback()
                 return {'success': False, 'error': str(e)}
 
+    @invalidates('charges')
     def update_charge_values(self, charge_id, date, effectue_par, montant, motif):
+        try:
+            date = to_iso_date(date)
+            montant = to_cents(montant)
+        except ValueError as e:
+            return {'success': False, 'error': str(e)}
+
         with self.connect() as conn:
             cursor = conn.cursor()
             query = "UPDATE charges set date_charge = ?, effectue_par = ?, montant = ?, motif = ? WHERE id = ?"
             employe_id = self.get_item_id('employes', 'nom', effectue_par)
             try:
-                cursor.execute(query, (date, employe_id, str(montant), motif, charge_id))
-                conn.commit()
+                cursor.execute(query, (date, employe_id, montant, motif, charge_id))
                 return {'success': True, 'message': 'Charge mise à jour avec succès.'}
             except sqlite3.Error as e:
-                conn.rollback()
                 return {'success': False, 'error': str(e)}
 
+    @invalidates('charges')
     def update_charge(self, charge_id, column, new_text):
         """
         Update an employe field in the database.
@@ -1109,14 +1902,22 @@ class Database:
             cursor = conn.cursor()
             # Date
             if column == 1:
-                cursor.execute("UPDATE charges SET date_charge = ? WHERE id = ?", (new_text, charge_id))
+                try:
+                    date = to_iso_date(new_text)
+                except ValueError as e:
+                    return {'success': False, 'error': str(e)}
+                cursor.execute("UPDATE charges SET date_charge = ? WHERE id = ?", (date, charge_id))
                 message = 'Date mis à jour avec succès.'
             # Effectue par
             elif column == 2:
                 return {'success': False, 'error': 'Modification de l\'employé non autorisée.'}
             # Montant
             elif column == 3:
-                cursor.execute("UPDATE charges SET montant = ? WHERE id = ?", (new_text, charge_id))
+                try:
+                    montant = to_cents(new_text)
+                except ValueError as e:
+                    return {'success': False, 'error': str(e)}
+                cursor.execute("UPDATE charges SET montant = ? WHERE id = ?", (montant, charge_id))
                 message = 'Montant mis à jour avec succès.'
             # Motif
             elif column == 4:
@@ -1125,12 +1926,11 @@ class Database:
             else:
                 return {'success': False, 'error': 'Colonne invalide.'}
 
-            conn.commit()
             return {'success': True, 'message': message}
 
     def close(self):
-        with self.connect() as conn:
-            conn.close()
+        """Close all pooled connections."""
+        self.pool.close()
 
 
 if __name__ == '__main__':
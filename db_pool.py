@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Pool of reusable sqlite3 connections shared by Database.
+# ----------------------------------------------------------------------------
+
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from query_profiler import ProfilingConnection
+
+
+# PRAGMAs applied on each new connection, in order.
+# busy_timeout comes first so that switching journal_mode waits for other connections.
+PRAGMA_PROFILES = {
+    'default': [
+        ("foreign_keys", "ON"),
+    ],
+    'wal': [
+        ("busy_timeout", 5000),         # wait up to 5s on a locked database
+        ("journal_mode", "WAL"),        # readers don't block the writer (and vice versa)
+        ("synchronous", "NORMAL"),      # safe with WAL, fsync only at checkpoint
+        ("cache_size", -16000),         # 16 MB page cache
+        ("mmap_size", 268435456),       # 256 MB memory-mapped I/O
+        ("temp_store", "MEMORY"),
+        ("foreign_keys", "ON"),
+    ],
+    'durable': [
+        ("busy_timeout", 5000),
+        ("journal_mode", "WAL"),
+        ("synchronous", "FULL"),
+        ("cache_size", -16000),
+        ("temp_store", "MEMORY"),
+        ("foreign_keys", "ON"),
+    ],
+}
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no connection becomes available before the timeout."""
+
+
+@contextmanager
+def savepoint(conn, name):
+    """
+    Run a block as one unit of the current transaction, which is opened if needed.
+
+    Unlike BEGIN, a SAVEPOINT nests: the work is kept until the outermost ``with db.connect()``
+    block commits (PooledConnection), never committed by RELEASE. On error only the block is undone.
+
+    :param conn: sqlite3 connection
+    :param name: savepoint name (an identifier)
+    """
+    if not conn.in_transaction:
+        conn.execute("BEGIN")       # else RELEASE of the outermost savepoint would commit
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+
+
+class PooledConnection:
+    """
+    Context manager returned by ConnectionPool.connection().
+
+    Behaves like ``with sqlite3.connect(...) as conn``: commit on success,
+    rollback on error, but the connection goes back to the pool instead of leaking.
+    Nested blocks of the same thread share the connection: only the outermost one
+    commits or rolls back, an inner exit never ends the transaction of the outer block.
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+        self.outermost = False
+
+    def __enter__(self):
+        self.outermost = self.pool.depth() == 0
+        self.conn = self.pool.acquire()
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self.outermost:
+                if exc_type is None:
+                    self.conn.commit()
+                else:
+                    self.conn.rollback()
+        finally:
+            self.pool.release(self.conn)
+            self.conn = None
+        return False
+
+
+class ConnectionPool:
+    """
+    Thread-aware pool of sqlite3 connections.
+
+    - A thread keeps the same connection for nested acquire() calls
+      (e.g. get_item_id() called inside insert_new_credit()).
+    - At most ``max_size`` connections are opened; extra threads wait ``timeout`` seconds.
+    - Idle connections are health-checked before being handed out.
+    - close() really closes every connection.
+    """
+    def __init__(self, db_name, max_size=5, timeout=10.0, profile='default', profiler=None):
+        if profile not in PRAGMA_PROFILES:
+            raise ValueError(f"Profil PRAGMA inconnu: {profile}")
+        self.db_name = db_name
+        self.profile = profile
+        self.profiler = profiler    # QueryProfiler of the connections, None: plain sqlite3 connections
+        self.max_size = max_size
+        self.timeout = timeout
+
+        self._idle = []             # connections ready to be reused
+        self._in_use = {}           # thread ident -> [connection, depth]
+        self._detached = set()      # connections opened by acquire_detached(), outside the pool
+        self._size = 0              # total opened connections
+        self._closed = False
+        self._cond = threading.Condition()
+
+    # == Connections ==
+    def _create(self):
+        # PARSE_COLNAMES: columns selected as "name [money]" are converted to Money (see money.py)
+        conn = sqlite3.connect(
+            self.db_name, timeout=self.timeout, check_same_thread=False, detect_types=sqlite3.PARSE_COLNAMES,
+            factory=sqlite3.Connection if self.profiler is None else ProfilingConnection
+        )
+        if self.profiler is not None:
+            conn.profiler = self.profiler
+        for pragma, value in PRAGMA_PROFILES[self.profile]:
+            conn.execute(f"PRAGMA {pragma} = {value}")
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        self._size -= 1
+
+    def connection(self):
+        """Return a context manager around a pooled connection."""
+        return PooledConnection(self)
+
+    def acquire(self):
+        """
+        Check out a connection for the current thread.
+        The same thread gets the same connection back until it releases it.
+        """
+        ident = threading.get_ident()
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed.")
+
+            held = self._in_use.get(ident)
+            if held is not None:
+                held[1] += 1
+                return held[0]
+
+            conn = self._checkout()
+            if conn is not None:
+                self._in_use[ident] = [conn, 1]
+                return conn
+
+        conn = self._open()
+        with self._cond:
+            self._in_use[ident] = [conn, 1]
+        return conn
+
+    def depth(self):
+        """Number of nested acquire() of the current thread not released yet (0: none)."""
+        with self._cond:
+            held = self._in_use.get(threading.get_ident())
+            return held[1] if held is not None else 0
+
+    def acquire_detached(self):
+        """
+        Open a connection outside the pool, not bound to the current thread,
+        e.g. to iterate a cursor from several executor threads (one at a time).
+        It doesn't count in ``max_size``: a long stream (slow client) never takes
+        a connection away from the short calls. Close it with release_detached().
+        """
+        with self._cond:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed.")
+        conn = self._create()
+        with self._cond:
+            self._detached.add(conn)
+        return conn
+
+    def _checkout(self):
+        """
+        Pop a healthy idle connection, or reserve a slot for a new one (returns None).
+        Must be called with the lock held, waits up to ``timeout`` when the pool is full.
+        """
+        while True:
+            while self._idle:
+                conn = self._idle.pop()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+
+            if self._size < self.max_size:
+                self._size += 1
+                return None
+
+            if not self._cond.wait(self.timeout):
+                raise PoolTimeout(f"Aucune connexion disponible après {self.timeout}s.")
+
+    def _open(self):
+        """Open the connection of a slot reserved by _checkout(), outside the lock."""
+        # connect() may block on the file system
+        try:
+            return self._create()
+        except sqlite3.Error:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        """Give the connection back once the outermost acquire() of the thread is done."""
+        ident = threading.get_ident()
+        with self._cond:
+            held = self._in_use.get(ident)
+            if held is None or held[0] is not conn:
+                return
+            held[1] -= 1
+            if held[1] > 0:
+                return
+
+            del self._in_use[ident]
+            self._give_back(conn)
+
+    def release_detached(self, conn):
+        """Close a connection opened with acquire_detached()."""
+        with self._cond:
+            if conn not in self._detached:
+                return
+            self._detached.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _give_back(self, conn):
+        # Called with the lock held
+        if conn.in_transaction:
+            conn.rollback()     # never hand out a connection with a pending transaction
+        if self._closed:
+            self._discard(conn)
+        else:
+            self._idle.append(conn)
+        self._cond.notify()
+
+    def stats(self):
+        """Return the current pool usage."""
+        with self._cond:
+            return {
+                'size': self._size,
+                'max_size': self.max_size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'detached': len(self._detached),    # streams, outside max_size
+            }
+
+    def close(self):
+        """Close idle connections now, busy ones as soon as they are released."""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+            self._cond.notify_all()
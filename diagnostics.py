@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Diagnostics window: timings of the Database methods, slow queries,
+#                 query cache and connection pool (see query_profiler.py).
+# ----------------------------------------------------------------------------
+from PyQt5 import QtWidgets, QtCore
+
+from tableEditingFinished import MyTable
+
+
+STATS_HEADERS = ['Méthode', 'Appels', 'Requêtes', 'Lignes', 'p50 (ms)', 'p95 (ms)', 'p99 (ms)', 'Max (ms)',
+                 'Total (ms)', 'SQL (ms)']
+SLOW_HEADERS = ['Heure', 'Méthode', 'Durée (ms)', 'Lignes', 'Requête', 'Plan']
+
+
+class DiagnosticsDialog(QtWidgets.QDialog):
+    """
+    Non-modal window over Database.query_stats() / slow_queries() / cache_stats().
+    Refreshed every ``refresh_ms`` while visible.
+    """
+    def __init__(self, db, parent=None, refresh_ms=2000):
+        super().__init__(parent)
+        self.db = db
+        self.setWindowTitle("Diagnostics de la base de données")
+        self.resize(1100, 650)
+
+        self.labelSummary = QtWidgets.QLabel(self)
+        self.statsTable = self._table()
+        self.slowTable = self._table()
+
+        buttonRefresh = QtWidgets.QPushButton("Actualiser", self)
+        buttonReset = QtWidgets.QPushButton("Réinitialiser", self)
+        buttonClose = QtWidgets.QPushButton("Fermer", self)
+        buttonRefresh.clicked.connect(self.refresh)
+        buttonReset.clicked.connect(self.reset)
+        buttonClose.clicked.connect(self.close)
+
+        buttons = QtWidgets.QHBoxLayout()
+        buttons.addStretch()
+        for button in (buttonRefresh, buttonReset, buttonClose):
+            buttons.addWidget(button)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.addWidget(self.labelSummary)
+        layout.addWidget(QtWidgets.QLabel("Temps par méthode (sur les 1000 derniers appels)", self))
+        layout.addWidget(self.statsTable, 3)
+        layout.addWidget(QtWidgets.QLabel("Requêtes lentes", self))
+        layout.addWidget(self.slowTable, 2)
+        layout.addLayout(buttons)
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.setInterval(refresh_ms)
+        self.timer.timeout.connect(self.refresh)
+
+    def _table(self):
+        table = MyTable(self)
+        table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        table.setSortingEnabled(True)
+        table.horizontalHeader().setStretchLastSection(True)
+        return table
+
+    def refresh(self):
+        stats = self.db.query_stats()
+        if stats is None:
+            self.labelSummary.setText("Profilage désactivé (config.DB_PROFILING).")
+            return
+
+        rows = [
+            (method, s['calls'], s['queries'], s['rows'], s['p50_ms'], s['p95_ms'], s['p99_ms'], s['max_ms'],
+             s['total_ms'], s['sql_ms'])
+            for method, s in sorted(stats.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        ]
+        self.statsTable.set_rows(rows, STATS_HEADERS)
+
+        slow = [
+            (q['time'], q['method'], q['ms'], q['rows'] if q['affected'] is None else f"{q['affected']} modifiée(s)",
+             q['sql'], ' | '.join(q['plan']))
+            for q in reversed(self.db.slow_queries())
+        ]
+        self.slowTable.set_rows(slow, SLOW_HEADERS)
+
+        cache = self.db.cache_stats()
+        pool = self.db.pool.stats()
+        summary = (f"Seuil des requêtes lentes: {self.db.profiler.slow_ms} ms  •  "
+                   f"Connexions: {pool['in_use']} utilisées / {pool['size']} ouvertes (max {pool['max_size']}), "
+                   f"{pool['detached']} flux")
+        if cache is not None:
+            summary += (f"  •  Cache: {cache['entries']} entrées, {cache['hits']} hits, {cache['misses']} misses, "
+                        f"{cache['invalidations']} invalidations")
+        self.labelSummary.setText(summary)
+
+    def reset(self):
+        if self.db.profiler is not None:
+            self.db.profiler.reset()
+        self.refresh()
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
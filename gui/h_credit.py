@@ -1335,7 +1335,7 @@ class Ui_MainWindow(object):
         self.labelVersementCount.setObjectName("labelVersementCount")
         self.horizontalLayout_10.addWidget(self.labelVersementCount)
         self.verticalLayout_16.addLayout(self.horizontalLayout_10)
-        self.versementTableWidget = QtWidgets.QTableWidget(self.VersementWidgetcontainer)
+        self.versementTableWidget = MyTable(self.VersementWidgetcontainer)
         font = QtGui.QFont()
         font.setFamily("Lucida Casual")
         font.setPointSize(13)
@@ -1349,24 +1349,6 @@ class Ui_MainWindow(object):
         self.versementTableWidget.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
         self.versementTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.versementTableWidget.setObjectName("versementTableWidget")
-        self.versementTableWidget.setColumnCount(4)
-        self.versementTableWidget.setRowCount(2)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setVerticalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setVerticalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setItem(0, 1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.versementTableWidget.setItem(1, 1, item)
         self.versementTableWidget.horizontalHeader().setDefaultSectionSize(150)
         self.versementTableWidget.horizontalHeader().setStretchLastSection(True)
         self.versementTableWidget.verticalHeader().setVisible(False)
@@ -1962,29 +1944,7 @@ class Ui_MainWindow(object):
         self.clientsTableWidget.setAlternatingRowColors(False)
         self.clientsTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.clientsTableWidget.setGridStyle(QtCore.Qt.SolidLine)
-        self.clientsTableWidget.setColumnCount(6)
         self.clientsTableWidget.setObjectName("clientsTableWidget")
-        self.clientsTableWidget.setRowCount(4)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setVerticalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setVerticalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setVerticalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setVerticalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.clientsTableWidget.setHorizontalHeaderItem(5, item)
         self.clientsTableWidget.horizontalHeader().setVisible(True)
         self.clientsTableWidget.horizontalHeader().setCascadingSectionResizes(False)
         self.clientsTableWidget.horizontalHeader().setDefaultSectionSize(150)
@@ -2182,26 +2142,6 @@ class Ui_MainWindow(object):
         self.creditTableWidget.setProperty("showDropIndicator", True)
         self.creditTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.creditTableWidget.setObjectName("creditTableWidget")
-        self.creditTableWidget.setColumnCount(4)
-        self.creditTableWidget.setRowCount(1)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setVerticalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setItem(0, 0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setItem(0, 1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setItem(0, 2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.creditTableWidget.setItem(0, 3, item)
         self.creditTableWidget.horizontalHeader().setCascadingSectionResizes(False)
         self.creditTableWidget.horizontalHeader().setDefaultSectionSize(150)
         self.creditTableWidget.horizontalHeader().setMinimumSectionSize(31)
@@ -2381,39 +2321,7 @@ class Ui_MainWindow(object):
         self.employesTableWidget.setAlternatingRowColors(False)
         self.employesTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.employesTableWidget.setGridStyle(QtCore.Qt.DashLine)
-        self.employesTableWidget.setColumnCount(6)
         self.employesTableWidget.setObjectName("employesTableWidget")
-        self.employesTableWidget.setRowCount(4)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setVerticalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setVerticalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setVerticalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setVerticalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(4, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setHorizontalHeaderItem(5, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setItem(0, 0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setItem(0, 1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setItem(0, 2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setItem(0, 3, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.employesTableWidget.setItem(0, 4, item)
         self.employesTableWidget.horizontalHeader().setVisible(True)
         self.employesTableWidget.horizontalHeader().setCascadingSectionResizes(False)
         self.employesTableWidget.horizontalHeader().setDefaultSectionSize(150)
@@ -2667,9 +2575,7 @@ class Ui_MainWindow(object):
         self.accompteTableWidget.setAlternatingRowColors(False)
         self.accompteTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.accompteTableWidget.setGridStyle(QtCore.Qt.DashLine)
-        self.accompteTableWidget.setColumnCount(0)
         self.accompteTableWidget.setObjectName("accompteTableWidget")
-        self.accompteTableWidget.setRowCount(0)
         self.accompteTableWidget.horizontalHeader().setVisible(True)
         self.accompteTableWidget.horizontalHeader().setCascadingSectionResizes(False)
         self.accompteTableWidget.horizontalHeader().setDefaultSectionSize(150)
@@ -2826,17 +2732,7 @@ class Ui_MainWindow(object):
         self.chargeTableWidget.setAlternatingRowColors(False)
         self.chargeTableWidget.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectRows)
         self.chargeTableWidget.setGridStyle(QtCore.Qt.DashLine)
-        self.chargeTableWidget.setColumnCount(4)
         self.chargeTableWidget.setObjectName("chargeTableWidget")
-        self.chargeTableWidget.setRowCount(0)
-        item = QtWidgets.QTableWidgetItem()
-        self.chargeTableWidget.setHorizontalHeaderItem(0, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.chargeTableWidget.setHorizontalHeaderItem(1, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.chargeTableWidget.setHorizontalHeaderItem(2, item)
-        item = QtWidgets.QTableWidgetItem()
-        self.chargeTableWidget.setHorizontalHeaderItem(3, item)
         self.chargeTableWidget.horizontalHeader().setVisible(True)
         self.chargeTableWidget.horizontalHeader().setCascadingSectionResizes(False)
         self.chargeTableWidget.horizontalHeader().setDefaultSectionSize(150)
@@ -2986,25 +2882,6 @@ class Ui_MainWindow(object):
         self.buttonDeleteVersement.setToolTip(_translate("MainWindow", "Supprimer le versement sélectionné."))
         self.labelVersementCount.setText(_translate("MainWindow", "Total 50"))
         self.versementTableWidget.setSortingEnabled(True)
-        item = self.versementTableWidget.verticalHeaderItem(0)
-        item.setText(_translate("MainWindow", "1"))
-        item = self.versementTableWidget.verticalHeaderItem(1)
-        item.setText(_translate("MainWindow", "2"))
-        item = self.versementTableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "ID"))
-        item = self.versementTableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Date"))
-        item = self.versementTableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Versement"))
-        item = self.versementTableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Obs"))
-        __sortingEnabled = self.versementTableWidget.isSortingEnabled()
-        self.versementTableWidget.setSortingEnabled(False)
-        item = self.versementTableWidget.item(0, 1)
-        item.setText(_translate("MainWindow", "Item"))
-        item = self.versementTableWidget.item(1, 1)
-        item.setText(_translate("MainWindow", "item_2"))
-        self.versementTableWidget.setSortingEnabled(__sortingEnabled)
         self.label_13.setText(_translate("MainWindow", "Date"))
         self.editEmployeOperationMontant.setSpecialValueText(_translate("MainWindow", "0.00"))
         self.label_4.setText(_translate("MainWindow", "Montant"))
@@ -3065,26 +2942,6 @@ class Ui_MainWindow(object):
         self.labelClientsCount.setText(_translate("MainWindow", "TextLabel"))
         self.labelTotalCreditClients.setText(_translate("MainWindow", "labelTotalCredit ByClientType"))
         self.clientsTableWidget.setSortingEnabled(True)
-        item = self.clientsTableWidget.verticalHeaderItem(0)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.clientsTableWidget.verticalHeaderItem(1)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.clientsTableWidget.verticalHeaderItem(2)
-        item.setText(_translate("MainWindow", "qsdfq"))
-        item = self.clientsTableWidget.verticalHeaderItem(3)
-        item.setText(_translate("MainWindow", "qsdfqsdf"))
-        item = self.clientsTableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "Id"))
-        item = self.clientsTableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "New Column"))
-        item = self.clientsTableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "dd"))
-        item = self.clientsTableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "dd"))
-        item = self.clientsTableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "dd"))
-        item = self.clientsTableWidget.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "dd"))
         self.editSearchCredit.setPlaceholderText(_translate("MainWindow", "Recherche"))
         self.buttonRefreshCreditTable.setToolTip(_translate("MainWindow", "Refresh"))
         self.label_12.setText(_translate("MainWindow", "Status"))
@@ -3105,27 +2962,6 @@ class Ui_MainWindow(object):
         self.labelCreditCount.setText(_translate("MainWindow", "Label Total"))
         self.labelTotalCredits.setText(_translate("MainWindow", "Total Credit 5000"))
         self.creditTableWidget.setSortingEnabled(True)
-        item = self.creditTableWidget.verticalHeaderItem(0)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.creditTableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "ID"))
-        item = self.creditTableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Nom"))
-        item = self.creditTableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Address"))
-        item = self.creditTableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Phone"))
-        __sortingEnabled = self.creditTableWidget.isSortingEnabled()
-        self.creditTableWidget.setSortingEnabled(False)
-        item = self.creditTableWidget.item(0, 0)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.creditTableWidget.item(0, 1)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.creditTableWidget.item(0, 2)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.creditTableWidget.item(0, 3)
-        item.setText(_translate("MainWindow", "qdsf"))
-        self.creditTableWidget.setSortingEnabled(__sortingEnabled)
         self.editSearchEmploye.setPlaceholderText(_translate("MainWindow", "Recherche...."))
         self.buttonRefreshEmpolyeTable.setToolTip(_translate("MainWindow", "Refresh Table"))
         self.groupBoxToolBar_2.setTitle(_translate("MainWindow", "Opération"))
@@ -3142,39 +2978,6 @@ class Ui_MainWindow(object):
         self.buttonDeleteEmploye.setToolTip(_translate("MainWindow", "Suprimer"))
         self.labelEmployesCount.setText(_translate("MainWindow", "TextLabel"))
         self.employesTableWidget.setSortingEnabled(True)
-        item = self.employesTableWidget.verticalHeaderItem(0)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.employesTableWidget.verticalHeaderItem(1)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.employesTableWidget.verticalHeaderItem(2)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.employesTableWidget.verticalHeaderItem(3)
-        item.setText(_translate("MainWindow", "New Row"))
-        item = self.employesTableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "ID"))
-        item = self.employesTableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "Date"))
-        item = self.employesTableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "Operation"))
-        item = self.employesTableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "Employe"))
-        item = self.employesTableWidget.horizontalHeaderItem(4)
-        item.setText(_translate("MainWindow", "Montant"))
-        item = self.employesTableWidget.horizontalHeaderItem(5)
-        item.setText(_translate("MainWindow", "Motif"))
-        __sortingEnabled = self.employesTableWidget.isSortingEnabled()
-        self.employesTableWidget.setSortingEnabled(False)
-        item = self.employesTableWidget.item(0, 0)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.employesTableWidget.item(0, 1)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.employesTableWidget.item(0, 2)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.employesTableWidget.item(0, 3)
-        item.setText(_translate("MainWindow", "qsdf"))
-        item = self.employesTableWidget.item(0, 4)
-        item.setText(_translate("MainWindow", "qsdf"))
-        self.employesTableWidget.setSortingEnabled(__sortingEnabled)
         self.labelSumPrime.setText(_translate("MainWindow", "12000"))
         self.labelTitleSumPrime.setText(_translate("MainWindow", "Total des Prime"))
         self.labelSumAvance.setText(_translate("MainWindow", "5000"))
@@ -3232,13 +3035,5 @@ class Ui_MainWindow(object):
         self.labelChargeCount.setText(_translate("MainWindow", "TextLabel"))
         self.labelTotalCharge.setText(_translate("MainWindow", "Total Charges"))
         self.chargeTableWidget.setSortingEnabled(True)
-        item = self.chargeTableWidget.horizontalHeaderItem(0)
-        item.setText(_translate("MainWindow", "New Column"))
-        item = self.chargeTableWidget.horizontalHeaderItem(1)
-        item.setText(_translate("MainWindow", "New Column"))
-        item = self.chargeTableWidget.horizontalHeaderItem(2)
-        item.setText(_translate("MainWindow", "New Column"))
-        item = self.chargeTableWidget.horizontalHeaderItem(3)
-        item.setText(_translate("MainWindow", "New Column"))
 from tableEditingFinished import MyTable
 import resources_rc
@@ -2,16 +2,20 @@
 # -*- coding: utf-8 -*-
 #
 
+import os
 import sys
 from datetime import datetime
 from PyQt5 import QtWidgets, QtCore, QtGui
 from PyQt5.QtPrintSupport import QPrinter, QPrintDialog
 import qtawesome as qta
 
+import payroll
 import utils
 from db_handler import Database
+from diagnostics import DiagnosticsDialog
 from gui.h_credit import Ui_MainWindow
 from logger import logger
+from workers import TaskRunner
 
 
 class Credit(QtWidgets.QMainWindow):
@@ -32,9 +36,16 @@ class Credit(QtWidgets.QMainWindow):
         self.db = Database()
         logger.info("Connected to Database.")
         logger.info(f"Creating tables if not exists: {self.db._create_tables()}")
+        # Database calls of listings, searches, exports run in the background
+        self.tasks = TaskRunner(self)
+        # Totals shown under the credits / clients tables: page -> (total, client_id)
+        self.displayed_totals = {}
+        # Listing shown in the credits table: (Database method, args, client_id), see reload_credit_view
+        self.credit_view = None
         
         self.server_thread: utils.ServerThread | None = None   # type hint for clarity
         self.server_running = False
+        self.diagnostics: DiagnosticsDialog | None = None
 
         # Setup current date values
         self.CURRENT_DATE = datetime.now()
@@ -161,6 +172,11 @@ class Credit(QtWidgets.QMainWindow):
                 self.clickPosition = e.globalPos()
                 e.accept()
 
+    def closeEvent(self, event):
+        """Let the background tasks finish before the database is released."""
+        self.tasks.wait()
+        super().closeEvent(event)
+
     def toggle_maximize_restore(self):
         icon = QtGui.QIcon()
         if self.isMaximized():
@@ -391,6 +407,20 @@ class Credit(QtWidgets.QMainWindow):
             item_id = utils.get_column_value(tableWidget, row, 0)
             return item_id
 
+    def run_task(self, key, fn, *args, on_result=None, on_progress=None, **kwargs):
+        """
+        Run ``fn(*args, **kwargs)`` in the background (see workers.TaskRunner).
+        A new task with the same key replaces the pending one, errors are shown in the messages frame.
+        :param key: what the task displays ('credits', 'clients', ...)
+        :param on_result: called on the GUI thread with the returned value
+        :param on_progress: called on the GUI thread with (done, total) reported by fn
+        """
+        return self.tasks.run(key, fn, *args, on_result=on_result, on_error=self.show_task_error,
+                              on_progress=on_progress, **kwargs)
+
+    def show_task_error(self, message):
+        self.show_error_message(f"Erreur: {message}", success=False)
+
     # ======================
     # == Server Controls ===
     # =======================
@@ -417,6 +447,14 @@ class Credit(QtWidgets.QMainWindow):
                 self.ui.labelServerIsOn.setText("⛔ Server stopping...")
             self.server_running = False
 
+    def show_diagnostics(self):
+        """Open the diagnostics window (query timings, slow queries, cache and pool), or bring it to front."""
+        if self.diagnostics is None:
+            self.diagnostics = DiagnosticsDialog(self.db, self)
+        self.diagnostics.show()
+        self.diagnostics.raise_()
+        self.diagnostics.activateWindow()
+
     def close_label_server(self, close=True):
         """
         Animate the height of the QTextBrowser.
@@ -442,7 +480,10 @@ class Credit(QtWidgets.QMainWindow):
         """
         Display all personnes in the table widget.
         """
-        if rows is None: rows = self.db.dump_employes()
+        if rows is None:
+            self.run_task('employes', self.db.dump_employes, on_result=self.display_employes)
+            return
+        self.tasks.cancel('employes')      # a pending listing must not replace these rows
         utils.populate_table_widget(self.ui.employesTableWidget, rows, utils.EMPLOYES_HEADERS)
         utils.set_table_column_sizes(self.ui.employesTableWidget, 80, 300, 120, 250, 190, 200)
         self.ui.labelEmployesCount.setText(f"Total: {len(rows)}")
@@ -543,9 +584,7 @@ class Credit(QtWidgets.QMainWindow):
         """
         search_word = self.ui.editSearchEmploye.text()
         if not search_word: return  # or show a message to the user that the search input is empty
-        else: search_word = f"%{search_word}%"
-        rows = self.db.search_employe(search_word)
-        self.display_employes(rows)
+        self.run_task('employes', self.db.search_employe, search_word, on_result=self.display_employes)
 
     def edit_employe(self, row, col, text):
         """
@@ -804,25 +843,27 @@ class Credit(QtWidgets.QMainWindow):
             month = self.ui.cbBoxSalaireEmpMonth.currentText()
 
         date = f"{self.CURRENT_YEAR}-{month}"  # Get month from comboBox
+
+        def show_salaire(result):
+            if result:
+                # Display result
+                self.ui.labelSalaireEmpName.setText(employe.upper())
+                self.ui.labelSalaireEmpSalaire.setText(utils.format_money(result['salaire_base']))
+                self.ui.labelSalaireEmpPrime.setText(utils.format_money(result['total_prime']))
+                self.ui.labelSalaireEmpAvance.setText(utils.format_money(result['total_avance']))
+                self.ui.labelSalaireEmpRetenu.setText(utils.format_money(result['total_retenue']))
+                self.ui.labelSalaireEmpTotal.setText(utils.format_money(result['salaire_final']))
+                self.setup_extraCenter_ui('Salaire', self.ui.salairePage)
+                # html = self.generate_payslip_html(employe.upper(), date,
+                #                                 # result['salaire_base'], result['total_prime'],
+                #                                 # result['total_retenue'], result['total_avance'],
+                #                                 # result['salaire_final'])
+                # self.ui.textBrowserSalary.setHtml(html)
+            else:
+                self.show_error_message(f"Aucun salaire trouvé pour l'employé {employe} en {month}.", success=False)
+
         # Get db result
-        result = self.db.calculate_salaire_mensuel(date, employe_id)
-
-        if result:
-            # Display result
-            self.ui.labelSalaireEmpName.setText(employe.upper())
-            self.ui.labelSalaireEmpSalaire.setText(utils.format_money(result['salaire_base']))
-            self.ui.labelSalaireEmpPrime.setText(utils.format_money(result['total_prime']))
-            self.ui.labelSalaireEmpAvance.setText(utils.format_money(result['total_avance']))
-            self.ui.labelSalaireEmpRetenu.setText(utils.format_money(result['total_retenue']))
-            self.ui.labelSalaireEmpTotal.setText(utils.format_money(result['salaire_final']))
-            self.setup_extraCenter_ui('Salaire', self.ui.salairePage)
-            # html = self.generate_payslip_html(employe.upper(), date,
-            #                                 # result['salaire_base'], result['total_prime'],
-            #                                 # result['total_retenue'], result['total_avance'],
-            #                                 # result['salaire_final'])
-            # self.ui.textBrowserSalary.setHtml(html)
-        else:
-            self.show_error_message(f"Aucun salaire trouvé pour l'employé {employe} en {month}.", success=False)
+        self.run_task('salaire', self.db.calculate_salaire_mensuel, date, employe_id, on_result=show_salaire)
 
     def edit_accompte(self, row, col, text):
         """
@@ -889,6 +930,35 @@ class Credit(QtWidgets.QMainWindow):
         self.accompte_by_employee(emp_id, month=month)
 
     # =========================================
+    def print_all_payslips(self):
+        """
+        PDF payslips of every employe for the month selected in the salary page, and their zip archive
+        (see payroll.run_payroll). Rendered in worker processes, the window stays responsive.
+        """
+        month = f"{self.CURRENT_YEAR}-{self.ui.cbBoxSalaireEmpMonth.currentText()}"
+        logger.info(f"Payroll of {month}...")
+
+        progress = QtWidgets.QProgressDialog(f"Fiches de paie de {month}...", None, 0, 0, self)
+        progress.setWindowTitle("Fiches de paie")
+        progress.setMinimumDuration(0)
+        progress.show()
+
+        def show_progress(done, total):
+            progress.setMaximum(total)
+            progress.setValue(done)
+
+        def show_result(result):
+            progress.close()
+            if result['success']:
+                self.show_error_message(f"{result['count']} fiches de paie: {os.path.abspath(result['archive'])}",
+                                        success=True)
+            else:
+                self.show_error_message(result['error'], success=False)
+
+        task = self.run_task('payroll', payroll.run_payroll, self.db, month,
+                             on_result=show_result, on_progress=show_progress)
+        task.signals.finished.connect(progress.close)      # errors too
+
     # NOTE:  Not implemented yet
     def generate_payslip_html(self, nom, mois, base, prime, retenue, avance, net):
         return f"""
@@ -963,7 +1033,9 @@ class Credit(QtWidgets.QMainWindow):
         Display all personnes in the table widget.
         """
         if rows is None:
-            rows = self.db.dump_clients()
+            self.run_task('clients', self.db.dump_clients, on_result=self.display_clients)
+            return
+        self.tasks.cancel('clients')       # a pending listing must not replace these rows
         utils.populate_table_widget(self.ui.clientsTableWidget, rows, utils.CLIENTS_HEADERS)
         utils.set_table_column_sizes(self.ui.clientsTableWidget, 80, 320, 270, 200, 300)
         self.ui.labelClientsCount.setText(f"Total: {len(rows)}")
@@ -981,6 +1053,7 @@ class Credit(QtWidgets.QMainWindow):
             return
 
         # Display credits
+        self.credit_view = (self.db.get_client_credits, (client_id,), client_id)
         self.display_credits(rows, client_id=client_id)
         client = utils.get_column_value(self.ui.clientsTableWidget, self.ui.clientsTableWidget.currentRow(), 1)
         self.goto_page('credit', title=f"Crédits ({client})", from_btn=False)
@@ -997,9 +1070,7 @@ class Credit(QtWidgets.QMainWindow):
         """
         search_word = self.ui.editSearchClients.text()
         if not search_word: return  # or show a message to the user that the search input is empty
-        else: search_word = f"%{search_word}%"
-        rows = self.db.search_clients(search_word)
-        self.display_clients(rows)
+        self.run_task('clients', self.db.search_clients, search_word, on_result=self.display_clients)
 
     def edit_client(self, row, col, text):
         client_id = self.get_item_id(self.ui.clientsTableWidget)
@@ -1007,7 +1078,10 @@ class Credit(QtWidgets.QMainWindow):
         result = self.db.update_client(client_id, col, text)
         if result['success']:
             self.show_error_message(result['message'], success=True)
-            self.display_clients()
+            if col == 1:
+                self.display_clients()      # the clients are ordered by name
+            else:
+                self.ui.clientsTableWidget.update_row(result['row'])
         else:
             self.show_error_message(f"Erreur: {result['error']}", success=False)
             if col == 2:
@@ -1043,47 +1117,107 @@ class Credit(QtWidgets.QMainWindow):
     def set_total_credits(self, rows: list, page: str, client_id=None) -> None:
         try:
             if not rows:
+                self.displayed_totals[page] = (0, client_id)
                 self.ui.labelTotalCredits.setText("Total Crédits: 0 DA")
                 self.ui.labelTotalCreditClients.setText("Total Crédits: 0 DA")
                 return
 
             if page == "credits":
                 total_credit = sum(r[6] for r in rows if len(r) > 6 and r[0] is not None)
-                credit_str = f"Total Crédits: {utils.format_money(total_credit)} DA"
-
-                if client_id is not None:
-                    logger.debug(f"Calculating total credits for client ID: {client_id}")
-                    client = self.db.get_item('clients', 'nom', client_id)
-                    client_name = client.upper() if client else str(client_id)
-                    credit_str = f"Total Crédits {client_name}: {utils.format_money(total_credit)} DA"
-
             elif page == "clients":
                 total_credit = sum(r[2] for r in rows if len(r) > 2 and r[0] is not None)
-                credit_str = f"Total Crédits: {utils.format_money(total_credit)} DA"
-                print(client_id)
-
             else:
-                credit_str = "Total Crédits: 0 DA"
-
-            # update only the relevant label
-            if page == "credits":
-                self.ui.labelTotalCredits.setText(credit_str)
-            elif page == "clients":
-                self.ui.labelTotalCreditClients.setText(credit_str)
+                total_credit = 0
+            self.show_total_credits(total_credit, page, client_id)
 
         except Exception as e:
             logger.error(f"Error calculating total credits: {e}")
             self.ui.labelTotalCredits.setText("Erreur de calcul")
             self.ui.labelTotalCreditClients.setText("Erreur de calcul")
 
+    def show_total_credits(self, total_credit, page: str, client_id=None) -> None:
+        """
+        Display the total of the credits (reste) or clients (en cours) table in its label.
+        The total is kept to be patched when a single row changes (see patch_total_credits).
+        """
+        self.displayed_totals[page] = (total_credit, client_id)
+        credit_str = f"Total Crédits: {utils.format_money(total_credit)} DA"
+
+        if page == "credits" and client_id is not None:
+            logger.debug(f"Calculating total credits for client ID: {client_id}")
+            client = self.db.get_item('clients', 'nom', client_id)
+            client_name = client.upper() if client else str(client_id)
+            credit_str = f"Total Crédits {client_name}: {utils.format_money(total_credit)} DA"
+
+        # update only the relevant label
+        if page == "credits":
+            self.ui.labelTotalCredits.setText(credit_str)
+        elif page == "clients":
+            self.ui.labelTotalCreditClients.setText(credit_str)
+
+    def patch_total_credits(self, page: str, old_row=None, new_row=None) -> None:
+        """
+        Update the total label of a table after one row was replaced, added (old_row None) or removed (new_row None),
+        without summing the whole table again.
+        """
+        table, column = {
+            'credits': (self.ui.creditTableWidget, 6),
+            'clients': (self.ui.clientsTableWidget, 2),
+        }[page]
+        total_credit, client_id = self.displayed_totals.get(page, (0, None))
+        try:
+            if old_row is not None:
+                total_credit -= old_row[column]
+            if new_row is not None:
+                total_credit += new_row[column]
+        except TypeError:
+            # The old row holds a text typed in the table: sum again
+            self.set_total_credits(table.rows(), page, client_id)
+            return
+        self.show_total_credits(total_credit, page, client_id)
+
+    def patch_credit_rows(self, result: dict) -> None:
+        """
+        Patch the credit and client rows returned by a Database write (see Database._credit_row)
+        in the displayed tables, with their totals, instead of reloading the tables.
+        'client_rows' (delete_credit) patches several clients.
+        Falls back to reloading the current listing (see reload_credit_view) when the credit is not displayed.
+        """
+        row = result.get('row')
+        if row is not None:
+            table = self.ui.creditTableWidget
+            status = self.ui.cbBoxCreditByStatus.currentText().strip().lower()
+            if status != 'tous' and row[7] != status:
+                # Filtered by status and the credit changed status: it leaves the list
+                removed = table.remove_rows([row[0]])
+                if removed:
+                    self.patch_total_credits('credits', old_row=removed[0])
+            else:
+                previous = table.update_row(row)
+                if previous is None:
+                    self.reload_credit_view()
+                else:
+                    self.patch_total_credits('credits', old_row=previous, new_row=row)
+
+        client_rows = result.get('client_rows') or [result.get('client_row')]
+        for client_row in client_rows:
+            if client_row is None:
+                continue
+            previous = self.ui.clientsTableWidget.update_row(client_row)
+            if previous is not None:
+                self.patch_total_credits('clients', old_row=previous, new_row=client_row)
+
     def display_credits(self, rows=None, client_id=None):
         """
         Display all credits in the table widget.
         :client_id: If provided, it indicates that the credits are being displayed for a specific client.
         """
         if rows is None:
-            rows = self.db.dump_credits()
+            self.credit_view = (self.db.dump_credits, (), None)
+            self.run_task('credits', self.db.dump_credits, on_result=self.display_credits)
             # self.ui.cbBoxCreditByStatus.setCurrentIndex(0)      # 'Tous'
+            return
+        self.tasks.cancel('credits')       # a pending listing must not replace these rows
 
         # Display Result in QTableWidget
         utils.populate_table_widget(self.ui.creditTableWidget, rows, utils.CREDITS_HEADERS)
@@ -1095,6 +1229,18 @@ class Credit(QtWidgets.QMainWindow):
         # Calculate the total
         self.set_total_credits(rows, page="credits", client_id=client_id)
 
+    def reload_credit_view(self):
+        """
+        Run the listing shown in the credits table again (all credits, a client's credits, a search
+        or a status filter), instead of replacing a filtered view with every credit.
+        """
+        if self.credit_view is None:
+            self.display_credits()
+            return
+        method, args, client_id = self.credit_view
+        self.run_task('credits', method, *args,
+                      on_result=lambda rows: self.display_credits(rows, client_id=client_id))
+
     def refresh_credit_table(self):
         logger.info('Refreshing credit table...')
         self.display_credits()
@@ -1107,10 +1253,9 @@ class Credit(QtWidgets.QMainWindow):
         statut = self.ui.cbBoxCreditByStatus.currentText().strip().lower()
 
         if not search_word: return  # or show a message to the user that the search input is empty
-        else: search_word = f"%{search_word}%"
 
-        rows = self.db.search_credits(search_word, statut)
-        self.display_credits(rows)
+        self.credit_view = (self.db.search_credits, (search_word, statut), None)
+        self.run_task('credits', self.db.search_credits, search_word, statut, on_result=self.display_credits)
 
     def filter_credit_by_status(self):
         """
@@ -1120,14 +1265,17 @@ class Credit(QtWidgets.QMainWindow):
         if status == 'tous':
             self.display_credits()
             return
-        else:
-            rows = self.db.credit_by_status(status)
+
+        def show_rows(rows):
             if not rows:
                 self.show_error_message(f"Aucun crédit trouvé pour le statut '{status}'.", success=False)
                 return
-            logger.debug(f'Filter Credit By Status: {rows}')
+            logger.debug(f'Filter Credit By Status: {len(rows)} rows')
             self.display_credits(rows)
 
+        self.credit_view = (self.db.credit_by_status, (status,), None)
+        self.run_task('credits', self.db.credit_by_status, status, on_result=show_rows)
+
     def ui_create_credit(self, client=False):
         """
         This function set up the UI for creating a new credit.
@@ -1199,19 +1347,19 @@ class Credit(QtWidgets.QMainWindow):
 
         if col in (0, 2, 5, 6, 7):
             # Prevent editing those columns(id, client, versement, reste, status)
-            self.display_credits()
+            self.reload_credit_view()
         elif col == 1:
             # Validate the date
             if not utils.is_date(text):
                 self.show_error_message("La date n'est pas valide. Utilisez le format Année-Mois-Jour.", success=False)
-                self.display_credits()
+                self.reload_credit_view()
                 return
         elif col == 4:
             # handle montant converstion to decimal
             text = utils.format_to_decimal(text)
             if not text['success']:
                 self.show_error_message(f"Erreur: {text['error']}", success=False)
-                self.display_credits()      # refresh tablhu
+                self.reload_credit_view()      # refresh tablhu
                 return
             else:
                 text = text['value']
@@ -1219,7 +1367,7 @@ class Credit(QtWidgets.QMainWindow):
         result = self.db.update_credit(credit_id, col, text, versment['value'])
         if result['success']:
             self.show_error_message(result['message'], success=True)
-            self.display_credits()
+            self.patch_credit_rows(result)
         else:
             self.show_error_message(f"Erreur: {result['error']}", success=False)
 
@@ -1240,10 +1388,12 @@ class Credit(QtWidgets.QMainWindow):
 
         dialog = utils.ConfirmDialog(title)
         if dialog.exec_() == QtWidgets.QDialog.Accepted:
-            result = self.db.delete_item('credit', ids)
+            result = self.db.delete_credit(ids)
             if result['success']:
                 self.show_error_message("Crédit supprimé avec succès.", success=True)
-                self.display_credits()
+                for removed in self.ui.creditTableWidget.remove_rows(ids):
+                    self.patch_total_credits('credits', old_row=removed)
+                self.patch_credit_rows(result)      # client_rows: balances of the clients
                 # self.goto_page('credit', title='Crédits')
             else:
                 self.show_error_message(f"{result['error']}", success=False)
@@ -1258,9 +1408,14 @@ class Credit(QtWidgets.QMainWindow):
             file_name = "credit_client_generale"
             title = "Crédits Générale"
 
-        result = utils.export_tablewidget_to_excel(table, file_name=file_name, title=title)
-        self.show_error_message(f"{result}.", success=True)
+        # Read the table on the GUI thread, write the workbook in the background
+        headers, rows = utils.table_contents(table)
         logger.debug("Exporting credits to Excel...")
+        self.run_task(
+            f"export_{page}", utils.export_rows_to_excel, headers, rows,
+            file_name=file_name, title=title,
+            on_result=lambda result: self.show_error_message(f"{result}.", success=True)
+        )
 
     # =================================================================================
     # == Payments(Versement) Functions ==
@@ -1332,7 +1487,7 @@ class Credit(QtWidgets.QMainWindow):
                 f"Erreur: {reste_decimal['error']}", success=False
             )
             return
-        self.ui.editVersementMontant.setMaximum(reste_decimal['value'])
+        self.ui.editVersementMontant.setMaximum(float(reste_decimal['value']))
 
         # Finalize UI
         self.setup_extraCenter_ui(
@@ -1380,7 +1535,8 @@ class Credit(QtWidgets.QMainWindow):
         if result['success']:
             self.show_error_message("Versement ajouté avec succès.", success=True)
             self.toggle_left_box(close=True)
-            self.goto_page('credit', title='Crédits')
+            self.patch_credit_rows(result)
+            self.goto_page('credit', title='Crédits', from_btn=False)
             # clear inputs
             inputs_to_clear = [
                 self.ui.labelVersementCreditID,
@@ -1428,7 +1584,8 @@ class Credit(QtWidgets.QMainWindow):
 
         if result['success']:
             self.show_error_message(result["message"], success=True)
-            self.goto_page('credit', title='Crédits')
+            self.patch_credit_rows(result)
+            self.goto_page('credit', title='Crédits', from_btn=False)
         else:
             self.show_error_message(f"{result['error']}", success=False)
 
@@ -1447,7 +1604,9 @@ class Credit(QtWidgets.QMainWindow):
             result = self.db.delete_paiement(paiement_id)
             if result['success']:
                 self.show_error_message("Versement supprimé avec succès.", success=True)
-                self.goto_page('credit', title='Crédits')
+                self.ui.versementTableWidget.remove_rows([paiement_id])
+                self.patch_credit_rows(result)
+                self.goto_page('credit', title='Crédits', from_btn=False)
                 self.toggle_left_box(close=True)
             else:
                 self.show_error_message(f"{result['error']}", success=False)
@@ -1475,10 +1634,15 @@ class Credit(QtWidgets.QMainWindow):
         # Fetch rows depending on input
         if rows is None:
             month = self.CURRENT_MONTH
-            rows = self.db.dump_charges(month)
             self.ui.cbBoxChargeByMonth.setCurrentText(self.CURRENT_MONTH_TEXT)
             self.ui.editSearchCharge.clear()
+            self.run_task(
+                'charges', self.db.dump_charges, month,
+                on_result=lambda rows: self.display_charge(rows, month_text)
+            )
+            return
         else:
+            self.tasks.cancel('charges')   # a pending listing must not replace these rows
             month = (
                 self.CURRENT_MONTH
                 if month_text == "Mois"
@@ -1505,8 +1669,10 @@ class Credit(QtWidgets.QMainWindow):
         search_text = self.ui.editSearchCharge.text()
         month_text = self.ui.cbBoxChargeByMonth.currentText()
         month = self.CURRENT_MONTH if month_text == 'Mois' else f"{self.CURRENT_YEAR}-{month_text}"
-        rows = self.db.search_charge(search_text, month)
-        self.display_charge(rows, month_text)
+        self.run_task(
+            'charges', self.db.search_charge, search_text, month,
+            on_result=lambda rows: self.display_charge(rows, month_text)
+        )
 
     def ui_create_charge(self, edit=False):
         """
@@ -1541,7 +1707,7 @@ class Credit(QtWidgets.QMainWindow):
             date_obj = QtCore.QDate.fromString(charge.date_charge, 'yyyy-MM-dd')
             self.ui.dateEditChargeDate.setDate(date_obj)
             self.ui.cbBoxChargeBy.setCurrentText(charge.effectue_par)
-            self.ui.editChargeMontant.setValue(charge.montant)
+            self.ui.editChargeMontant.setValue(float(charge.montant))
             self.ui.editChargeMotif.setPlainText(charge.motif)
             title = "Modifier Charge"
             self.ui.extraIconPlus.setIcon(qta.icon('ph.pencil-line-light', color="#FF6600"))
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Metrics of the API server in the Prometheus text format (GET /metrics of api.py).
+#                 Requests are counted by an ASGI middleware, per route template and status;
+#                 the pool, cache and query profiler of the Database are read at scrape time.
+# ----------------------------------------------------------------------------
+
+
+import threading
+import time
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+PREFIX = "lifetipaza"
+
+# Seconds, the default buckets of the Prometheus clients
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def _number(value):
+    if value == float('inf'):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    """One metric family: name, help, type and its samples per label values."""
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return self.header() + [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                                for labels, value in values]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    """Cumulative buckets, _sum and _count, as expected by histogram_quantile()."""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, *labels, value):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]   # counts, sum, count
+            for position, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][position] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        with self._lock:
+            values = sorted((labels, (list(counts), total, count)) for labels, (counts, total, count)
+                            in self._values.items())
+        lines = self.header()
+        names = self.labelnames + ('le',)
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (_number(bound),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class ApiMetrics:
+    """
+    Request metrics of the API and the Database it serves.
+
+    - requests_total{method, route, status}
+    - request_duration_seconds{method, route}: histogram, until the last byte of the response
+    - requests_in_progress{method}
+    - db_* gauges and counters, read from the Database when render() is called
+    """
+    def __init__(self, prefix=PREFIX):
+        self.requests = Counter(f"{prefix}_http_requests_total", "Requêtes HTTP traitées.",
+                                ("method", "route", "status"))
+        self.duration = Histogram(f"{prefix}_http_request_duration_seconds", "Durée des requêtes HTTP.",
+                                  ("method", "route"))
+        self.in_progress = Gauge(f"{prefix}_http_requests_in_progress", "Requêtes HTTP en cours.", ("method",))
+        self.prefix = prefix
+
+    def observe(self, method, route, status, seconds):
+        self.requests.inc(method, route, str(status))
+        self.duration.observe(method, route, value=seconds)
+
+    def render(self, db=None):
+        """
+        The metrics in the text exposition format.
+        :param db: Database whose pool, query cache and profiler are exported
+        """
+        lines = self.requests.render() + self.duration.render() + self.in_progress.render()
+        if db is not None:
+            for metric in self._database_metrics(db):
+                lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+    def _database_metrics(self, db):
+        prefix = self.prefix
+        pool = db.pool.stats()
+        connections = Gauge(f"{prefix}_db_pool_connections", "Connexions SQLite du pool.", ("state",))
+        connections.set("in_use", value=pool['in_use'])
+        connections.set("idle", value=pool['idle'])
+        connections.set("stream", value=pool['detached'])     # NDJSON streams, outside the pool
+        max_connections = Gauge(f"{prefix}_db_pool_max_connections", "Taille maximale du pool.")
+        max_connections.set(value=pool['max_size'])
+        metrics = [connections, max_connections]
+
+        cache = db.cache_stats()
+        if cache is not None:
+            for key in ('hits', 'misses', 'evictions', 'invalidations'):
+                counter = Counter(f"{prefix}_db_cache_{key}_total", f"Cache des requêtes: {key}.")
+                counter.inc(amount=cache[key])
+                metrics.append(counter)
+            entries = Gauge(f"{prefix}_db_cache_entries", "Résultats gardés par le cache des requêtes.")
+            entries.set(value=cache['entries'])
+            lookups = cache['hits'] + cache['misses']
+            ratio = Gauge(f"{prefix}_db_cache_hit_ratio", "Part des lectures servies par le cache.")
+            ratio.set(value=round(cache['hits'] / lookups, 4) if lookups else 0.0)
+            metrics += [entries, ratio]
+
+        stats = db.query_stats()
+        if stats is not None:
+            calls = Counter(f"{prefix}_db_method_calls_total", "Appels des méthodes de Database.", ("method",))
+            seconds = Counter(f"{prefix}_db_method_seconds_total", "Temps passé dans les méthodes de Database.",
+                              ("method",))
+            queries = Counter(f"{prefix}_db_queries_total", "Requêtes SQL exécutées.", ("method",))
+            for method, entry in stats.items():
+                calls.inc(method, amount=entry['calls'])
+                seconds.inc(method, amount=entry['total_ms'] / 1000)
+                queries.inc(method, amount=entry['queries'])
+            metrics += [calls, seconds, queries]
+        return metrics
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request.
+    Requests are labelled with their route template (/credits/{credit_id}/versements, not the id),
+    unknown paths with "unmatched", so the number of series stays bounded.
+    """
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        metrics = self.metrics
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_progress.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            metrics.in_progress.dec(method)
+            route = getattr(scope.get("route"), "path", "unmatched")     # set by the router
+            metrics.observe(method, route, status, time.perf_counter() - start)
@@ -2,10 +2,13 @@
 # -*- coding: utf-8 -*-
 
 
+import argparse
 import sqlite3
 import shutil
 from datetime import datetime
 
+from logger import logger
+
 
 def backup_db(db_path: str) -> str:
     """Create a timestamped backup before migration."""
@@ -63,101 +66,699 @@ def migrate_table(db_path: str, table_name: str, new_schema_sql: str, copy_colum
         conn.close()
 
 
-if __name__ == "__main__":
-    # Example: migrate operations table
-    db_path = './lifeTipazaDB.db'
-
-    migrate_table(
-        db_path,
-        "operations",
-        """
-        CREATE TABLE operations_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employe_id INTEGER UNSIGNED NOT NULL,
-            operation VARCHAR(50) CHECK(operation IN ('prime', 'retenu', 'avance')) NOT NULL,
-            montant DECIMAL(10, 2),
-            motif TEXT,
-            date TEXT,
-            observation TEXT,
-            FOREIGN KEY(employe_id) REFERENCES employes(id) ON DELETE CASCADE
-        )
-        """,
-        ["id", "employe_id", "operation", "montant", "motif", "date", "observation"]
-    )
+# ==========================
+# == Versioned migrations ==
+# ==========================
+# Date columns, stored as ISO-8601 'YYYY-MM-DD' (see db_handler.to_iso_date)
+DATE_COLUMNS = [
+    ("credit", "date_credit"),
+    ("paiement", "date_versement"),
+    ("operations", "date"),
+    ("charges", "date_charge"),
+    ("employes", "date_embauche"),
+]
 
-    # --- Migrate salaires ---
-    migrate_table(
-        db_path,
-        "salaires",
-        """
-        CREATE TABLE salaires_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employe_id INTEGER UNSIGNED NOT NULL,
-            montant_base DECIMAL(10, 2),
-            FOREIGN KEY(employe_id) REFERENCES employes(id) ON DELETE CASCADE
+
+# Money columns, stored as integer centimes (see money.py)
+MONEY_COLUMNS = [
+    ("credit", ["montant", "reste"]),
+    ("paiement", ["montant"]),
+    ("operations", ["montant"]),
+    ("charges", ["montant"]),
+    ("salaires", ["montant_base"]),
+    ("salaire_logs", ["salaire_base", "total_prime", "total_retenue", "total_avance", "salaire_net"]),
+]
+
+
+def amounts_to_cents(conn):
+    """
+    Convert the DECIMAL amounts (stored as REAL, INTEGER or TEXT) to integer centimes.
+    """
+    for table, columns in MONEY_COLUMNS:
+        assignments = ", ".join(f"{col} = CAST(ROUND(CAST({col} AS REAL) * 100) AS INTEGER)" for col in columns)
+        conn.execute(f"UPDATE {table} SET {assignments}")
+
+
+ISO_DATE = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]'"
+
+
+def non_iso_dates(conn) -> list:
+    """
+    Stored dates that are not 'YYYY-MM-DD' (empty values excepted).
+
+    :return: [(table, column, rowid, value), ...]
+    """
+    rows = []
+    for table, column in DATE_COLUMNS:
+        cursor = conn.execute(
+            f"SELECT rowid, {column} FROM {table} WHERE IFNULL({column}, '') != '' AND NOT {column} GLOB {ISO_DATE}"
         )
-        """,
-        ["id", "employe_id", "montant_base"]
-    )
+        rows += [(table, column, rowid, value) for rowid, value in cursor]
+    return rows
+
+
+def normalize_dates(conn):
+    """
+    Rewrite every stored date to 'YYYY-MM-DD':
+        - 'dd-mm-yyyy' and 'dd/mm/yyyy' (regle_credit, API clients), in SQL
+        - 'YYYY-MM-DD HH:MM:SS' (datetime values), in SQL
+        - the rest ('4-9-2025', '2025/09/04', ...) through db_handler.to_iso_date, like new writes
+    The values that are still not ISO (not a date) are logged: the month range queries skip them.
+    """
+    from db_handler import to_iso_date       # db_handler imports this module
+
+    day_first = "'[0-9][0-9][-/][0-9][0-9][-/][0-9][0-9][0-9][0-9]'"
+    with_time = "'[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]?*'"
+    for table, column in DATE_COLUMNS:
+        conn.execute(f"""
+            UPDATE {table}
+            SET {column} = substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2)
+            WHERE {column} GLOB {day_first}
+        """)
+        conn.execute(f"UPDATE {table} SET {column} = substr({column}, 1, 10) WHERE {column} GLOB {with_time}")
+
+    for table, column, rowid, value in non_iso_dates(conn):
+        try:
+            iso = to_iso_date(str(value))
+        except ValueError:
+            continue
+        conn.execute(f"UPDATE {table} SET {column} = ? WHERE rowid = ?", (iso, rowid))
+
+    for table, column, rowid, value in non_iso_dates(conn):
+        logger.warning(f"Date non ISO laissée telle quelle: {table}.{column} (rowid {rowid}) = {value!r}")
+
+
+# Versement totals of each credit, kept in credit by the paiement triggers (migration 5)
+CREDIT_TOTALS = """
+    SELECT credit_id, SUM(montant) AS total, COUNT(*) AS nb, MAX(date_versement) AS last
+    FROM paiement GROUP BY credit_id
+"""
+
+
+def check_credit_totals(conn, repair=False) -> list:
+    """
+    Compare credit.total_verse / nb_versements / last_versement_date with the paiement table.
+
+    :param conn: open sqlite3 connection
+    :param repair: rewrite the drifted credits with the recomputed values
+    :return: list of (credit_id, (stored values), (recomputed values))
+    """
+    rows = conn.execute(f"""
+        SELECT cr.id, cr.total_verse, cr.nb_versements, cr.last_versement_date,
+               IFNULL(p.total, 0), IFNULL(p.nb, 0), p.last
+        FROM credit cr
+        LEFT JOIN ({CREDIT_TOTALS}) p ON p.credit_id = cr.id
+        WHERE cr.total_verse IS NOT IFNULL(p.total, 0)
+           OR cr.nb_versements IS NOT IFNULL(p.nb, 0)
+           OR cr.last_versement_date IS NOT p.last
+    """).fetchall()
+    drift = [(row[0], tuple(row[1:4]), tuple(row[4:7])) for row in rows]
 
-    # -- Migrate salaire logs --
-    migrate_table(
-        db_path,
-        "salaire_logs",
-        """
-        CREATE TABLE salaire_logs_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            employe_id INTEGER NOT NULL,
-            mois TEXT NOT NULL,  -- format: '2025-07'
-            salaire_base DECIMAL(10, 2),
-            total_prime DECIMAL(10, 2),
-            total_retenue DECIMAL(10, 2),
-            total_avance DECIMAL(10, 2),
-            salaire_net DECIMAL(10, 2),
-            date_calcul TEXT NOT NULL,
-            FOREIGN KEY(employe_id) REFERENCES employes(id) ON DELETE CASCADE
+    if repair and drift:
+        conn.executemany(
+            "UPDATE credit SET total_verse = ?, nb_versements = ?, last_versement_date = ? WHERE id = ?",
+            [(*actual, credit_id) for credit_id, _, actual in drift]
         )
-        """,
-        [
-            "id", "employe_id", "mois",
-            "salaire_base", "total_prime", "total_retenue", "total_avance", "salaire_net", "date_calcul"
-        ]
-    )
+    return drift
+
+
+def add_credit_totals(conn):
+    """Add the materialized versement columns to credit and fill them from paiement."""
+    conn.execute("ALTER TABLE credit ADD COLUMN total_verse INTEGER NOT NULL DEFAULT 0")    # centimes
+    conn.execute("ALTER TABLE credit ADD COLUMN nb_versements INTEGER NOT NULL DEFAULT 0")
+    conn.execute("ALTER TABLE credit ADD COLUMN last_versement_date TEXT")
+    check_credit_totals(conn, repair=True)
+
+
+# Outstanding balance of each client, recomputed from its credits (index idx_credit_client)
+CLIENT_BALANCE = """
+    SELECT IFNULL(SUM(CASE WHEN statut = 'en cours' THEN reste ELSE 0 END), 0),
+           IFNULL(SUM(statut = 'en cours'), 0),
+           MAX(MAX(date_credit), IFNULL(MAX(last_versement_date), ''))
+    FROM credit WHERE client_id = {client_id}
+"""
+
 
-    # --- Migrate credit ---
-    migrate_table(
-        db_path,
-        "credit",
-        """
-        CREATE TABLE credit_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date_credit TEXT NOT NULL,
-            client_id INTEGER UNSIGNED NOT NULL,
-            montant DECIMAL(10, 2),
-            motif TEXT,
-            reste DECIMAL(10, 2) NOT NULL,
-            statut VARCHAR(50) CHECK(statut IN ('en cours', 'terminé')) DEFAULT 'en cours',
+def check_client_balances(conn, repair=False) -> list:
+    """
+    Compare client_balance and the credit_totals row with the credit table.
+
+    :param conn: open sqlite3 connection
+    :param repair: rewrite the drifted rows with the recomputed values
+    :return: list of (client_id, (stored values), (recomputed values)), client_id is None for the global total
+    """
+    rows = conn.execute("""
+        SELECT c.id, b.total_en_cours, b.nb_en_cours, b.last_activity
+        FROM clients c
+        LEFT JOIN client_balance b ON b.client_id = c.id
+    """).fetchall()
+    drift = []
+    for client_id, total, nb, last in rows:
+        actual = conn.execute(CLIENT_BALANCE.format(client_id='?'), (client_id,)).fetchone()
+        if (total, nb, last) != actual:
+            drift.append((client_id, (total, nb, last), actual))
+
+    stored = conn.execute("SELECT total_en_cours, nb_en_cours FROM credit_totals WHERE id = 1").fetchone()
+    actual = conn.execute(
+        "SELECT IFNULL(SUM(reste), 0), COUNT(*) FROM credit WHERE statut = 'en cours'"
+    ).fetchone()
+    if stored != actual:
+        drift.append((None, stored, actual))
+
+    if repair and drift:
+        for client_id, _, actual in drift:
+            if client_id is None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO credit_totals(id, total_en_cours, nb_en_cours) VALUES (1, ?, ?)", actual
+                )
+            else:
+                conn.execute(
+                    """INSERT OR REPLACE INTO client_balance(client_id, total_en_cours, nb_en_cours, last_activity)
+                       VALUES (?, ?, ?, ?)""",
+                    (client_id, *actual)
+                )
+    return drift
+
+
+def create_client_balances(conn):
+    """Create the balance tables and fill them from credit."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS client_balance (
+            client_id INTEGER PRIMARY KEY,
+            total_en_cours INTEGER NOT NULL DEFAULT 0,    -- centimes
+            nb_en_cours INTEGER NOT NULL DEFAULT 0,
+            last_activity TEXT,                          -- last credit or versement date
             FOREIGN KEY(client_id) REFERENCES clients(id) ON DELETE CASCADE
         )
-        """,
-        ["id", "date_credit", "client_id", "montant", "motif", "reste", "statut"]
-    )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS credit_totals (
+            id INTEGER PRIMARY KEY CHECK(id = 1),        -- single row
+            total_en_cours INTEGER NOT NULL DEFAULT 0,   -- centimes
+            nb_en_cours INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    check_client_balances(conn, repair=True)
 
-    # --- Migrate paiement ---
-    migrate_table(
-        db_path,
-        "paiement",
-        """
-        CREATE TABLE paiement_new (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date_versement TEXT NOT NULL,
-            credit_id INTEGER UNSIGNED NOT NULL,
-            client_id INTEGER UNSIGNED NOT NULL,
-            montant DECIMAL(10, 2),
-            observation TEXT,
-            FOREIGN KEY(credit_id) REFERENCES credit(id) ON DELETE CASCADE,
-            FOREIGN KEY(client_id) REFERENCES clients(id) ON DELETE CASCADE
+
+def _refresh_client_balance(client_id):
+    """Trigger statement recomputing the balance of one client."""
+    return f"""
+        UPDATE client_balance
+        SET (total_en_cours, nb_en_cours, last_activity) = ({CLIENT_BALANCE.format(client_id=client_id)})
+        WHERE client_id = {client_id};
+    """
+
+
+# Global total: +NEW / -OLD of the credits 'en cours'
+_ADD_NEW_TOTAL = """
+        UPDATE credit_totals
+        SET total_en_cours = total_en_cours + (CASE WHEN NEW.statut = 'en cours' THEN NEW.reste ELSE 0 END),
+            nb_en_cours = nb_en_cours + (NEW.statut = 'en cours')
+        WHERE id = 1;
+"""
+_SUB_OLD_TOTAL = """
+        UPDATE credit_totals
+        SET total_en_cours = total_en_cours - (CASE WHEN OLD.statut = 'en cours' THEN OLD.reste ELSE 0 END),
+            nb_en_cours = nb_en_cours - (OLD.statut = 'en cours')
+        WHERE id = 1;
+"""
+
+
+# Tables whose changes are recorded in change_log for the mobile sync (GET /sync)
+SYNC_TABLES = ["clients", "credit", "paiement"]
+
+
+def create_change_log(conn):
+    """
+    Create change_log: one row per tracked row, its version is bumped on every insert/update/delete.
+    Existing rows are recorded so that a sync from version 0 returns everything.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            version INTEGER PRIMARY KEY AUTOINCREMENT,   -- never reused, increases on every change
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            op TEXT CHECK(op IN ('upsert', 'delete')) NOT NULL,
+            UNIQUE(table_name, row_id)
         )
-        """,
-        ["id", "date_versement", "credit_id", "client_id", "montant", "observation"]
+    """)
+    for table in SYNC_TABLES:
+        conn.execute(f"INSERT OR REPLACE INTO change_log(table_name, row_id, op) SELECT '{table}', id, 'upsert' FROM {table}")
+
+
+def _change_log_triggers(table):
+    """AFTER INSERT/UPDATE/DELETE triggers recording the row in change_log (new version)."""
+    triggers = []
+    for event, row, op in (("INSERT", "NEW", "upsert"), ("UPDATE", "NEW", "upsert"), ("DELETE", "OLD", "delete")):
+        triggers.append(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_log_{event.lower()} AFTER {event} ON {table}
+            BEGIN
+                INSERT OR REPLACE INTO change_log(table_name, row_id, op) VALUES ('{table}', {row}.id, '{op}');
+            END
+        """)
+    return triggers
+
+
+# Credit rows carry the client name (Database._sync_rows joins clients): renaming a client
+# must log its credits again, or the devices keep the old name.
+def relog_renamed_client_credits(conn):
+    """
+    Log again the credits of the clients changed after them (renamed before trg_clients_log_rename existed),
+    so that the next sync sends them with the current name.
+    """
+    conn.execute("""
+        INSERT OR REPLACE INTO change_log(table_name, row_id, op)
+        SELECT 'credit', credit.id, 'upsert'
+        FROM credit
+        JOIN change_log cl ON cl.table_name = 'clients' AND cl.row_id = credit.client_id
+        JOIN change_log cr ON cr.table_name = 'credit' AND cr.row_id = credit.id
+        WHERE cl.version > cr.version
+    """)
+
+
+def dedupe_names(conn):
+    """
+    Rename the duplicated names of clients and employes before making nom unique:
+    the oldest row keeps its name, the others become 'nom (id)'.
+    """
+    for table in ("clients", "employes"):
+        conn.execute(f"""
+            UPDATE {table} SET nom = nom || ' (' || id || ')'
+            WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY nom)
+        """)
+
+
+# Full-text search (migration 10): one FTS5 trigram table per searched table, rowid = id of the row.
+# Indexed values are accent folded (fold_sql), the searched words are folded the same way (fold_text).
+# Each column is (column, SQL expression of the row): the fts column has the name of the source column,
+# the update trigger only watches those (the paiement triggers update credit on every versement).
+SEARCH_INDEXES = {
+    # phone numbers are also indexed without their spaces: '0555123' finds '0555 12 34 56'
+    "clients": [
+        ("nom", "{row}.nom"), ("telephone", "{row}.telephone || ' ' || replace({row}.telephone, ' ', '')"), ("commune", "{row}.commune"),
+    ],
+    "employes": [
+        ("nom", "{row}.nom"), ("telephone", "{row}.telephone || ' ' || replace({row}.telephone, ' ', '')"), ("poste", "{row}.poste"),
+    ],
+    "credit": [
+        ("motif", "{row}.motif"),
+        # stored ISO date and displayed date, both can be typed
+        ("date_credit", "{row}.date_credit || ' ' || strftime('%d-%m-%Y', {row}.date_credit)"),
+        ("montant", "printf('%.2f', {row}.montant / 100.0)"),
+    ],
+    "charges": [
+        ("motif", "{row}.motif"),
+        ("date_charge", "{row}.date_charge || ' ' || strftime('%d-%m-%Y', {row}.date_charge)"),
+    ],
+}
+
+# French accents folded by the search index. Case is ignored by the trigram tokenizer,
+# upper case accents are listed too. SQLite limits the nesting of replace() to about 24 calls
+# in a trigger: only the usual letters are folded.
+ACCENTS = {
+    'à': 'a', 'â': 'a', 'ä': 'a', 'ç': 'c', 'é': 'e', 'è': 'e', 'ê': 'e', 'ë': 'e',
+    'î': 'i', 'ï': 'i', 'ô': 'o', 'ö': 'o', 'ù': 'u', 'û': 'u', 'ü': 'u',
+    'œ': 'oe', 'æ': 'ae',
+    'À': 'a', 'Â': 'a', 'Ç': 'c', 'É': 'e', 'È': 'e', 'Ê': 'e', 'Î': 'i',
+}
+_FOLD_TABLE = str.maketrans(ACCENTS)
+
+
+def fold_text(text: str) -> str:
+    """Fold a searched text like the indexed values: 'Hélène' -> 'helene'."""
+    return text.translate(_FOLD_TABLE).lower()
+
+
+def fold_sql(expr: str) -> str:
+    """
+    SQL expression folding the accents of ``expr`` (nested replace()),
+    plain SQL so that the triggers work on any connection.
+    """
+    for accent, plain in ACCENTS.items():
+        expr = f"replace({expr}, '{accent}', '{plain}')"
+    return f"lower({expr})"
+
+
+def _search_values(table, row):
+    return ", ".join(fold_sql(expr.format(row=row)) for _, expr in SEARCH_INDEXES[table])
+
+
+def create_search_indexes(conn):
+    """Create the FTS5 tables and index the existing rows."""
+    for table, columns in SEARCH_INDEXES.items():
+        names = ", ".join(name for name, _ in columns)
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5({names}, tokenize='trigram')")
+        conn.execute(f"DELETE FROM {table}_fts")
+        conn.execute(f"INSERT INTO {table}_fts(rowid, {names}) SELECT t.id, {_search_values(table, 't')} FROM {table} t")
+
+
+def _search_triggers(table):
+    """AFTER INSERT/UPDATE/DELETE triggers keeping {table}_fts in sync with the table."""
+    columns = SEARCH_INDEXES[table]
+    names = ", ".join(name for name, _ in columns)
+    assignments = ", ".join(
+        f"{name} = {fold_sql(expr.format(row='NEW'))}" for name, expr in columns
     )
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO {table}_fts(rowid, {names}) VALUES (NEW.id, {_search_values(table, 'NEW')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_update AFTER UPDATE OF {names} ON {table}
+        BEGIN
+            UPDATE {table}_fts SET {assignments} WHERE rowid = NEW.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_fts_delete AFTER DELETE ON {table}
+        BEGIN
+            DELETE FROM {table}_fts WHERE rowid = OLD.id;
+        END
+        """,
+    ]
+
+
+def dedupe_salaire_logs(conn):
+    """Keep the last computed row of each (employe, mois) before making it unique."""
+    conn.execute("""
+        DELETE FROM salaire_logs
+        WHERE id NOT IN (SELECT MAX(id) FROM salaire_logs GROUP BY employe_id, mois)
+    """)
+
+
+def _refresh_salaire_log(row):
+    """
+    Trigger statement recomputing the closed month (salaire_logs) of an operation, if there is one.
+    The base salary stays the one of the closing (Database.close_payroll).
+    """
+    return f"""
+        UPDATE salaire_logs
+        SET (total_prime, total_retenue, total_avance, salaire_net) = (
+                SELECT IFNULL(SUM(CASE WHEN o.operation = 'prime' THEN o.montant ELSE 0 END), 0),
+                       IFNULL(SUM(CASE WHEN o.operation = 'retenu' THEN o.montant ELSE 0 END), 0),
+                       IFNULL(SUM(CASE WHEN o.operation = 'avance' THEN o.montant ELSE 0 END), 0),
+                       IFNULL(salaire_logs.salaire_base, 0) + IFNULL(SUM(CASE o.operation
+                           WHEN 'prime' THEN o.montant WHEN 'retenu' THEN -o.montant WHEN 'avance' THEN -o.montant
+                       END), 0)
+                FROM operations o
+                WHERE o.employe_id = {row}.employe_id
+                  AND o.date >= salaire_logs.mois || '-01' AND o.date < date(salaire_logs.mois || '-01', '+1 month')
+            ),
+            date_calcul = datetime('now', 'localtime')
+        WHERE employe_id = {row}.employe_id AND mois = substr({row}.date, 1, 7);
+    """
+
+
+# The schema version is stored in PRAGMA user_version.
+# Each migration is (version, description, steps); a step is a SQL string or a callable(conn).
+# Never edit a released migration, add a new one instead.
+MIGRATIONS = [
+    (
+        1,
+        "Index des jointures credit/paiement/operations",
+        [
+            # credit by client: dump_clients, get_client_credits (covering for the en cours total)
+            "CREATE INDEX IF NOT EXISTS idx_credit_client ON credit(client_id, statut, reste)",
+            # credit by status: credit_by_status, get_total_credit
+            "CREATE INDEX IF NOT EXISTS idx_credit_statut ON credit(statut, reste)",
+            # paiement by credit: versement sums in every credit listing, get_credit_versements
+            "CREATE INDEX IF NOT EXISTS idx_paiement_credit ON paiement(credit_id, montant)",
+            # paiement by client: ON DELETE CASCADE from clients
+            "CREATE INDEX IF NOT EXISTS idx_paiement_client ON paiement(client_id)",
+            # operations by employe: filter_accomptes, employee_accompts, calculate_salaire_mensuel
+            "CREATE INDEX IF NOT EXISTS idx_operations_employe ON operations(employe_id, date, operation, montant)",
+            "CREATE INDEX IF NOT EXISTS idx_salaires_employe ON salaires(employe_id, montant_base)",
+            "CREATE INDEX IF NOT EXISTS idx_salaire_logs_employe ON salaire_logs(employe_id, mois)",
+            # name lookups: get_item_id('clients'|'employes', 'nom', ...) and ORDER BY nom
+            "CREATE INDEX IF NOT EXISTS idx_clients_nom ON clients(nom)",
+            "CREATE INDEX IF NOT EXISTS idx_employes_nom ON employes(nom)",
+        ]
+    ),
+    (
+        2,
+        "Index des dates pour le filtrage par mois",
+        [
+            # month filters are date ranges (db_handler.month_range): sum_accompte, dump_operations
+            "CREATE INDEX IF NOT EXISTS idx_operations_date ON operations(date, operation, montant)",
+            # dump_charges, search_charge, sum_charges
+            "CREATE INDEX IF NOT EXISTS idx_charges_date ON charges(date_charge)",
+        ]
+    ),
+    (
+        3,
+        "Dates au format ISO (YYYY-MM-DD)",
+        [normalize_dates]
+    ),
+    (
+        4,
+        "Montants en centimes (entiers)",
+        [amounts_to_cents]
+    ),
+    (
+        5,
+        "Totaux des versements par crédit (maintenus par triggers)",
+        [
+            add_credit_totals,
+            # every write on paiement (insert_new_versement, regle_credit, delete_paiement, cascades)
+            # updates the totals of its credit in the same transaction
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_paiement_insert AFTER INSERT ON paiement
+            BEGIN
+                UPDATE credit
+                SET total_verse = total_verse + IFNULL(NEW.montant, 0),
+                    nb_versements = nb_versements + 1,
+                    last_versement_date = MAX(IFNULL(last_versement_date, ''), NEW.date_versement)
+                WHERE id = NEW.credit_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_paiement_delete AFTER DELETE ON paiement
+            BEGIN
+                UPDATE credit
+                SET total_verse = total_verse - IFNULL(OLD.montant, 0),
+                    nb_versements = nb_versements - 1,
+                    last_versement_date = (SELECT MAX(date_versement) FROM paiement WHERE credit_id = OLD.credit_id)
+                WHERE id = OLD.credit_id;
+            END
+            """,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_paiement_update
+            AFTER UPDATE OF credit_id, montant, date_versement ON paiement
+            BEGIN
+                UPDATE credit
+                SET total_verse = total_verse - IFNULL(OLD.montant, 0),
+                    nb_versements = nb_versements - 1,
+                    last_versement_date = (SELECT MAX(date_versement) FROM paiement WHERE credit_id = OLD.credit_id)
+                WHERE id = OLD.credit_id;
+                UPDATE credit
+                SET total_verse = total_verse + IFNULL(NEW.montant, 0),
+                    nb_versements = nb_versements + 1,
+                    last_versement_date = (SELECT MAX(date_versement) FROM paiement WHERE credit_id = NEW.credit_id)
+                WHERE id = NEW.credit_id;
+            END
+            """,
+        ]
+    ),
+    (
+        6,
+        "Solde par client et total global des crédits (maintenus par triggers)",
+        [
+            create_client_balances,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_clients_insert AFTER INSERT ON clients
+            BEGIN
+                INSERT OR IGNORE INTO client_balance(client_id) VALUES (NEW.id);
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_credit_insert AFTER INSERT ON credit
+            BEGIN
+                {_refresh_client_balance('NEW.client_id')}
+                {_ADD_NEW_TOTAL}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_credit_delete AFTER DELETE ON credit
+            BEGIN
+                {_refresh_client_balance('OLD.client_id')}
+                {_SUB_OLD_TOTAL}
+            END
+            """,
+            # last_versement_date is written by the paiement triggers, so versements refresh last_activity too
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_credit_update
+            AFTER UPDATE OF client_id, reste, statut, date_credit, last_versement_date ON credit
+            BEGIN
+                {_refresh_client_balance('OLD.client_id')}
+                {_refresh_client_balance('NEW.client_id')}
+                {_SUB_OLD_TOTAL}
+                {_ADD_NEW_TOTAL}
+            END
+            """,
+        ]
+    ),
+    (
+        7,
+        "Journal des modifications pour la synchronisation mobile",
+        [create_change_log] + [trigger for table in SYNC_TABLES for trigger in _change_log_triggers(table)]
+    ),
+    (
+        8,
+        "Index de la version des données par table (ETag de l'API)",
+        [
+            # Database.data_version(): MAX(version) for one table is a single index lookup
+            "CREATE INDEX IF NOT EXISTS idx_change_log_table ON change_log(table_name, version)",
+        ]
+    ),
+    (
+        9,
+        "Noms uniques des clients et des employés",
+        [
+            dedupe_names,
+            # get_item_id('clients'|'employes', 'nom', ...) must resolve to a single row
+            "DROP INDEX IF EXISTS idx_clients_nom",
+            "CREATE UNIQUE INDEX idx_clients_nom ON clients(nom)",
+            "DROP INDEX IF EXISTS idx_employes_nom",
+            "CREATE UNIQUE INDEX idx_employes_nom ON employes(nom)",
+        ]
+    ),
+    (
+        10,
+        "Index de recherche plein texte (FTS5 trigram, sans accents)",
+        [
+            create_search_indexes,
+            # search_charge: charges of the employes whose name matches
+            "CREATE INDEX IF NOT EXISTS idx_charges_effectue_par ON charges(effectue_par)",
+        ] + [trigger for table in SEARCH_INDEXES for trigger in _search_triggers(table)]
+    ),
+    (
+        11,
+        "Clôture mensuelle des salaires (salaire_logs, recalculée par triggers)",
+        [
+            dedupe_salaire_logs,
+            # one closed payroll per employe and month: close_payroll upserts on it
+            "DROP INDEX IF EXISTS idx_salaire_logs_employe",
+            "CREATE UNIQUE INDEX idx_salaire_logs_employe_mois ON salaire_logs(employe_id, mois)",
+            # payroll_months
+            "CREATE INDEX IF NOT EXISTS idx_salaire_logs_mois ON salaire_logs(mois)",
+            # an operation written in a closed month recomputes that month only
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_operations_payroll_insert AFTER INSERT ON operations
+            BEGIN
+                {_refresh_salaire_log('NEW')}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_operations_payroll_delete AFTER DELETE ON operations
+            BEGIN
+                {_refresh_salaire_log('OLD')}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_operations_payroll_update
+            AFTER UPDATE OF employe_id, operation, montant, date ON operations
+            BEGIN
+                {_refresh_salaire_log('OLD')}
+                {_refresh_salaire_log('NEW')}
+            END
+            """,
+        ]
+    ),
+    (
+        12,
+        "Synchronisation des crédits après le renommage d'un client",
+        [
+            relog_renamed_client_credits,
+            """
+            CREATE TRIGGER IF NOT EXISTS trg_clients_log_rename AFTER UPDATE OF nom ON clients
+            WHEN OLD.nom IS NOT NEW.nom
+            BEGIN
+                INSERT OR REPLACE INTO change_log(table_name, row_id, op)
+                SELECT 'credit', id, 'upsert' FROM credit WHERE client_id = NEW.id;
+            END
+            """,
+        ]
+    ),
+    (
+        13,
+        "Dates restantes au format ISO (4-9-2025, 2025/09/04, ...)",
+        [normalize_dates]
+    ),
+]
+
+
+def schema_version(conn) -> int:
+    """Return the current schema version of the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn) -> list:
+    """
+    Apply every pending migration, each one in its own transaction.
+
+    :param conn: open sqlite3 connection
+    :return: list of applied versions
+    """
+    applied = []
+    current = schema_version(conn)
+    for version, description, steps in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN")
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        applied.append((version, description))
+    return applied
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migration de la base de données.")
+    parser.add_argument('db_path', nargs='?', default='./lifeTipazaDB.db')
+    parser.add_argument('--check-totals', action='store_true',
+                        help="Vérifier les totaux des versements et les soldes clients.")
+    parser.add_argument('--repair', action='store_true', help="Avec --check-totals: corriger les écarts.")
+    args = parser.parse_args()
+
+    if args.check_totals:
+        if args.repair:
+            backup_db(args.db_path)
+        conn = sqlite3.connect(args.db_path)
+        try:
+            with conn:
+                credit_drift = check_credit_totals(conn, repair=args.repair)
+                client_drift = check_client_balances(conn, repair=args.repair)
+        finally:
+            conn.close()
+        for credit_id, stored, actual in credit_drift:
+            print(f"❌ Crédit {credit_id}: stocké {stored}, recalculé {actual}")
+        for client_id, stored, actual in client_drift:
+            print(f"❌ {f'Client {client_id}' if client_id else 'Total global'}: stocké {stored}, recalculé {actual}")
+        drift = credit_drift + client_drift
+        if not drift:
+            print("✅ Totaux des versements et soldes clients cohérents.")
+        elif args.repair:
+            print(f"✅ {len(drift)} écart(s) corrigé(s).")
+        raise SystemExit(1 if drift and not args.repair else 0)
+
+    backup_db(args.db_path)
+    conn = sqlite3.connect(args.db_path)
+    try:
+        print(f"Version actuelle du schéma: {schema_version(conn)}")
+        for version, description in apply_migrations(conn):
+            print(f"✅ Migration {version}: {description}")
+        print(f"Version du schéma: {schema_version(conn)}")
+    finally:
+        conn.close()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Money type, amounts are stored in the database as integer centimes.
+# ----------------------------------------------------------------------------
+
+
+import sqlite3
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+CENT = Decimal('0.01')
+
+
+class Money(Decimal):
+    """
+    Amount in dinars with exactly two decimals.
+
+    - Money(12000), Money(1500.5), Money('12 000,50'), Money(Decimal('3.2'))
+    - Money.from_cents(1200050) -> Money('12000.50')
+    - Money('12000.50').cents -> 1200050 (the value stored in the database)
+
+    Arithmetic returns plain Decimal, wrap the result in Money() to round it again.
+    """
+    def __new__(cls, value=0):
+        if isinstance(value, float):
+            value = repr(value)             # 0.1 -> '0.1', not 0.1000000000000000055...
+        elif isinstance(value, str):
+            value = value.replace(' ', '').replace('\u00a0', '').replace(',', '.')
+        try:
+            amount = Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+        except (InvalidOperation, TypeError, ValueError):
+            raise ValueError(f"Montant invalide: {value}")
+        if not amount.is_finite():
+            raise ValueError(f"Montant invalide: {value}")
+        return super().__new__(cls, amount)
+
+    @classmethod
+    def from_cents(cls, cents):
+        """Build a Money from the integer centimes stored in the database."""
+        # scaleb(-2) of an integer already has exactly two decimals: no quantize, no parsing
+        return Decimal.__new__(cls, Decimal(int(cents)).scaleb(-2))
+
+    @property
+    def cents(self) -> int:
+        """Value in centimes, as stored in the database."""
+        return int(self.scaleb(2))
+
+    def __repr__(self):
+        return f"Money('{self}')"
+
+
+def to_cents(value) -> int:
+    """
+    Convert any amount (int, float, Decimal, '12 000,50') to integer centimes.
+    :raises ValueError: if the value is not a valid amount
+    """
+    return Money(value).cents
+
+
+# Converted values by raw column value: shop amounts repeat a lot, and Money is immutable
+_converted = {}
+_CONVERTED_MAX = 4096
+
+
+def _convert_money(raw: bytes):
+    """sqlite3 converter for columns aliased as "name [money]"."""
+    value = _converted.get(raw)
+    if value is None:
+        try:
+            value = Money.from_cents(int(raw))
+        except ValueError:      # not an integer (REAL or TEXT left by an old database)
+            value = Money.from_cents(Decimal(raw.decode()).to_integral_value(rounding=ROUND_HALF_UP))
+        if len(_converted) >= _CONVERTED_MAX:
+            _converted.clear()
+        _converted[raw] = value
+    return value
+
+
+# Columns selected as `expr AS "name [money]"` come back as Money
+# (connections must be opened with detect_types=sqlite3.PARSE_COLNAMES).
+sqlite3.register_converter("money", _convert_money)
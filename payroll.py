@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Month-end payroll: one PDF payslip per employe and a zip of all of them.
+#                 Salaries come from one calculate_salaire_mensuel(month) call, the PDFs are
+#                 rendered by a process pool (plain Python PDF writer, no Qt in the workers).
+#                 python payroll.py 2025-09 --db lifeTipazaDB.db
+# ----------------------------------------------------------------------------
+
+
+import argparse
+import multiprocessing
+import os
+import re
+import time
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from logger import logger
+
+
+OUTPUT_DIR = "fiches_de_paie"
+CHUNK_SIZE = 25         # payslips per task sent to a worker process
+SHOP_NAME = "LifeTipaza"
+
+MOIS = ['janvier', 'février', 'mars', 'avril', 'mai', 'juin',
+        'juillet', 'août', 'septembre', 'octobre', 'novembre', 'décembre']
+
+# A4 in points
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+
+
+def month_label(month):
+    """'2025-09' -> 'septembre 2025'"""
+    start = datetime.strptime(month, "%Y-%m")
+    return f"{MOIS[start.month - 1]} {start.year}"
+
+
+def format_cents(cents):
+    """1200050 -> '12 000,50', like utils.format_money (utils needs PyQt, not loaded in the workers)."""
+    sign = '-' if cents < 0 else ''
+    dinars, centimes = divmod(abs(cents), 100)
+    return f"{sign}{dinars:,}".replace(',', ' ') + f",{centimes:02d}"
+
+
+def _pdf_text(text):
+    """PDF string literal of a text, in WinAnsiEncoding (French accents)."""
+    raw = text.encode('cp1252', errors='replace')
+    return b'(' + raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)') + b')'
+
+
+def _text(x, y, font, size, text):
+    return b'BT /%s %d Tf %d %d Td %s Tj ET\n' % (font, size, x, y, _pdf_text(text))
+
+
+def _right(x, y, size, text):
+    """Text right-aligned on x, in Courier (every glyph is 0.6 em wide)."""
+    return _text(round(x - len(text) * size * 0.6), y, b'F3', size, text)
+
+
+def payslip_pdf(slip, month, shop=SHOP_NAME):
+    """
+    One-page PDF payslip.
+    :param slip: (employe_id, nom, poste, base, prime, retenue, avance, net), amounts in centimes
+    :param month: 'YYYY-MM'
+    :return: the PDF file content (bytes)
+    """
+    employe_id, nom, poste, base, prime, retenue, avance, net = slip
+    left, right = 60, PAGE_WIDTH - 60
+
+    content = [
+        _text(left, 780, b'F2', 16, shop),
+        _text(left, 760, b'F1', 10, f"Édité le {datetime.now():%d-%m-%Y}"),
+        _text(left, 710, b'F2', 18, f"Fiche de paie - {month_label(month)}"),
+        _text(left, 670, b'F1', 12, f"Employé : {nom}"),
+        _text(left, 650, b'F1', 12, f"Poste : {poste or '-'}"),
+        _text(left, 630, b'F1', 12, f"Matricule : {employe_id}"),
+    ]
+
+    rows = [("Salaire de base", base), ("Primes", prime), ("Retenues", -retenue), ("Avances", -avance)]
+    top, height = 590, 26
+    for position, (label, cents) in enumerate(rows):
+        y = top - position * height
+        content.append(b'%d %d %d %d re S\n' % (left, y - 8, right - left, height))
+        content.append(_text(left + 10, y, b'F1', 12, label))
+        content.append(_right(right - 10, y, 12, format_cents(cents)))
+
+    y = top - len(rows) * height - 14
+    content.append(b'0.9 g %d %d %d %d re f 0 g\n' % (left, y - 10, right - left, height + 4))
+    content.append(_text(left + 10, y, b'F2', 13, "Net à payer (DA)"))
+    content.append(_right(right - 10, y, 13, format_cents(net)))
+    content.append(_text(left, y - 80, b'F1', 11, "Signature de l'employé"))
+    content.append(_text(right - 160, y - 80, b'F1', 11, "Signature du gérant"))
+
+    stream = zlib.compress(b''.join(content))
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents 4 0 R '
+        b'/Resources << /Font << /F1 5 0 R /F2 6 0 R /F3 7 0 R >> >> >>' % (PAGE_WIDTH, PAGE_HEIGHT),
+        b'<< /Length %d /Filter /FlateDecode >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>',
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>',
+    ]
+
+    pdf = bytearray(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def payslip_filename(employe_id, nom):
+    safe = re.sub(r'[^\w-]+', '_', nom, flags=re.UNICODE).strip('_')
+    return f"{employe_id:04d}_{safe}.pdf"
+
+
+def render_payslips(directory, month, slips):
+    """Write the PDF of each slip in ``directory`` (run in a worker process), return the file paths."""
+    paths = []
+    for slip in slips:
+        path = os.path.join(directory, payslip_filename(slip[0], slip[1]))
+        with open(path, 'wb') as file:
+            file.write(payslip_pdf(slip, month))
+        paths.append(path)
+    return paths
+
+
+def run_payroll(db, month, output_dir=OUTPUT_DIR, workers=None, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Payslips of every employe for ``month``, and a zip archive of all of them.
+    No Qt call: safe to run in a background worker.
+
+    :param db: Database
+    :param month: 'YYYY-MM'
+    :param output_dir: the PDFs go to output_dir/month/, the archive to output_dir/fiches_de_paie_month.zip
+    :param workers: number of processes, None for one per CPU (in this thread on a single CPU),
+                    1 to render in this thread. Processes are spawned, never forked from the Qt/API process.
+    :param progress: called with (done, total) after each chunk of payslips
+    :return: {'success': True, 'mois', 'count', 'directory', 'archive', 'seconds'}
+    """
+    try:
+        month_label(month)
+    except ValueError:
+        return {'success': False, 'error': f"Mois invalide ({month}). Utiliser le format YYYY-MM."}
+
+    start = time.perf_counter()
+    employes = {row[0]: row for row in db.dump_employes()}        # id, nom, telephone, poste, ...
+    slips = [
+        (
+            salaire['employe_id'], employes[salaire['employe_id']][1], employes[salaire['employe_id']][3],
+            salaire['salaire_base'].cents, salaire['total_prime'].cents, salaire['total_retenue'].cents,
+            salaire['total_avance'].cents, salaire['salaire_final'].cents,
+        )
+        for salaire in db.calculate_salaire_mensuel(month)
+        if salaire['employe_id'] in employes
+    ]
+    if not slips:
+        return {'success': False, 'error': f"Aucun employé pour {month}."}
+
+    directory = os.path.join(output_dir, month)
+    os.makedirs(directory, exist_ok=True)
+    chunks = [slips[i:i + chunk_size] for i in range(0, len(slips), chunk_size)]
+    paths = []
+
+    if workers is None and (os.cpu_count() or 1) == 1:
+        workers = 1
+    if workers == 1:
+        for chunk in chunks:
+            paths += render_payslips(directory, month, chunk)
+            if progress is not None:
+                progress(len(paths), len(slips))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+            futures = [executor.submit(render_payslips, directory, month, chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                paths += future.result()
+                if progress is not None:
+                    progress(len(paths), len(slips))
+
+    archive = os.path.join(output_dir, f"fiches_de_paie_{month}.zip")
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_STORED) as zip_file:     # PDF streams are already deflated
+        for path in sorted(paths):
+            zip_file.write(path, os.path.join(month, os.path.basename(path)))
+
+    seconds = time.perf_counter() - start
+    logger.info(f"Payroll {month}: {len(paths)} payslips in {seconds:.2f}s -> {archive}")
+    return {'success': True, 'mois': month, 'count': len(paths), 'directory': directory, 'archive': archive,
+            'seconds': round(seconds, 3)}
+
+
+if __name__ == '__main__':
+    from db_handler import Database
+
+    parser = argparse.ArgumentParser(description="Fiches de paie du mois (PDF) de tous les employés.")
+    parser.add_argument('month', help="Mois (YYYY-MM).")
+    parser.add_argument('--db', default='lifeTipazaDB.db', help="Base de données.")
+    parser.add_argument('--output', default=OUTPUT_DIR, help="Dossier des fiches de paie.")
+    parser.add_argument('--workers', type=int, help="Nombre de processus (1: sans processus).")
+    parser.add_argument('--close', action='store_true', help="Clôturer le mois avant (salaire_logs).")
+    args = parser.parse_args()
+
+    database = Database(args.db)
+    try:
+        if args.close:
+            closed = database.close_payroll(args.month)
+            if not closed['success']:
+                parser.exit(1, f"{closed['error']}\n")
+        result = run_payroll(database, args.month, args.output, args.workers,
+                             progress=lambda done, total: print(f"\r{done}/{total}", end='', flush=True))
+        print()
+        print(result['archive'] if result['success'] else result['error'])
+    finally:
+        database.close()
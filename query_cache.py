@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Read-through cache of Database query results.
+#                 Entries are keyed by method + params and tagged with the tables they read,
+#                 write methods invalidate exactly the entries of the tables they change.
+# ----------------------------------------------------------------------------
+
+
+import copy
+import functools
+import threading
+from collections import OrderedDict
+
+
+# Tables changed as a side effect of a write on a table (triggers and ON DELETE CASCADE).
+WRITE_EFFECTS = {
+    'clients': {'credit', 'paiement', 'client_balance', 'credit_totals', 'change_log'},
+    'credit': {'paiement', 'client_balance', 'credit_totals', 'change_log'},
+    'paiement': {'credit', 'client_balance', 'credit_totals', 'change_log'},
+    'employes': {'salaires', 'operations', 'salaire_logs'},
+    'operations': {'salaire_logs'},
+}
+
+
+class QueryCache:
+    """
+    Bounded LRU cache shared by the Database instances of one database file.
+
+    - get()/put() by key, put() is ignored if a write happened while the value was computed
+    - invalidate(tables) drops the entries that read one of the tables
+    - stats() returns the hit/miss/eviction/invalidation counters
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()       # key -> (tables, value)
+        self._lock = threading.Lock()
+        self.generation = 0                 # bumped on every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return (True, value) on a hit, (False, None) on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[1]
+
+    def put(self, key, tables, value, generation):
+        """
+        Store a value computed while the cache was at ``generation``.
+        Skipped if an invalidation happened in between (the value may already be stale).
+        """
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._entries[key] = (frozenset(tables), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, tables=None):
+        """Drop the entries reading one of ``tables`` (and their side-effect tables), everything if None."""
+        with self._lock:
+            self.generation += 1
+            if tables is None:
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                return
+            changed = set(tables)
+            for table in tables:
+                changed |= WRITE_EFFECTS.get(table, set())
+            stale = [key for key, (read, _) in self._entries.items() if read & changed]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(db_name, max_entries=256):
+    """Return the cache of a database file, shared by every Database opened on it in this process."""
+    with _caches_lock:
+        cache = _caches.get(db_name)
+        if cache is None:
+            cache = _caches[db_name] = QueryCache(max_entries)
+        return cache
+
+
+def _copy(value):
+    # Rows are tuples of immutable values: a shallow copy of the list is enough
+    if isinstance(value, list) and all(isinstance(row, tuple) for row in value):
+        return list(value)
+    return copy.deepcopy(value)
+
+
+def _tables(tables, table_arg, args, kwargs):
+    tables = set(tables)
+    if table_arg is not None:
+        tables.add(args[table_arg] if len(args) > table_arg else kwargs.get('table', kwargs.get('table_name')))
+    return tables
+
+
+def cached(*tables, table_arg=None):
+    """
+    Cache the result of a Database read method, tagged with the tables it reads.
+    The caller gets a copy: modifying it never alters the cache.
+    :param table_arg: index of a positional argument naming the table (get_item_id, get_names)
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.cache is None:
+                return method(self, *args, **kwargs)
+            self._check_external_writes()
+            key = (method.__name__, args, tuple(sorted(kwargs.items())))
+            hit, value = self.cache.get(key)
+            if not hit:
+                generation = self.cache.generation
+                value = method(self, *args, **kwargs)
+                self.cache.put(key, _tables(tables, table_arg, args, kwargs), value, generation)
+            return _copy(value)
+        return wrapper
+    return decorator
+
+
+def invalidates(*tables, table_arg=None):
+    """
+    Invalidate the cached entries of ``tables`` after a Database write method.
+    :param table_arg: index of a positional argument naming the table (delete_item)
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                if self.cache is not None:
+                    self.cache.invalidate(_tables(tables, table_arg, args, kwargs) or None)
+        return wrapper
+    return decorator
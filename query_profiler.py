@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Query profiling of Database.
+#                 Pooled connections hand out ProfilingCursor: every statement is timed from
+#                 execute() to its last fetch, with its rows and the Database method that ran it.
+#                 Slow statements are logged with their EXPLAIN QUERY PLAN.
+# ----------------------------------------------------------------------------
+
+
+import functools
+import inspect
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from logger import logger
+
+
+# The public Database method being run by each thread (outermost call only)
+_current = threading.local()
+
+# Method label of the statements run outside a Database method (``with db.connect() as conn``)
+DIRECT = "<direct>"
+
+
+class MethodCall:
+    """Queries, rows and SQL time of one call of a Database method."""
+    __slots__ = ('method', 'queries', 'rows', 'sql_seconds')
+
+    def __init__(self, method):
+        self.method = method
+        self.queries = 0
+        self.rows = 0
+        self.sql_seconds = 0.0
+
+
+def _percentile(ordered, percent):
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, -(-len(ordered) * percent // 100) - 1)
+    return ordered[int(index)]
+
+
+class QueryProfiler:
+    """
+    Per-method statistics of one database file, shared by its Database instances.
+
+    - record_call() at the end of each public Database method (wall time, queries, rows)
+    - record_query() for each statement: the slow ones are logged and kept by slow_queries()
+    - stats() returns p50/p95/p99 per method, over the last ``samples`` calls
+    """
+    def __init__(self, slow_ms=100, samples=1000, slow_log_size=50):
+        self.slow_ms = slow_ms
+        self.samples = samples
+        self._methods = {}          # method -> counters and latencies
+        self._slow = deque(maxlen=slow_log_size)
+        self._lock = threading.Lock()
+
+    def record_call(self, call, seconds):
+        with self._lock:
+            entry = self._methods.get(call.method)
+            if entry is None:
+                entry = self._methods[call.method] = {
+                    'calls': 0, 'queries': 0, 'rows': 0, 'total': 0.0, 'sql': 0.0,
+                    'latencies': deque(maxlen=self.samples),
+                }
+            entry['calls'] += 1
+            entry['queries'] += call.queries
+            entry['rows'] += call.rows
+            entry['total'] += seconds
+            entry['sql'] += call.sql_seconds
+            entry['latencies'].append(seconds)
+
+    def record_query(self, conn, method, sql, params, seconds, rows, affected=None):
+        """
+        Keep and log the statement if it took ``slow_ms`` or more.
+
+        :param method: Database method that ran it, None outside a method (labelled DIRECT)
+        :param rows: rows returned
+        :param affected: rows changed by a statement returning nothing (INSERT / UPDATE / DELETE,
+                         executemany), None otherwise. These are not explained.
+        """
+        if self.slow_ms is None or seconds * 1000 < self.slow_ms:
+            return
+        method = method or DIRECT
+        plan = explain(conn, sql, params) if affected is None else []
+        with self._lock:
+            self._slow.append({
+                'method': method, 'sql': ' '.join(sql.split()), 'ms': round(seconds * 1000, 1),
+                'rows': rows, 'affected': affected, 'plan': plan, 'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            })
+        count = f"{rows} rows" if affected is None else f"{affected} rows changed"
+        logger.warning(f"Slow query ({seconds * 1000:.0f} ms, {count}) in {method}: {' '.join(sql.split())}"
+                       + "".join(f"\n    {detail}" for detail in plan))
+
+    def stats(self):
+        """
+        :return: {method: {calls, queries, rows, total_ms, sql_ms, p50_ms, p95_ms, p99_ms, max_ms}},
+                 percentiles over the last ``samples`` calls of the method
+        """
+        with self._lock:
+            entries = {method: dict(entry, latencies=sorted(entry['latencies']))
+                       for method, entry in self._methods.items()}
+        stats = {}
+        for method, entry in entries.items():
+            latencies = entry['latencies']
+            stats[method] = {
+                'calls': entry['calls'],
+                'queries': entry['queries'],
+                'rows': entry['rows'],
+                'total_ms': round(entry['total'] * 1000, 1),
+                'sql_ms': round(entry['sql'] * 1000, 1),
+                'p50_ms': round(_percentile(latencies, 50) * 1000, 3),
+                'p95_ms': round(_percentile(latencies, 95) * 1000, 3),
+                'p99_ms': round(_percentile(latencies, 99) * 1000, 3),
+                'max_ms': round(latencies[-1] * 1000, 3),
+            }
+        return stats
+
+    def slow_queries(self):
+        """Last slow statements, most recent last."""
+        with self._lock:
+            return list(self._slow)
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+            self._slow.clear()
+
+
+def explain(conn, sql, params=()):
+    """EXPLAIN QUERY PLAN details of a statement, [] if it can't be explained (PRAGMA, BEGIN...)."""
+    try:
+        cursor = sqlite3.Connection.cursor(conn)    # plain cursor: not profiled
+        return [row[3] for row in cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params or ())]
+    except (sqlite3.Error, ValueError):
+        return []
+
+
+_profilers = {}
+_profilers_lock = threading.Lock()
+
+
+def shared_profiler(db_name, slow_ms=100):
+    """Return the profiler of a database file, shared by every Database opened on it in this process."""
+    with _profilers_lock:
+        profiler = _profilers.get(db_name)
+        if profiler is None:
+            profiler = _profilers[db_name] = QueryProfiler(slow_ms)
+        return profiler
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """
+    Cursor recording each statement when its result is consumed:
+    last fetch, next execute(), close() or garbage collection.
+    """
+    _query = None       # [sql, params, seconds, rows, MethodCall, affected]
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        finally:
+            self._query = [sql, parameters, time.perf_counter() - start, 0, getattr(_current, 'call', None), None]
+        if self.description is None:        # INSERT / UPDATE / DELETE: nothing to fetch
+            self._query[5] = max(self.rowcount, 0)
+            self._finish()
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        finally:
+            self._query = [sql, (), time.perf_counter() - start, 0, getattr(_current, 'call', None),
+                           max(self.rowcount, 0)]
+            self._finish()
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(start, 0 if row is None else 1, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(start, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(start, len(rows), True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(start, 0, True)
+            raise
+        self._fetched(start, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _fetched(self, start, rows, done):
+        query = self._query
+        if query is not None:
+            query[2] += time.perf_counter() - start
+            query[3] += rows
+            if done:
+                self._finish()
+
+    def _finish(self):
+        query = self._query
+        if query is None:
+            return
+        self._query = None
+        sql, params, seconds, rows, call, affected = query
+        if call is not None:
+            call.queries += 1
+            call.rows += rows
+            call.sql_seconds += seconds
+        profiler = getattr(self.connection, 'profiler', None)
+        if profiler is not None:
+            profiler.record_query(self.connection, call.method if call else None, sql, params, seconds, rows,
+                                  affected)
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """sqlite3 connection whose cursors, and conn.execute() shortcuts, are ProfilingCursor."""
+    profiler = None
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    # sqlite3.Connection.execute() doesn't go through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _steps(profiler, call, iterator, elapsed):
+    """Run a generator returned by a method under its MethodCall, recorded when it is closed."""
+    try:
+        while True:
+            previous = getattr(_current, 'call', None)
+            _current.call = call
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                elapsed += time.perf_counter() - start
+                _current.call = previous
+            yield item
+    finally:
+        iterator.close()
+        profiler.record_call(call, elapsed)
+
+
+def _profile_method(method):
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler is None or getattr(_current, 'call', None) is not None:
+            return method(self, *args, **kwargs)        # nested call: counted in the outer one
+
+        call = _current.call = MethodCall(method.__name__)
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _current.call = None
+            elapsed = time.perf_counter() - start
+        if inspect.isgenerator(result):     # iter_credits(), iter_clients(): the queries run while iterating
+            return _steps(profiler, call, result, elapsed)
+        profiler.record_call(call, elapsed)
+        return result
+    return wrapper
+
+
+def profiled(cls, skip=('connect', 'close', 'cache_stats', 'query_stats', 'slow_queries')):
+    """Class decorator of Database: every public method records its calls in ``self.profiler`` (None to disable)."""
+    for name, member in list(vars(cls).items()):
+        if inspect.isfunction(member) and not name.startswith('_') and name not in skip:
+            setattr(cls, name, _profile_method(member))
+    return cls
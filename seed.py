@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Synthetic shop for the benchmarks: clients, credits, versements, employes,
+#                 monthly operations and charges over N years, written with the real schema
+#                 (Database._create_tables, migrations and triggers included).
+#                 python seed.py /tmp/shop.db --scale 100k
+# ----------------------------------------------------------------------------
+
+
+import argparse
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from db_handler import Database
+
+
+# Presets of benchmark.py --suite, named by their number of credits
+SCALES = {
+    '1k': dict(clients=200, credits_per_client=5, versements_per_credit=2,
+               employes=10, years=2, operations_per_month=4, charges_per_month=20),
+    '100k': dict(clients=20_000, credits_per_client=5, versements_per_credit=2,
+                 employes=50, years=3, operations_per_month=4, charges_per_month=200),
+    '1M': dict(clients=200_000, credits_per_client=5, versements_per_credit=2,
+               employes=200, years=5, operations_per_month=4, charges_per_month=1000),
+}
+
+BATCH_SIZE = 10_000     # rows per executemany: memory stays flat whatever the scale
+
+PRENOMS = [
+    'Mohamed', 'Ahmed', 'Yacine', 'Hamza', 'Karim', 'Rachid', 'Sofiane', 'Walid', 'Fouad', 'Nabil',
+    'Amine', 'Mehdi', 'Samir', 'Hakim', 'Brahim', 'Fatima', 'Amina', 'Nadia', 'Yasmine', 'Sarah',
+    'Hélène', 'Chérif', 'Aïcha', 'Zoé', 'Noël',
+]
+NOMS = [
+    'Benali', 'Bouzid', 'Khelifi', 'Mansouri', 'Haddad', 'Saadi', 'Belkacem', 'Zioui', 'Kerkouba', 'Birare',
+    'Boughrassa', 'Bouharb', 'Rahmani', 'Ouali', 'Meziane', 'Ferhat', 'Djebbar', 'Lamri', 'Cherifi', 'Amrani',
+    'Bénaïssa', 'Hadj-Ahmed', 'Kaci', 'Tahar', 'Zerrouki',
+]
+COMMUNES = ['Tipaza', 'Hadjout', 'Bou-ismail', 'Cherchell', 'Koléa', 'Fouka', 'Damous', 'Gouraya', 'Ahmer El Aïn']
+MOTIFS_CREDIT = ['', '', '', 'Marchandise', 'Électroménager', 'Téléphone', 'Réparation écran', 'Matériaux', 'Avance']
+POSTES = ['Vendeur', 'Caissier', 'Livreur', 'Magasinier', 'ADV', 'Gérant']
+MOTIFS_CHARGE = [
+    'Électricité', 'Loyer', 'Transport', 'Carburant', 'Assurance Vespa', 'Fournitures bureau',
+    'Réparation', 'Internet', 'Eau', 'Nettoyage', 'Café et repas',
+]
+
+
+def _phone(rng):
+    number = f"0{rng.choice('567')}{rng.randrange(10 ** 8):08d}"
+    if rng.random() < 0.5:      # both spellings are found in the real data
+        number = f"{number[:4]} {number[4:6]} {number[6:8]} {number[8:]}"
+    return number
+
+
+def _day(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days + 1))
+
+
+def _months(start, end):
+    """First day of every month between start and end."""
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month = (month + timedelta(days=32)).replace(day=1)
+
+
+def _credits(rng, client_ids, first_credit_id, start, end, credits_per_client, versements_per_credit):
+    """
+    Yield ('credit', row) and ('paiement', row) in insertion order, a credit before its versements.
+    Statuses are mixed: about 35% paid off (terminé), 50% partly paid, 15% without versement.
+    """
+    credit_id = first_credit_id
+    for client_id in client_ids:
+        for _ in range(rng.randint(1, 2 * credits_per_client - 1)):
+            montant = rng.randrange(10, 4000) * 5000           # 500 DA .. 200 000 DA, in centimes
+            day = _day(rng, start, end)
+            roll = rng.random()
+            if roll < 0.35:
+                parts = rng.randint(1, 2 * versements_per_credit)
+                amounts = [montant // parts] * (parts - 1)
+                amounts.append(montant - sum(amounts))
+            elif roll < 0.85:
+                parts = rng.randint(1, max(1, 2 * versements_per_credit - 1))
+                amounts = [montant // (parts + 1 + rng.randrange(3)) // 10000 * 10000 or 10000] * parts
+            else:
+                amounts = []
+
+            paiements = []
+            paid_on = day
+            for amount in amounts:
+                paid_on = min(paid_on + timedelta(days=rng.randrange(1, 60)), end)
+                paiements.append((paid_on.isoformat(), credit_id, client_id, amount, ''))
+
+            reste = montant - sum(amounts)
+            statut = 'terminé' if reste <= 0 else 'en cours'
+            yield 'credit', (credit_id, day.isoformat(), client_id, montant, rng.choice(MOTIFS_CREDIT), reste, statut)
+            for paiement in paiements:
+                yield 'paiement', paiement
+            credit_id += 1
+
+
+def _insert_batches(conn, rows, statements):
+    """executemany the (table, row) pairs of ``rows`` in batches, tables flushed in ``statements`` order."""
+    pending = {table: [] for table in statements}
+    for table, row in rows:
+        pending[table].append(row)
+        if len(pending[table]) >= BATCH_SIZE:
+            for name, sql in statements.items():       # parents first (foreign keys)
+                conn.executemany(sql, pending[name])
+                pending[name].clear()
+    for name, sql in statements.items():
+        conn.executemany(sql, pending[name])
+
+
+def seed_shop(db_path, clients=200, credits_per_client=5, versements_per_credit=2, employes=10, years=2,
+              operations_per_month=4, charges_per_month=20, end=None, seed=42):
+    """
+    Add a synthetic shop to ``db_path`` (created if missing), in one transaction.
+    Existing rows are kept: ids and names continue after them.
+
+    :param clients: number of clients
+    :param credits_per_client: mean number of credits of a client (1 .. 2x-1)
+    :param versements_per_credit: mean number of versements of a paid credit
+    :param employes: number of employes, each with a salaire
+    :param years: period covered by the dates, ending at ``end`` (default today)
+    :param operations_per_month: mean number of primes/retenues/avances per employe and month
+    :param charges_per_month: number of charges per month
+    :param seed: random seed, the same seed gives the same shop
+    :return: dict table -> number of rows after seeding
+    """
+    rng = random.Random(seed)
+    end = end or date.today()
+    start = end - timedelta(days=365 * years)
+
+    db = Database(db_path, cache_size=0)
+    db._create_tables()
+    try:
+        with db.connect() as conn:
+            first_client = conn.execute("SELECT IFNULL(MAX(id), 0) FROM clients").fetchone()[0] + 1
+            conn.executemany(
+                "INSERT INTO clients(id, nom, telephone, commune, observation) VALUES (?, ?, ?, ?, '')",
+                (
+                    (client_id, f"{rng.choice(PRENOMS)} {rng.choice(NOMS)} {client_id}",     # names are unique
+                     _phone(rng), rng.choice(COMMUNES))
+                    for client_id in range(first_client, first_client + clients)
+                )
+            )
+
+            first_credit = conn.execute("SELECT IFNULL(MAX(id), 0) FROM credit").fetchone()[0] + 1
+            _insert_batches(
+                conn,
+                _credits(rng, range(first_client, first_client + clients), first_credit, start, end,
+                         credits_per_client, versements_per_credit),
+                {
+                    'credit': "INSERT INTO credit(id, date_credit, client_id, montant, motif, reste, statut) "
+                              "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    'paiement': "INSERT INTO paiement(date_versement, credit_id, client_id, montant, observation) "
+                                "VALUES (?, ?, ?, ?, ?)",
+                }
+            )
+
+            first_employe = conn.execute("SELECT IFNULL(MAX(id), 0) FROM employes").fetchone()[0] + 1
+            employe_ids = range(first_employe, first_employe + employes)
+            for employe_id in employe_ids:
+                conn.execute(
+                    "INSERT INTO employes(id, nom, telephone, poste, date_embauche, observation) "
+                    "VALUES (?, ?, ?, ?, ?, '')",
+                    (employe_id, f"{rng.choice(PRENOMS)} {rng.choice(NOMS)} {employe_id}", _phone(rng),
+                     rng.choice(POSTES), _day(rng, start - timedelta(days=365), start).isoformat())
+                )
+                conn.execute(
+                    "INSERT INTO salaires(employe_id, montant_base) VALUES (?, ?)",
+                    (employe_id, rng.randrange(25, 81) * 1000 * 100)
+                )
+
+            operations = []
+            charges = []
+            for month in _months(start, end):
+                month_end = min((month + timedelta(days=32)).replace(day=1) - timedelta(days=1), end)
+                for employe_id in employe_ids:
+                    for _ in range(rng.randint(0, 2 * operations_per_month)):
+                        operation = rng.choices(('avance', 'prime', 'retenu'), weights=(60, 25, 15))[0]
+                        operations.append((employe_id, operation, rng.randrange(5, 200) * 100 * 100, '',
+                                           _day(rng, month, month_end).isoformat(), ''))
+                for _ in range(charges_per_month):
+                    charges.append((_day(rng, month, month_end).isoformat(), str(rng.choice(employe_ids)),
+                                    rng.randrange(2, 500) * 100 * 100, rng.choice(MOTIFS_CHARGE)))
+            conn.executemany(
+                "INSERT INTO operations(employe_id, operation, montant, motif, date, observation) "
+                "VALUES (?, ?, ?, ?, ?, ?)", operations
+            )
+            conn.executemany(
+                "INSERT INTO charges(date_charge, effectue_par, montant, motif) VALUES (?, ?, ?, ?)", charges
+            )
+
+            return {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                for table in ('clients', 'credit', 'paiement', 'employes', 'operations', 'charges')
+            }
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Générer une base de données de test (magasin synthétique).")
+    parser.add_argument('db', help="Base de données à créer.")
+    parser.add_argument('--scale', choices=SCALES, default='1k', help="Taille prédéfinie (nombre de crédits).")
+    parser.add_argument('--clients', type=int, help="Nombre de clients.")
+    parser.add_argument('--credits-per-client', type=int, help="Crédits par client (moyenne).")
+    parser.add_argument('--versements-per-credit', type=int, help="Versements par crédit (moyenne).")
+    parser.add_argument('--employes', type=int, help="Nombre d'employés.")
+    parser.add_argument('--years', type=int, help="Années couvertes par les dates.")
+    parser.add_argument('--operations-per-month', type=int, help="Opérations par employé et par mois (moyenne).")
+    parser.add_argument('--charges-per-month', type=int, help="Charges par mois.")
+    parser.add_argument('--seed', type=int, default=42, help="Graine du générateur aléatoire.")
+    parser.add_argument('--append', action='store_true', help="Ajouter à une base existante.")
+    args = parser.parse_args()
+
+    if os.path.exists(args.db) and not args.append:
+        parser.error(f"{args.db} existe déjà (utiliser --append pour y ajouter des données).")
+
+    options = dict(SCALES[args.scale])
+    for name in options:
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+
+    start = time.perf_counter()
+    counts = seed_shop(args.db, seed=args.seed, **options)
+    print(", ".join(f"{table}: {count}" for table, count in counts.items()))
+    print(f"{time.perf_counter() - start:.1f}s")
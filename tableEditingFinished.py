@@ -1,13 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Model/view tables of the main window.
+#                 Rows stay in a plain list, cells are formatted on demand by data(),
+#                 so only the visible cells are ever converted to text.
+# ----------------------------------------------------------------------------
+import decimal
+
 from PyQt5 import QtWidgets, QtCore
 
+from utils import format_money
+
+
+# These columns will be formatted as money
+MONEY_HEADERS = {'Salaire', 'Crédit', 'Montant Total', 'Versement', 'Reste', 'Montant'}
+# Role used by the proxy to sort on the raw value (numbers as numbers, not as formatted text)
+SORT_ROLE = QtCore.Qt.UserRole + 1
+
+
+class RowsTableModel(QtCore.QAbstractTableModel):
+    """
+    Table model over a list of rows (tuples returned by Database).
+
+    - set_rows() swaps the whole list in one model reset
+    - update_row() / remove_rows() patch single rows, found by id (column 0)
+    - data() formats the money columns only when a cell is displayed
+    - setData() keeps the text typed by the user until the next set_rows()
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rows = []
+        self._headers = []
+        self._money_columns = set()
+        self._positions = None      # str(id) -> row number, built on first lookup
+
+    def set_rows(self, rows, headers):
+        """
+        Replace the rows and headers of the model.
+        :param rows: A list of rows where each row is a list or tuple of values.
+        :param headers: A list of column headers.
+        """
+        self.beginResetModel()
+        self._rows = rows if isinstance(rows, list) else list(rows)
+        self._headers = list(headers)
+        self._money_columns = {col for col, header in enumerate(self._headers) if header.strip() in MONEY_HEADERS}
+        self._positions = None
+        self.endResetModel()
+
+    def rows(self):
+        return self._rows
+
+    def find_row(self, row_id):
+        """Return the row number of the row whose id (column 0) is ``row_id``, or -1."""
+        if self._positions is None:
+            self._positions = {str(row[0]): position for position, row in enumerate(self._rows) if row}
+        return self._positions.get(str(row_id), -1)
+
+    def update_row(self, row_data):
+        """
+        Replace the row having the same id as ``row_data``.
+        :return: the previous row, None if the id is not displayed
+        """
+        position = self.find_row(row_data[0])
+        if position < 0:
+            return None
+        previous = self._rows[position]
+        self._rows[position] = row_data
+        self.dataChanged.emit(self.index(position, 0), self.index(position, len(self._headers) - 1))
+        return previous
+
+    def remove_rows(self, row_ids):
+        """
+        Remove the displayed rows whose id is in ``row_ids``.
+        :return: the removed rows
+        """
+        removed = []
+        for position in sorted((self.find_row(row_id) for row_id in row_ids), reverse=True):
+            if position < 0:
+                continue
+            self.beginRemoveRows(QtCore.QModelIndex(), position, position)
+            removed.append(self._rows.pop(position))
+            self.endRemoveRows()
+        if removed:
+            self._positions = None      # row numbers after the removed rows have moved
+        return removed
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+
+    def _value(self, index):
+        row = self._rows[index.row()]
+        return row[index.column()] if index.column() < len(row) else None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            value = self._value(index)
+            if isinstance(value, (int, float, decimal.Decimal)) and index.column() in self._money_columns:
+                return format_money(value)
+            return str(value)
 
-class MyTable(QtWidgets.QTableWidget):
+        if role == QtCore.Qt.TextAlignmentRole:
+            return QtCore.Qt.AlignCenter
+
+        if role == SORT_ROLE:
+            value = self._value(index)
+            if isinstance(value, (int, float, decimal.Decimal)):
+                return float(value)
+            return '' if value is None else str(value)
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or role != QtCore.Qt.EditRole:
+            return False
+        row = list(self._rows[index.row()])
+        row[index.column()] = value
+        self._rows[index.row()] = tuple(row)
+        self.dataChanged.emit(index, index, [QtCore.Qt.DisplayRole, QtCore.Qt.EditRole])
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return QtCore.Qt.NoItemFlags
+        # Editing is allowed or not by the editTriggers of the view
+        return QtCore.Qt.ItemIsSelectable | QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
+        if orientation == QtCore.Qt.Horizontal:
+            return self._headers[section] if section < len(self._headers) else None
+        return str(section + 1)
+
+
+class MyTable(QtWidgets.QTableView):
+    """
+    QTableView with a RowsTableModel behind a sort proxy.
+    Row numbers (currentRow(), editingFinished, selection) are the ones displayed, i.e. after sorting.
+    """
     editingFinished = QtCore.pyqtSignal(int, int, str)  # row, col, new_text
 
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.source_model = RowsTableModel(self)
+        self.proxy_model = QtCore.QSortFilterProxyModel(self)
+        self.proxy_model.setSourceModel(self.source_model)
+        self.proxy_model.setSortRole(SORT_ROLE)
+        self.proxy_model.setDynamicSortFilter(False)    # an edited row stays where it is
+        self.setModel(self.proxy_model)
+
+    def set_rows(self, rows, headers):
+        """Display ``rows``, the current sort column and order are kept."""
+        self.source_model.set_rows(rows, headers)
+
+    def rows(self):
+        """The displayed rows, in the order they were given (not sorted)."""
+        return self.source_model.rows()
+
+    def update_row(self, row_data):
+        """Patch the row with the same id in place (it keeps its position), return the previous row or None."""
+        return self.source_model.update_row(row_data)
+
+    def remove_rows(self, row_ids):
+        """Remove the rows with these ids, return the removed rows."""
+        return self.source_model.remove_rows(row_ids)
+
+    def rowCount(self):
+        return self.proxy_model.rowCount()
+
+    def columnCount(self):
+        return self.proxy_model.columnCount()
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
     def closeEditor(self, editor, hint):
         super().closeEditor(editor, hint)
         index = self.currentIndex()
         if index.isValid():
-            item = self.item(index.row(), index.column())
-            if item:
-                self.editingFinished.emit(index.row(), index.column(), item.text())
+            self.editingFinished.emit(index.row(), index.column(), index.data(QtCore.Qt.EditRole))
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """Path of a new database with the full schema (every migration applied)."""
+    from db_handler import Database
+
+    path = str(tmp_path / "test.db")
+    db = Database(path, cache_size=0)
+    try:
+        result = db._create_tables()
+        assert result['success'], result
+    finally:
+        db.close()
+    return path
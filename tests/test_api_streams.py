@@ -0,0 +1,53 @@
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+import api
+from db_async import AsyncDatabase
+
+
+@pytest.fixture
+def client(db_path):
+    previous = api.db
+    api.db = AsyncDatabase(db_path)
+    api.db.db.pool.timeout = 1.0        # a starved pool fails fast
+    for number in range(3):
+        api.db.db.insert_new_client(f"Client {number}", "", "Tipaza", "")
+    with TestClient(api.app) as test_client:        # the lifespan closes api.db
+        yield test_client
+    api.db = previous
+
+
+def test_routes_respond_while_streams_are_open(client):
+    pool = api.db.db.pool
+    streams = [api.db.db.iter_clients() for _ in range(pool.max_size + 2)]
+    try:
+        for stream in streams:
+            assert next(stream)     # suspended mid-stream, its connection stays open
+        assert pool.stats()['detached'] == len(streams)
+
+        assert client.get("/clients/page").status_code == 200
+        assert client.get("/credits").status_code == 200
+        assert client.post("/clients", json={"nom": "Pendant le flux"}).status_code == 200
+    finally:
+        for stream in streams:
+            stream.close()
+    assert pool.stats()['detached'] == 0
+
+
+def test_stream_releases_its_slot(client):
+    response = client.get("/clients?stream=1")
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 3
+    assert api.stream_slots.active == 0
+    assert api.db.db.pool.stats()['detached'] == 0
+
+
+def test_too_many_streams_is_503(client, monkeypatch):
+    monkeypatch.setattr(api.stream_slots, "active", api.stream_slots.limit)
+    response = client.get("/clients?stream=1")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert client.get("/clients").status_code == 200      # the JSON listing is not limited
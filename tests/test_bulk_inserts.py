@@ -0,0 +1,78 @@
+import pytest
+
+from db_handler import Database
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path, cache_size=0)
+    db.insert_new_client("Client A", "", "Tipaza", "")
+    db.insert_new_client("Client B", "", "Tipaza", "")
+    yield db
+    db.close()
+
+
+def test_bulk_credit_ids_point_to_their_rows(db):
+    credits = [("Client A" if i % 2 else "Client B", "2025-01-01", 1000 + i, f"motif {i}") for i in range(50)]
+    result = db.insert_credits_bulk(credits)
+    assert result['success']
+    assert len(result['credit_ids']) == len(credits)
+
+    with db.connect() as conn:
+        for credit_id, (_, _, montant, motif) in zip(result['credit_ids'], credits):
+            row = conn.execute("SELECT motif, montant FROM credit WHERE id = ?", (credit_id,)).fetchone()
+            assert row == (motif, montant * 100)
+
+
+def test_bulk_versement_ids_point_to_their_rows(db):
+    credit_ids = db.insert_credits_bulk([("Client A", "2025-01-01", 5000, ""), ("Client B", "2025-01-01", 5000, "")])
+    credit_ids = credit_ids['credit_ids']
+    owners = {credit_ids[0]: db.name_index('clients').id_of("Client A"),
+              credit_ids[1]: db.name_index('clients').id_of("Client B")}
+    versements = [(credit_id, owners[credit_id], "2025-02-01", 10 + i, f"obs {i}")
+                  for i, credit_id in enumerate(credit_ids * 10)]
+    result = db.insert_versements_bulk(versements)
+    assert result['success']
+
+    with db.connect() as conn:
+        for versement_id, (credit_id, _, _, montant, observation) in zip(result['versement_ids'], versements):
+            row = conn.execute("SELECT credit_id, observation, montant FROM paiement WHERE id = ?",
+                               (versement_id,)).fetchone()
+            assert row == (credit_id, observation, montant * 100)
+
+
+def test_bulk_versement_errors_once_per_row(db):
+    credit_id = db.insert_credits_bulk([("Client A", "2025-01-01", 500, "")])['credit_ids'][0]
+    client_id = db.name_index('clients').id_of("Client A")
+    result = db.insert_versements_bulk([
+        (credit_id, client_id, "2025-02-01", 10, ""),
+        (credit_id, client_id, "pas une date", 10, ""),
+        (999, client_id, "2025-02-01", 10, ""),
+    ])
+    assert not result['success']
+    assert [error['index'] for error in result['errors']] == [1, 2]
+    assert "introuvable" in result['errors'][1]['error']
+
+
+def test_bulk_versements_cannot_exceed_reste(db):
+    credit_id = db.insert_credits_bulk([("Client A", "2025-01-01", 500, "")])['credit_ids'][0]
+    client_id = db.name_index('clients').id_of("Client A")
+    versement = (credit_id, client_id, "2025-02-01", 200, "")
+
+    result = db.insert_versements_bulk([versement] * 3)        # 600 > 500
+    assert not result['success']
+    assert [error['index'] for error in result['errors']] == [2]
+    with db.connect() as conn:
+        assert conn.execute("SELECT reste FROM credit WHERE id = ?", (credit_id,)).fetchone()[0] == 50000
+        assert conn.execute("SELECT COUNT(*) FROM paiement").fetchone()[0] == 0
+
+    assert db.insert_versements_bulk([versement, versement, (credit_id, client_id, "2025-02-01", 100, "")])['success']
+    with db.connect() as conn:
+        assert conn.execute("SELECT reste, statut FROM credit WHERE id = ?", (credit_id,)).fetchone() == (0, 'terminé')
+
+
+def test_single_versement_cannot_exceed_reste(db):
+    credit_id = db.insert_credits_bulk([("Client A", "2025-01-01", 500, "")])['credit_ids'][0]
+    client_id = db.name_index('clients').id_of("Client A")
+    assert not db.insert_new_versement(credit_id, client_id, "2025-02-01", "500,01")['success']
+    assert db.insert_new_versement(credit_id, client_id, "2025-02-01", "500,00")['success']
@@ -0,0 +1,65 @@
+import sqlite3
+import threading
+
+from db_handler import Database
+
+READERS = 4
+WRITERS = 2
+ITERATIONS = 100
+
+
+def test_wal_readers_and_writers_never_lock(db_path):
+    """Readers and writers in parallel threads, each with its own Database (like the API and the UI)."""
+    setup = Database(db_path, profile='wal', cache_size=0)
+    client_id = setup.insert_new_client("Client Concurrence", "", "Tipaza", "")['client_id']
+    assert setup.insert_new_credit("Client Concurrence", "2025-01-01", 100000, "")['success']
+    credit_id = setup.dump_credits()[0][0]
+    setup.close()
+
+    errors = []
+    lock = threading.Lock()
+    start = threading.Barrier(READERS + WRITERS)
+
+    def record(error):
+        with lock:
+            errors.append(error)
+
+    def reader():
+        db = Database(db_path, profile='wal', cache_size=0)
+        start.wait()
+        try:
+            for _ in range(ITERATIONS):
+                db.dump_credits()
+                db.get_credit_versements(credit_id)
+        except sqlite3.Error as err:
+            record(str(err))
+        finally:
+            db.close()
+
+    def writer():
+        db = Database(db_path, profile='wal', cache_size=0)
+        start.wait()
+        try:
+            for _ in range(ITERATIONS):
+                result = db.insert_new_versement(credit_id, client_id, '2025-01-02', 1, 'concurrence')
+                if not result['success']:
+                    record(result['error'])
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    threads += [threading.Thread(target=writer) for _ in range(WRITERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not [error for error in errors if 'locked' in error], errors
+    assert errors == []
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        versements, total_verse = conn.execute(
+            "SELECT nb_versements, total_verse FROM credit WHERE id = ?", (credit_id,)
+        ).fetchone()
+    assert versements == WRITERS * ITERATIONS
+    assert total_verse == WRITERS * ITERATIONS * 100      # 1 DA each, in centimes
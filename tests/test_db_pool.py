@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from db_pool import ConnectionPool, savepoint
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"))
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    yield pool
+    pool.close()
+
+
+def count(pool):
+    with pool.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+
+def test_inner_exit_does_not_commit_outer_transaction(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t(v) VALUES ('a')")
+            with pool.connection() as inner:
+                assert inner is conn
+                inner.execute("SELECT COUNT(*) FROM t").fetchone()
+            assert conn.in_transaction
+            raise RuntimeError("outer failure")
+    assert count(pool) == 0
+
+
+def test_inner_error_is_rolled_back_by_outer_block(pool):
+    with pytest.raises(sqlite3.IntegrityError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t(id, v) VALUES (1, 'a')")
+            with pool.connection() as inner:
+                inner.execute("INSERT INTO t(id, v) VALUES (1, 'b')")
+    assert count(pool) == 0
+
+
+def test_outermost_exit_commits_and_releases(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO t(v) VALUES ('a')")
+        with pool.connection():
+            pass
+        assert pool.depth() == 1
+    assert pool.depth() == 0
+    assert count(pool) == 1
+    assert pool.stats()['in_use'] == 0
+
+
+def test_savepoint_nests_in_outer_transaction(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            conn.execute("INSERT INTO t(v) VALUES ('a')")
+            with savepoint(conn, 'inner'):
+                conn.execute("INSERT INTO t(v) VALUES ('b')")
+            raise RuntimeError("outer failure")
+    assert count(pool) == 0
+
+
+def test_savepoint_error_undoes_only_its_block(pool):
+    with pool.connection() as conn:
+        conn.execute("INSERT INTO t(v) VALUES ('a')")
+        with pytest.raises(sqlite3.IntegrityError):
+            with savepoint(conn, 'inner'):
+                conn.execute("INSERT INTO t(id, v) VALUES (10, 'b')")
+                conn.execute("INSERT INTO t(id, v) VALUES (10, 'c')")
+    assert count(pool) == 1
+
+
+def test_savepoint_is_committed_by_the_outermost_block(pool):
+    with pytest.raises(RuntimeError):
+        with pool.connection() as conn:
+            with savepoint(conn, 'first'):         # no transaction open yet
+                conn.execute("INSERT INTO t(v) VALUES ('a')")
+            assert conn.in_transaction
+            raise RuntimeError("outer failure")
+    assert count(pool) == 0
+
+    with pool.connection() as conn:
+        with savepoint(conn, 'alone'):
+            conn.execute("INSERT INTO t(v) VALUES ('a')")
+    assert count(pool) == 1
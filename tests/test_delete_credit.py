@@ -0,0 +1,24 @@
+from db_handler import Database
+
+
+def test_delete_credit_returns_the_updated_client_rows(db_path):
+    db = Database(db_path, cache_size=0)
+    try:
+        db.insert_new_client("Client A", "", "Tipaza", "")
+        db.insert_new_client("Client B", "", "Tipaza", "")
+        credit_ids = db.insert_credits_bulk([("Client A", "2025-01-01", 100, ""),
+                                             ("Client A", "2025-01-02", 200, ""),
+                                             ("Client B", "2025-01-03", 300, "")])['credit_ids']
+        client_a = db.get_item_id('clients', 'nom', "Client A")
+        client_b = db.get_item_id('clients', 'nom', "Client B")
+
+        result = db.delete_credit([credit_ids[0], credit_ids[2]])
+        assert result['success'], result
+        rows = {row[0]: row for row in result['client_rows']}
+        assert set(rows) == {client_a, client_b}
+        # same columns as dump_clients(): total en cours in column 2
+        assert rows[client_a][2] == 200 and rows[client_b][2] == 0
+        assert rows[client_a] == next(row for row in db.dump_clients() if row[0] == client_a)
+        assert db.get_total_credit() == 200
+    finally:
+        db.close()
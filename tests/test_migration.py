@@ -0,0 +1,51 @@
+import sqlite3
+
+import pytest
+
+import migration
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO clients(nom, telephone, commune, observation) VALUES ('Client A', '', '', '')")
+    yield conn
+    conn.close()
+
+
+@pytest.mark.parametrize("stored, expected", [
+    ("04-09-2025", "2025-09-04"),
+    ("04/09/2025", "2025-09-04"),
+    ("4-9-2025", "2025-09-04"),
+    ("4/9/2025", "2025-09-04"),
+    ("2025/09/04", "2025-09-04"),
+    ("2025/9/4", "2025-09-04"),
+    ("2025-9-4", "2025-09-04"),
+    ("2025-09-04 10:30:00", "2025-09-04"),
+    ("2025-09-04", "2025-09-04"),
+])
+def test_normalize_dates_uses_the_input_formats(conn, stored, expected):
+    conn.execute("INSERT INTO credit(client_id, date_credit, montant, reste, motif) VALUES (1, ?, 100, 100, '')",
+                 (stored,))
+    migration.normalize_dates(conn)
+    assert conn.execute("SELECT date_credit FROM credit").fetchone()[0] == expected
+    assert migration.non_iso_dates(conn) == []
+
+
+def test_normalize_dates_logs_what_is_not_a_date(conn, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(migration.logger, 'warning', warnings.append)
+    conn.execute("INSERT INTO credit(client_id, date_credit, montant, reste, motif) VALUES (1, 'hier', 100, 100, '')")
+    migration.normalize_dates(conn)
+    assert migration.non_iso_dates(conn) == [("credit", "date_credit", 1, "hier")]
+    assert len(warnings) == 1 and "hier" in warnings[0]
+
+
+def test_migration_13_normalizes_databases_already_migrated(conn):
+    conn.execute("INSERT INTO credit(client_id, date_credit, montant, reste, motif) "
+                 "VALUES (1, '4-9-2025', 100, 100, '')")
+    conn.execute("PRAGMA user_version = 12")
+    conn.commit()
+    applied = migration.apply_migrations(conn)
+    assert [version for version, _ in applied] == [13]
+    assert conn.execute("SELECT date_credit FROM credit").fetchone()[0] == "2025-09-04"
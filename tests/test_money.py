@@ -0,0 +1,108 @@
+import random
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from db_handler import Database
+from money import Money, _convert_money, to_cents
+
+EDGE_CENTS = [0, 1, -1, 5, 99, 100, 101, -100, 1200050, -1200050, 10 ** 15 + 7, -(10 ** 15) - 7]
+RANDOM_CENTS = [random.Random(seed).randint(-10 ** 12, 10 ** 12) for seed in range(200)]
+VERSEMENTS = 3000
+CREDIT_CENTS = 10 ** 12         # large enough to stay 'en cours' after every versement
+
+
+@pytest.mark.parametrize("cents", EDGE_CENTS + RANDOM_CENTS)
+def test_cents_money_str_round_trip(cents):
+    money = Money.from_cents(cents)
+    assert type(money) is Money
+    assert money.cents == cents
+    assert money.as_tuple().exponent == -2          # always two decimals
+    assert Money(str(money)) == money
+    assert Money(str(money)).cents == cents
+    assert to_cents(str(money).replace('.', ',')) == cents
+    assert money == Decimal(cents) / 100
+
+
+@pytest.mark.parametrize("cents", EDGE_CENTS + RANDOM_CENTS[:50])
+def test_database_converter_round_trip(cents):
+    conn = sqlite3.connect(":memory:", detect_types=sqlite3.PARSE_COLNAMES)
+    value = conn.execute('SELECT ? AS "montant [money]"', (cents,)).fetchone()[0]
+    assert type(value) is Money
+    assert value == Money.from_cents(cents)
+    assert value.cents == cents
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (b"1200050", Money("12000.50")),
+    (b"-5", Money("-0.05")),
+    (b"12.5", Money("0.13")),       # REAL left by an old database: rounded to the centime
+    (b"1200050.0", Money("12000.50")),
+])
+def test_converter_raw_values(raw, expected):
+    assert _convert_money(raw) == expected
+    assert _convert_money(raw) is _convert_money(raw)       # converted once
+
+
+@pytest.mark.parametrize("text, cents", [
+    ("12 000,50", 1200050), ("1500.5", 150050), ("0,005", 1), ("-3", -300), (12000, 1200000), (0.1, 10),
+])
+def test_to_cents(text, cents):
+    assert to_cents(text) == cents
+
+
+@pytest.mark.parametrize("text", ["abc", "", "1,2,3", "NaN", "Infinity"])
+def test_invalid_amounts(text):
+    with pytest.raises(ValueError):
+        Money(text)
+
+
+def as_input(cents, rng):
+    """The same amount as the UI or the API may give it: Money, French string or centimes string."""
+    money = Money.from_cents(cents)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return money
+    if kind == 1:
+        return f"{money:,.2f}".replace(',', ' ').replace('.', ',')      # '12 000,50'
+    return str(money)
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_thousands_of_versements_sum_exactly(db_path, seed):
+    rng = random.Random(seed)
+    db = Database(db_path, profile='wal', cache_size=0)
+    try:
+        credits = {}        # credit_id -> client_id
+        for name in ("Client A", "Client B"):
+            client_id = db.insert_new_client(name, "", "Tipaza", "")['client_id']
+            for _ in range(2):
+                result = db.insert_new_credit(name, "2025-01-01", Money.from_cents(CREDIT_CENTS), "")
+                assert result['success'], result
+                credits[result['credit_id']] = client_id
+
+        expected = {credit_id: 0 for credit_id in credits}
+        credit_ids = list(credits)
+        for _ in range(VERSEMENTS):
+            credit_id = rng.choice(credit_ids)
+            cents = rng.randint(1, 10 ** 7)         # 0,01 .. 100 000,00 DA, many odd centimes
+            result = db.insert_new_versement(credit_id, credits[credit_id], "2025-02-01", as_input(cents, rng))
+            assert result['success'], result
+            expected[credit_id] += cents
+        total = sum(expected.values())
+
+        with db.connect() as conn:
+            assert conn.execute("SELECT SUM(montant) FROM paiement").fetchone()[0] == total
+            for credit_id, paid in expected.items():
+                row = conn.execute("SELECT total_verse, reste, statut FROM credit WHERE id = ?",
+                                   (credit_id,)).fetchone()
+                assert row == (paid, CREDIT_CENTS - paid, 'en cours')
+
+        assert db.get_total_credit() == Money.from_cents(len(credits) * CREDIT_CENTS - total)
+        for client_id in set(credits.values()):
+            paid = sum(cents for credit_id, cents in expected.items() if credits[credit_id] == client_id)
+            balance = db.get_total_credit_by_client(client_id).client_total_credit
+            assert balance == Money.from_cents(2 * CREDIT_CENTS - paid)
+    finally:
+        db.close()
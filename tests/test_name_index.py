@@ -0,0 +1,41 @@
+import pytest
+
+from db_handler import Database
+
+
+@pytest.fixture(params=[0, 100], ids=["sans cache", "cache"])
+def db(db_path, request):
+    db = Database(db_path, cache_size=request.param)
+    db.insert_new_client("Client A", "", "Tipaza", "")
+    db.insert_new_client("Client B", "", "Tipaza", "")
+    yield db
+    db.close()
+
+
+def test_names_resolve_with_and_without_cache(db):
+    client_id = db.get_item_id('clients', 'nom', "Client B")
+    assert db.get_item('clients', 'nom', client_id) == "Client B"
+    assert db.get_item_id('clients', 'nom', "Inconnu") is None
+    assert db.insert_new_client("Client B", "", "Tipaza", "")['success'] is False
+
+    assert db.update_client(client_id, 1, "Client C")['success']
+    assert db.get_item_id('clients', 'nom', "Client B") is None
+    assert db.get_item_id('clients', 'nom', "Client C") == client_id
+    assert db.get_item('clients', 'nom', client_id) == "Client C"
+
+
+def test_without_cache_lookups_skip_the_full_index(db_path, monkeypatch):
+    db = Database(db_path, cache_size=0)
+    try:
+        db.insert_new_client("Client A", "", "Tipaza", "")
+
+        def full_scan(table):
+            raise AssertionError(f"name_index({table!r}) reads the whole table on every lookup without cache")
+
+        monkeypatch.setattr(db, 'name_index', full_scan)
+        client_id = db.get_item_id('clients', 'nom', "Client A")
+        assert db.get_item('clients', 'nom', client_id) == "Client A"
+        assert db.insert_new_client("Client A", "", "Tipaza", "")['success'] is False
+        assert db.insert_new_client("Client B", "", "Tipaza", "")['success']
+    finally:
+        db.close()
@@ -0,0 +1,30 @@
+import os
+
+import pytest
+
+import payroll
+from db_handler import Database
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path, cache_size=0)
+    for i in range(5):
+        db.insert_new_employe(f"Employe {i}", "Vendeur", "", 30000 + i, "2025-01-01", "")
+    yield db
+    db.close()
+
+
+def test_spawned_workers_render_every_payslip(db, tmp_path):
+    result = payroll.run_payroll(db, "2025-03", output_dir=str(tmp_path), workers=2, chunk_size=2)
+    assert result['success'], result
+    assert result['count'] == 5
+    assert len(os.listdir(result['directory'])) == 5
+
+
+def test_single_cpu_renders_in_this_thread(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, 'cpu_count', lambda: 1)
+    monkeypatch.setattr(payroll, 'ProcessPoolExecutor', None)       # a pool would fail
+    result = payroll.run_payroll(db, "2025-03", output_dir=str(tmp_path))
+    assert result['success'], result
+    assert result['count'] == 5
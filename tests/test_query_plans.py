@@ -0,0 +1,26 @@
+import pytest
+
+from benchmark import HOT_QUERIES, is_scan, query_plans
+from db_handler import Database
+from seed import seed_shop
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    """Small shop on the full schema. No ANALYZE: the plans are the ones of a database without statistics."""
+    path = str(tmp_path_factory.mktemp("plans") / "plans.db")
+    seed_shop(path, clients=20, employes=3, years=1, charges_per_month=5)
+    db = Database(path, cache_size=0)       # every call must run its SQL
+    db.insert_new_employe("Rahim", "Vendeur", "", 30000, "2025-01-01", "")     # named in HOT_QUERIES
+    yield db
+    db.close()
+
+
+@pytest.mark.parametrize("method, args, allowed", HOT_QUERIES,
+                         ids=[f"{method}{args}" for method, args, _ in HOT_QUERIES])
+def test_hot_query_uses_indexes(db, method, args, allowed):
+    plans = query_plans(db, method, args)
+    assert plans, f"{method} n'a exécuté aucun SELECT"
+    for sql, details in plans:
+        scans = [detail for detail in details if is_scan(detail, allowed)]
+        assert not scans, f"{method}: {' | '.join(details)}\n{sql}"
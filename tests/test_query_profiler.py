@@ -0,0 +1,54 @@
+import pytest
+
+from db_pool import ConnectionPool
+from query_profiler import DIRECT, QueryProfiler
+
+
+@pytest.fixture
+def pool(tmp_path):
+    profiler = QueryProfiler(slow_ms=0)         # every statement is "slow"
+    pool = ConnectionPool(str(tmp_path / "profiled.db"), profiler=profiler)
+    with pool.connection() as conn:
+        conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    profiler.reset()
+    yield pool
+    pool.close()
+
+
+def last_query(pool):
+    return pool.profiler.slow_queries()[-1]
+
+
+def test_statements_outside_a_method_are_labelled_direct(pool):
+    with pool.connection() as conn:
+        conn.execute("SELECT * FROM t").fetchall()
+    query = last_query(pool)
+    assert query['method'] == DIRECT
+    assert query['affected'] is None
+    assert query['plan']
+
+
+def test_executemany_is_not_explained_and_counts_changed_rows(pool):
+    with pool.connection() as conn:
+        conn.executemany("INSERT INTO t(v) VALUES (?)", [(str(i),) for i in range(25)])
+    query = last_query(pool)
+    assert query['rows'] == 0
+    assert query['affected'] == 25
+    assert query['plan'] == []
+
+
+def test_dml_is_not_explained(pool):
+    with pool.connection() as conn:
+        conn.executemany("INSERT INTO t(v) VALUES (?)", [("a",), ("b",)])
+        conn.execute("UPDATE t SET v = 'c'")
+    query = last_query(pool)
+    assert (query['rows'], query['affected'], query['plan']) == (0, 2, [])
+
+
+def test_select_rows_are_counted_when_fetched(pool):
+    with pool.connection() as conn:
+        conn.executemany("INSERT INTO t(v) VALUES (?)", [("a",), ("b",), ("c",)])
+        rows = conn.execute("SELECT v FROM t WHERE id > ?", (1,)).fetchall()
+    query = last_query(pool)
+    assert query['rows'] == len(rows) == 2
+    assert query['affected'] is None
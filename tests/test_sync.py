@@ -0,0 +1,52 @@
+import sqlite3
+
+import migration
+from db_handler import Database
+
+
+def synced_credit_names(changes):
+    """credit id -> client name, as sent to the devices (credit_to_dict of api.py)."""
+    return {row[0]: row[2] for row in changes['credit']['upserted']}
+
+
+def test_client_rename_sends_its_credits_again(db_path):
+    db = Database(db_path, cache_size=0)
+    try:
+        client_id = db.insert_new_client("Ancien Nom", "", "Tipaza", "")['client_id']
+        db.insert_new_client("Autre", "", "Tipaza", "")
+        credit_ids = db.insert_credits_bulk([("Ancien Nom", "2025-01-01", 100, ""),
+                                             ("Ancien Nom", "2025-01-02", 200, ""),
+                                             ("Autre", "2025-01-03", 300, "")])['credit_ids']
+        version = db.changes_since(0)['version']
+
+        assert db.update_client(client_id, 1, "Nouveau Nom")['success']
+        changes = db.changes_since(version)['changes']
+        assert synced_credit_names(changes) == {credit_ids[0]: "Nouveau Nom", credit_ids[1]: "Nouveau Nom"}
+
+        # other columns don't touch the credits
+        version = db.changes_since(0)['version']
+        assert db.update_client(client_id, 3, "0550 00 00 00")['success']
+        assert db.changes_since(version)['changes']['credit']['upserted'] == []
+    finally:
+        db.close()
+
+
+def test_migration_relogs_credits_of_renamed_clients(db_path):
+    db = Database(db_path, cache_size=0)
+    db.insert_new_client("Ancien Nom", "", "Tipaza", "")
+    db.insert_new_client("Autre", "", "Tipaza", "")
+    credit_ids = db.insert_credits_bulk([("Ancien Nom", "2025-01-01", 100, ""),
+                                         ("Autre", "2025-01-03", 300, "")])['credit_ids']
+    db.close()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TRIGGER trg_clients_log_rename")         # a rename made before migration 12
+    conn.execute("UPDATE clients SET nom = 'Nouveau Nom' WHERE nom = 'Ancien Nom'")
+    conn.commit()
+    version = conn.execute("SELECT MAX(version) FROM change_log").fetchone()[0]
+    migration.relog_renamed_client_credits(conn)
+    conn.commit()
+    relogged = conn.execute("SELECT row_id FROM change_log WHERE table_name = 'credit' AND version > ?",
+                            (version,)).fetchall()
+    conn.close()
+    assert relogged == [(credit_ids[0],)]
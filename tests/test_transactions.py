@@ -0,0 +1,104 @@
+import pytest
+
+from db_handler import Database
+
+
+@pytest.fixture
+def db(db_path):
+    db = Database(db_path, cache_size=0)
+    db.insert_new_client("Client A", "", "Tipaza", "")
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def credit(db):
+    """(credit_id, client_id) of a 300 DA credit."""
+    credit_id = db.insert_credits_bulk([("Client A", "2025-01-01", 300, "")])['credit_ids'][0]
+    return credit_id, db.name_index('clients').id_of("Client A")
+
+
+def credit_state(db, credit_id):
+    with db.connect() as conn:
+        return conn.execute("SELECT reste, statut FROM credit WHERE id = ?", (credit_id,)).fetchone()
+
+
+def test_regle_and_delete_inside_outer_transaction(db, credit):
+    credit_id, client_id = credit
+    with db.connect() as conn:
+        assert db.regle_credit(credit_id, client_id)['success']
+        paiement_id = conn.execute("SELECT MAX(id) FROM paiement").fetchone()[0]
+        assert db.delete_paiement(paiement_id)['success']
+    assert credit_state(db, credit_id) == (30000, 'en cours')
+
+
+def test_regle_credit_rolled_back_with_outer_block(db, credit):
+    credit_id, client_id = credit
+    with pytest.raises(RuntimeError):
+        with db.connect() as conn:
+            conn.execute("UPDATE clients SET observation = 'outer' WHERE id = ?", (client_id,))
+            assert db.regle_credit(credit_id, client_id)['success']
+            raise RuntimeError("outer failure")
+
+    assert credit_state(db, credit_id) == (30000, 'en cours')
+    with db.connect() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM paiement WHERE credit_id = ?", (credit_id,)).fetchone()[0] == 0
+
+
+def test_delete_paiement_alone_commits(db, credit):
+    credit_id, client_id = credit
+    assert db.regle_credit(credit_id, client_id)['success']
+    assert credit_state(db, credit_id) == (0, 'terminé')
+    with db.connect() as conn:
+        paiement_id = conn.execute("SELECT MAX(id) FROM paiement").fetchone()[0]
+    assert db.delete_paiement(paiement_id)['success']
+    assert credit_state(db, credit_id) == (30000, 'en cours')
+
+
+TABLES = ('clients', 'credit', 'paiement', 'employes', 'salaires', 'operations', 'charges', 'salaire_logs')
+
+# Each write method, called inside a caller's transaction that fails afterwards
+WRITES = {
+    'insert_new_client': lambda db, ids: db.insert_new_client("Client N", "", "Tipaza", ""),
+    'update_client': lambda db, ids: db.update_client(ids['client'], 1, "Client Z"),
+    'insert_new_credit': lambda db, ids: db.insert_new_credit("Client A", "2025-01-02", 50, ""),
+    'insert_credits_bulk': lambda db, ids: db.insert_credits_bulk([("Client A", "2025-01-02", 50, "")] * 3),
+    'update_credit': lambda db, ids: db.update_credit(ids['credit'], 3, "motif", 0),
+    'insert_new_versement': lambda db, ids: db.insert_new_versement(ids['credit'], ids['client'], "2025-01-05", 10),
+    'insert_versements_bulk': lambda db, ids: db.insert_versements_bulk(
+        [(ids['credit'], ids['client'], "2025-01-05", 10, "")] * 3),
+    'delete_item': lambda db, ids: db.delete_item('credit', ids['credit']),
+    'delete_credit': lambda db, ids: db.delete_credit([ids['credit']]),
+    'insert_new_employe': lambda db, ids: db.insert_new_employe("Employe N", "Vendeur", "", 30000, "2025-01-01"),
+    'update_employe': lambda db, ids: db.update_employe(ids['employe'], 4, "35000"),
+    'insert_new_operation': lambda db, ids: db.insert_new_operation(ids['employe'], 'prime', 100, "", "2025-01-10", ""),
+    'close_payroll': lambda db, ids: db.close_payroll("2025-01"),
+    'insert_new_charge': lambda db, ids: db.insert_new_charge("2025-01-10", "Employe A", 100, "loyer"),
+    'update_charge': lambda db, ids: db.update_charge(ids['charge'], 4, "électricité"),
+}
+
+
+def snapshot(db):
+    with db.connect() as conn:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1").fetchall() for table in TABLES}
+
+
+@pytest.mark.parametrize("method", WRITES)
+def test_write_methods_never_commit_the_caller_transaction(db, credit, method):
+    credit_id, client_id = credit
+    db.insert_new_employe("Employe A", "Vendeur", "", 30000, "2025-01-01")
+    assert db.insert_new_charge("2025-01-10", "Employe A", 100, "loyer")['success']
+    with db.connect() as conn:
+        charge_id = conn.execute("SELECT MAX(id) FROM charges").fetchone()[0]
+    ids = {'client': client_id, 'credit': credit_id, 'employe': db.get_item_id('employes', 'nom', "Employe A"),
+           'charge': charge_id}
+    before = snapshot(db)
+
+    with pytest.raises(RuntimeError):
+        with db.connect():
+            result = WRITES[method](db, ids)
+            assert result['success'], result
+            assert snapshot(db) != before
+            raise RuntimeError("outer failure")
+
+    assert snapshot(db) == before
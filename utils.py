@@ -7,7 +7,6 @@
 # ----------------------------------------------------------------------------
 import os
 from datetime import datetime
-import decimal
 # Server for api
 from threading import Thread
 import uvicorn
@@ -21,6 +20,7 @@ from openpyxl.styles import Font, Alignment
 from openpyxl.utils import get_column_letter
 
 from gui.h_confirm_dialog import Ui_Dialog
+from money import Money
 
 
 # ---- Global Var ---- #
@@ -56,7 +56,7 @@ def format_money(value) -> str:
     try:
         # return "{:,.2f}".format(float(value))     # easy way
         # Frensh style with space
-        value = float(value)
+        value = Money(value)
         parts = "{:,.2f}".format(value).split('.')
         integer_part = parts[0].replace(',', ' ')  # Replace comma with space
         decimal_part = parts[1]
@@ -67,14 +67,12 @@ def format_money(value) -> str:
 
 def format_to_decimal(value):
     """
-    Convert a string value to a Decimal, replacing spaces and commas.
+    Convert a string value ('12 000,50') to Money (a Decimal with two decimals).
     """
-    # print(value)
     try:
-        # Replace spaces and commas, then convert to Decimal
-        value = value.replace(' ', '').replace(',', '.')
-        return {'success': True, 'value': decimal.Decimal(value)}
-    except (ValueError, TypeError, decimal.InvalidOperation):
+        # Spaces and commas are handled by Money
+        return {'success': True, 'value': Money(value)}
+    except (ValueError, TypeError):
         return {'success': False, 'error': 'Entrez un nombre valide.'}
 
 
@@ -121,6 +119,8 @@ def main_icons_callbacks(root):
         "fa6s.gear",  # main button icon (QtAwesome)
         [
             ("Run Server", root.toggle_server, "mdi6.play-pause"),
+            ("Fiches de paie du mois", root.print_all_payslips, "mdi6.file-pdf-box"),
+            ("Diagnostics", root.show_diagnostics, "mdi6.speedometer"),
         ],
         icon_color=WHITE_COLOR,
         with_icons=True
@@ -262,7 +262,7 @@ def main_icons_callbacks(root):
     root.ui.extraIconPlus.setIcon(qta.icon('ph.plus', color=SKYPE_COLOR))
 
     # =============================
-    # == QTableWidget Signals
+    # == Table Signals
     # ==============================
     # Enable/Disable buttons based on selection
     # Map each table widget to its page key
@@ -277,7 +277,9 @@ def main_icons_callbacks(root):
 
     # Connect signals dynamically
     for table, page in tables:
-        table.itemSelectionChanged.connect(lambda p=page: root.enable_buttons(p))
+        table.selectionModel().selectionChanged.connect(
+            lambda selected, deselected, p=page: root.enable_buttons(p)
+        )
 
     # Commit edits when editing is finished
     table_edits = [
@@ -391,39 +393,21 @@ def clear_inputs(inputs: list) -> None:
 
 
 # -- Table Widget Functions
-def populate_table_widget(table: QtWidgets.QTableWidget, rows: list, headers: list) -> None:
+def populate_table_widget(table, rows: list, headers: list) -> None:
     """
-    Populate a QTableWidget with rows and headers.
+    Display rows and headers in a MyTable view.
+    The rows are handed to the table model as is, cells are formatted only when displayed.
 
-    :param table: The QTableWidget instance.
+    :param table: The MyTable instance.
     :param rows: A list of rows where each row is a list or tuple of values.
     :param headers: A list of column headers.
     """
-    table.clearContents()
-    table.setColumnCount(len(headers))
-    table.setRowCount(len(rows))
-    table.setHorizontalHeaderLabels(headers)
-    table.setSortingEnabled(False)
-
-    # These columns will be formatted as money
-    money_headers = {'Salaire', 'Crédit', 'Montant Total', 'Versement', 'Reste', 'Montant'}
-    for row_idx, row_data in enumerate(rows):
-        for col_idx, value in enumerate(row_data):
-            header = headers[col_idx].strip()
-            if isinstance(value, (int, float)) and header in money_headers:
-                text = format_money(value)
-            else:
-                text = str(value)
-            item = QtWidgets.QTableWidgetItem(str(text))
-            item.setTextAlignment(QtCore.Qt.AlignCenter)
-            table.setItem(row_idx, col_idx, item)
-
+    table.set_rows(rows, headers)
     table.horizontalHeader().setStretchLastSection(True)
     # table.horizontalHeader().setSectionResizeMode(QtWidgets.QHeaderView.ResizeToContents)
-    table.setSortingEnabled(True)
 
 
-def table_has_selection(table: QtWidgets.QTableWidget) -> bool:
+def table_has_selection(table: QtWidgets.QTableView) -> bool:
     """
     Check if table has a selected rows
     :table: table widget name
@@ -433,28 +417,29 @@ def table_has_selection(table: QtWidgets.QTableWidget) -> bool:
     else: return False
 
 
-def get_column_value(table: QtWidgets.QTableWidget, row: int, column: int) -> str:
+def get_column_value(table: QtWidgets.QTableView, row: int, column: int) -> str:
     """
-    Get the value from a specific column of the selected row in a QTableWidget.
+    Get the value from a specific column of the selected row in a table view.
 
-    :param table: The QTableWidget instance.
+    :param table: The MyTable instance.
     :param column: The column index to retrieve the value from.
     :return: The value as a string.
     """
-    return table.item(row, column).text()
+    return table.model().index(row, column).data()
 
 
-def table_multi_selection(table: QtWidgets.QTableWidget) -> list:
+def table_multi_selection(table: QtWidgets.QTableView) -> list:
     """
     This function return column(0) for a selection
-    :table: QTableWidget
+    :table: MyTable
     :return: a list of ids.
     """
     selected_rows = set(index.row() for index in table.selectedIndexes())   # return index of selected row
     ids = list()
     if len(selected_rows) > 0:
+        model = table.model()
         for row in selected_rows:
-            item_id = table.item(row, 0).text()
+            item_id = model.index(row, 0).data()
             ids.append(item_id)
     return ids
 
@@ -505,15 +490,52 @@ def show_table_context_menu(table_widget: QtWidgets.QTableWidget, actions: list,
     menu.exec_(table_widget.viewport().mapToGlobal(pos))
 
 
-def export_tablewidget_to_excel(table: QtWidgets.QTableWidget, file_name: str = "export", title: str = "Export") -> str:
+def table_contents(table: QtWidgets.QTableView) -> tuple:
+    """
+    Read the headers and the displayed text of a table view, in the displayed order.
+    Must run on the GUI thread: the result can then be exported from a worker.
+
+    :param table: The MyTable instance.
+    :return: (headers, rows) with rows as lists of strings.
+    """
+    model = table.model()
+    columns = range(model.columnCount())
+    headers = []
+    for col in columns:
+        header = model.headerData(col, QtCore.Qt.Horizontal)
+        headers.append(header if header else f"Column {col + 1}")
+
+    rows = [
+        [model.index(row, col).data() or "" for col in columns]
+        for row in range(model.rowCount())
+    ]
+    return headers, rows
+
+
+def export_tablewidget_to_excel(table: QtWidgets.QTableView, file_name: str = "export", title: str = "Export") -> str:
     """
-    Export the contents of a QTableWidget to an Excel file with a date and title.
+    Export the contents of a table view (in the displayed order) to an Excel file with a date and title.
+
+    :param table: The MyTable instance.
+    :param file_name: Base file name (without extension).
+    :param title: The title to display in the Excel file.
+    :return: A message with the full path of the saved file.
+    """
+    headers, rows = table_contents(table)
+    return export_rows_to_excel(headers, rows, file_name=file_name, title=title)
+
+
+def export_rows_to_excel(headers: list, rows: list, file_name: str = "export", title: str = "Export") -> str:
+    """
+    Write headers and rows to an Excel file with a date and title.
     File is saved inside 'excel_fichier' directory, auto-created if missing.
+    No Qt call: safe to run in a background worker.
 
-    :param table: The QTableWidget instance.
+    :param headers: A list of column headers.
+    :param rows: A list of rows (lists of values), see table_contents().
     :param file_name: Base file name (without extension).
     :param title: The title to display in the Excel file.
-    :return: Full path of the saved file.
+    :return: A message with the full path of the saved file.
     """
     # ---- Ensure directory exists ----
     output_dir = "excel_fichier"
@@ -527,22 +549,18 @@ def export_tablewidget_to_excel(table: QtWidgets.QTableWidget, file_name: str =
     ws = wb.active
 
     # ---- Date in first line ----
-    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=table.columnCount())
+    ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=len(headers))
     ws["A1"] = datetime.now().strftime("%d-%m-%Y %H:%M")
     ws["A1"].font = Font(bold=True, italic=True, size=11)
     ws["A1"].alignment = Alignment(horizontal="right")
 
     # ---- Title in second line ----
-    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=table.columnCount())
+    ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=len(headers))
     ws["A2"] = title
     ws["A2"].font = Font(bold=True, size=14)
     ws["A2"].alignment = Alignment(horizontal="center")
 
     # ---- Headers in third line ----
-    headers = []
-    for col in range(table.columnCount()):
-        header_item = table.horizontalHeaderItem(col)
-        headers.append(header_item.text() if header_item else f"Column {col + 1}")
     ws.append(headers)
 
     for col_num, _ in enumerate(headers, start=1):
@@ -551,15 +569,11 @@ def export_tablewidget_to_excel(table: QtWidgets.QTableWidget, file_name: str =
         cell.alignment = Alignment(horizontal="center")
 
     # ---- Data rows ----
-    for row in range(table.rowCount()):
-        row_data = []
-        for col in range(table.columnCount()):
-            item = table.item(row, col)
-            row_data.append(item.text() if item else "")
+    for row_data in rows:
         ws.append(row_data)
 
     # ---- Auto column width ----
-    for col in range(1, table.columnCount() + 1):
+    for col in range(1, len(headers) + 1):
         max_length = 0
         col_letter = get_column_letter(col)
         for cell in ws[col_letter]:
@@ -569,7 +583,7 @@ def export_tablewidget_to_excel(table: QtWidgets.QTableWidget, file_name: str =
 
     # ---- Save file ----
     wb.save(filename)
-    return f"✅ Exporté {table.rowCount()} ligne X {table.columnCount()} avec succès dans '{filename}'."
+    return f"✅ Exporté {len(rows)} ligne X {len(headers)} avec succès dans '{filename}'."
 
 
 # == QComboBox
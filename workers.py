@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# author        : el3arbi bdabve@gmail.com
+# created       :
+# desc          : Background tasks for the PyQt UI.
+#                 Database calls and exports run on a QThreadPool, results come back
+#                 to the GUI thread through signals. One current task per key:
+#                 a new search cancels the previous one.
+# ----------------------------------------------------------------------------
+from PyQt5 import QtWidgets, QtCore
+
+from logger import logger
+
+
+class WorkerSignals(QtCore.QObject):
+    """
+    Signals of a Worker (a QRunnable can't have signals itself).
+    Each signal carries the worker, so the receiver knows which task it comes from.
+    """
+    result = QtCore.pyqtSignal(object, object)     # worker, returned value
+    error = QtCore.pyqtSignal(object, str)         # worker, error message
+    progress = QtCore.pyqtSignal(object, int, int)  # worker, done, total
+    finished = QtCore.pyqtSignal(object)           # worker
+
+
+class Worker(QtCore.QRunnable):
+    """
+    Run ``fn(*args, **kwargs)`` on a pool thread.
+    A cancelled worker still runs if already started (sqlite3 can't be stopped halfway),
+    but its result is dropped.
+    """
+    def __init__(self, key, fn, *args, **kwargs):
+        super().__init__()
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_result = None
+        self.on_error = None
+        self.on_progress = None
+        self.cancelled = False
+        self.signals = WorkerSignals()
+        # TaskRunner keeps the worker alive until its signals are delivered
+        self.setAutoDelete(False)
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            if self.cancelled:
+                return
+            if self.on_progress is not None:
+                # fn reports with progress(done, total), delivered on the GUI thread
+                self.kwargs['progress'] = lambda done, total: self.signals.progress.emit(self, done, total)
+            value = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            logger.exception(f"Task({self.key}) failed: {e}")
+            self.signals.error.emit(self, str(e))
+        else:
+            self.signals.result.emit(self, value)
+        finally:
+            self.signals.finished.emit(self)
+
+
+class TaskRunner(QtCore.QObject):
+    """
+    Run UI tasks in the background, keyed by what they display.
+
+        self.tasks = TaskRunner(self)
+        self.tasks.run('credits', self.db.dump_credits, on_result=self.display_credits)
+
+    - run() cancels the task still pending for the same key (superseded search, refresh...)
+    - on_result / on_error are called on the GUI thread, only for the current task of the key
+    - a busy cursor is shown while at least one task is running (busy_changed signal)
+    """
+    busy_changed = QtCore.pyqtSignal(bool)
+
+    def __init__(self, parent=None, max_threads=4):
+        super().__init__(parent)
+        # Less threads than Database connections (pool_size=5): a task never waits for a connection
+        self.pool = QtCore.QThreadPool(self)
+        self.pool.setMaxThreadCount(max_threads)
+        self._current = {}      # key -> Worker
+        self._running = set()   # workers started and not finished yet
+
+    def run(self, key, fn, *args, on_result=None, on_error=None, on_progress=None, **kwargs):
+        """
+        Start ``fn(*args, **kwargs)`` as the current task of ``key``.
+        :param on_result: called with the returned value
+        :param on_error: called with the error message, default: logged only
+        :param on_progress: called with (done, total), fn gets a ``progress`` keyword argument to report them
+        :return: the Worker
+        """
+        self.cancel(key)
+
+        worker = Worker(key, fn, *args, **kwargs)
+        worker.on_result = on_result
+        worker.on_error = on_error
+        worker.on_progress = on_progress
+        worker.signals.result.connect(self._on_result)
+        worker.signals.progress.connect(self._on_progress)
+        worker.signals.error.connect(self._on_error)
+        worker.signals.finished.connect(self._on_finished)
+
+        self._current[key] = worker
+        self._set_running(worker, True)
+        self.pool.start(worker)
+        return worker
+
+    def cancel(self, key):
+        """Cancel the current task of ``key`` (its result will be ignored)."""
+        worker = self._current.pop(key, None)
+        if worker is None:
+            return
+        worker.cancel()
+        if self.pool.tryTake(worker):
+            # Still queued: it will never run nor emit finished
+            self._set_running(worker, False)
+
+    def is_busy(self):
+        return bool(self._running)
+
+    def wait(self, msecs=-1):
+        """Wait for the running tasks (on close)."""
+        return self.pool.waitForDone(msecs)
+
+    def _is_current(self, worker):
+        return not worker.cancelled and self._current.get(worker.key) is worker
+
+    @QtCore.pyqtSlot(object, object)
+    def _on_result(self, worker, value):
+        if not self._is_current(worker):
+            return
+        del self._current[worker.key]
+        if worker.on_result is not None:
+            worker.on_result(value)
+
+    @QtCore.pyqtSlot(object, str)
+    def _on_error(self, worker, message):
+        if not self._is_current(worker):
+            return
+        del self._current[worker.key]
+        if worker.on_error is not None:
+            worker.on_error(message)
+
+    @QtCore.pyqtSlot(object, int, int)
+    def _on_progress(self, worker, done, total):
+        if self._is_current(worker) and worker.on_progress is not None:
+            worker.on_progress(done, total)
+
+    @QtCore.pyqtSlot(object)
+    def _on_finished(self, worker):
+        self._set_running(worker, False)
+
+    def _set_running(self, worker, running):
+        was_busy = self.is_busy()
+        if running:
+            self._running.add(worker)
+        else:
+            self._running.discard(worker)
+
+        if was_busy != self.is_busy():
+            if self.is_busy():
+                QtWidgets.QApplication.setOverrideCursor(QtCore.Qt.BusyCursor)
+            else:
+                QtWidgets.QApplication.restoreOverrideCursor()
+            self.busy_changed.emit(self.is_busy())